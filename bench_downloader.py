@@ -0,0 +1,596 @@
+"""
+다운로더 벤치마크 / 부하 테스트
+유튜브에 접속하지 않고, 합성 영상 파일을 내주는 로컬 HTTP 서버로 다운로드 성능을 잽니다.
+
+    python bench_downloader.py -o baseline.json
+    python bench_downloader.py --baseline baseline.json
+
+서버는 이 스크립트를 '--serve'로 실행한 별도 프로세스로, Range 요청, 응답 지연, 연결별 대역폭 제한,
+실패 주입(503 응답, 본문 중간에 연결 끊기)을 지원합니다. 서버 CPU는 측정에 섞이지 않습니다.
+
+측정 대상 (--drivers)
+  download_video  youtube_downloader.download_video (pytube 캐시 형식으로 정보를 미리 넣어 둠)
+  engine          youtube_downloader_gui.EngineDownloaderThread (yt-dlp 라이브러리)
+  process         youtube_downloader_gui.DownloaderThread (외부 yt-dlp 프로세스)
+yt-dlp 드라이버는 영상 정보를 한 번 가져와 캐시에 넣은 뒤에 잽니다. (추출 시간 제외)
+
+시나리오(드라이버 x 네트워크 프로필 x 동시 다운로드 수)마다 처리량(MB/s), 첫 바이트까지 걸린 시간(TTFB),
+MB당 CPU 시간, 메모리(RSS) 사용량을 JSON으로 기록합니다. --baseline을 주면 기준보다
+--threshold 이상 나빠진 항목을 출력하고 종료 코드 1로 끝납니다.
+"""
+import sys
+import os
+import re
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import contextlib
+import http.server
+from urllib.parse import urlsplit, parse_qs, urlencode
+from urllib.request import urlopen
+from concurrent.futures import ThreadPoolExecutor
+
+from video_formats import parse_size, format_size
+
+MEDIA_SEED = 20240601 # 합성 영상 내용은 항상 같습니다.
+MEDIA_BLOCK_SIZE = 1024 * 1024 # 이 크기의 무작위 블록을 반복해 영상 내용을 만듭니다.
+WRITE_BLOCK_SIZE = 64 * 1024 # 서버가 한 번에 보내는 크기 (대역폭 제한 단위)
+
+# 네트워크 프로필: 요청마다 응답 지연(초), 연결별 대역폭(바이트/초, 0이면 무제한), 요청별 실패 확률
+NETWORK_PROFILES = {
+    'lan': {'latency': 0.0, 'bandwidth': 0, 'fail_rate': 0.0},
+    'broadband': {'latency': 0.03, 'bandwidth': 4 * 1024 * 1024, 'fail_rate': 0.0},
+    'flaky': {'latency': 0.08, 'bandwidth': 2 * 1024 * 1024, 'fail_rate': 0.05},
+}
+DRIVERS = ('download_video', 'engine', 'process')
+DEFAULT_PROFILES = 'lan,broadband,flaky'
+DEFAULT_CONCURRENCY = '1,4'
+DEFAULT_VIDEOS = 8 # 시나리오마다 받는 영상 수
+DEFAULT_VIDEO_SIZE = '16M'
+DEFAULT_THRESHOLD = 0.20 # 기준 대비 이 비율보다 나빠지면 회귀로 봅니다.
+SCENARIO_TIMEOUT_S = 600 # 시나리오 하나가 이보다 오래 걸리면 남은 다운로드를 실패로 처리
+RSS_SAMPLE_INTERVAL_S = 0.005
+
+# 회귀 판정 항목: (나빠지는 방향, 무시할 만큼 작은 차이)
+REGRESSION_METRICS = {
+    'mb_per_s': ('lower', 0.5),
+    'ttfb_s': ('higher', 0.02),
+    'cpu_s_per_mb': ('higher', 0.002),
+    'rss_growth_mb': ('higher', 8),
+}
+
+# --- 가짜 영상 서버 (별도 프로세스) ---
+MEDIA_PATH_PATTERN = re.compile(r"/media/(\d+)/([\w.-]+)\.mp4")
+
+def media_url(base_url, name, size):
+    # 경로에 크기를 넣어 두므로 서버는 영상 목록을 따로 갖지 않습니다.
+    return f"{base_url}/media/{size}/{name}.mp4"
+
+
+class FakeVideoServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, MediaHandler)
+        self.media_block = random.Random(MEDIA_SEED).randbytes(MEDIA_BLOCK_SIZE)
+        self.config = dict(NETWORK_PROFILES['lan'])
+        self.random = random.Random(MEDIA_SEED)
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'requests': 0, 'bytes_sent': 0, 'failures': {'status': 0, 'cut': 0}, 'first_byte': {}}
+
+    def take_stats(self):
+        with self.lock:
+            stats = self.stats
+            self.reset_stats()
+        return stats
+
+    def pick_failure(self):
+        # 주입할 실패 종류 (없으면 None)
+        with self.lock:
+            if self.random.random() >= self.config['fail_rate']:
+                return None
+            failure = self.random.choice(('status', 'cut'))
+            self.stats['failures'][failure] += 1
+            return failure
+
+    def media_bytes(self, offset, length):
+        block = self.media_block
+        start = offset % len(block)
+        data = block[start:start + length]
+        while len(data) < length:
+            data += block[:length - len(data)]
+        return data
+
+
+class MediaHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # 다운로더가 연결을 재사용할 수 있도록 keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path == '/_config':
+            with self.server.lock:
+                self.server.config.update({key: float(values[0]) for key, values in parse_qs(parts.query).items()})
+            self.send_json(self.server.config)
+        elif parts.path == '/_stats':
+            self.send_json(self.server.take_stats())
+        else:
+            self.send_media(parts.path)
+
+    def do_HEAD(self):
+        self.send_media(urlsplit(self.path).path, head=True)
+
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_media(self, path, head=False):
+        match = MEDIA_PATH_PATTERN.fullmatch(path)
+        if not match:
+            self.send_error(404)
+            return
+        size, name = int(match.group(1)), match.group(2)
+        config = dict(self.server.config)
+        with self.server.lock:
+            self.server.stats['requests'] += 1
+        time.sleep(config['latency'])
+
+        start, end = 0, size - 1
+        range_header = self.headers.get('Range')
+        if range_header:
+            range_match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header.strip())
+            if not range_match or int(range_match.group(1)) >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            start = int(range_match.group(1))
+            end = min(int(range_match.group(2)) if range_match.group(2) else size - 1, size - 1)
+        length = end - start + 1
+
+        # 1바이트 확인 요청(probe)에는 실패를 넣지 않습니다.
+        failure = None if head or length <= 1 else self.server.pick_failure()
+        if failure == 'status':
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(206 if range_header else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        if range_header:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head:
+            return
+        try:
+            self.write_body(name, start, length // 2 if failure == 'cut' else length, config['bandwidth'], length > 1)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True # 다운로더가 먼저 끊음 (중지, 시간 초과 등)
+            return
+        if failure == 'cut':
+            # 본문을 절반만 보내고 연결을 끊습니다.
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def write_body(self, name, offset, length, bandwidth, is_media):
+        started = time.monotonic()
+        sent = 0
+        while sent < length:
+            block = self.server.media_bytes(offset + sent, min(WRITE_BLOCK_SIZE, length - sent))
+            self.wfile.write(block)
+            if sent == 0 and is_media:
+                with self.server.lock:
+                    self.server.stats['first_byte'].setdefault(name, time.time())
+            sent += len(block)
+            with self.server.lock:
+                self.server.stats['bytes_sent'] += len(block)
+            if bandwidth:
+                delay = started + sent / bandwidth - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+
+def serve(port):
+    server = FakeVideoServer(('127.0.0.1', port))
+    print(f"PORT {server.server_port}", flush=True) # 부모 프로세스가 이 줄로 포트를 알아냅니다.
+    server.serve_forever()
+
+
+class ServerProcess:
+    """가짜 영상 서버를 자식 프로세스로 띄우고 설정/통계 요청을 보냅니다."""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve'],
+                                        stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line.startswith('PORT '):
+            self.process.kill()
+            raise RuntimeError("가짜 영상 서버를 시작하지 못했습니다.")
+        self.base_url = f"http://127.0.0.1:{int(line.split()[1])}"
+
+    def request(self, path):
+        with urlopen(self.base_url + path, timeout=10) as response:
+            return json.loads(response.read())
+
+    def configure(self, profile):
+        return self.request('/_config?' + urlencode(profile))
+
+    def take_stats(self):
+        return self.request('/_stats')
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+# --- 측정 ---
+def current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource # 리눅스가 아니면 프로세스 전체의 최대값으로 대신합니다.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler(threading.Thread):
+    """RSS를 주기적으로 읽어 시나리오별 최대값을 구합니다."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.peak = current_rss()
+
+    def run(self):
+        while not self.stopped.wait(RSS_SAMPLE_INTERVAL_S):
+            rss = current_rss()
+            with self.lock:
+                self.peak = max(self.peak, rss)
+
+    def reset(self):
+        with self.lock:
+            self.peak = current_rss()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def cpu_seconds():
+    # 외부 yt-dlp 프로세스처럼 끝난 자식 프로세스의 CPU 시간도 포함합니다.
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+# --- 드라이버 ---
+def seed_pytube_cache(url, name, size, policy):
+    """
+    youtube_downloader.resolve_video가 읽는 캐시 형식으로 영상 정보를 넣어 둡니다.
+    (pytube는 로컬 서버의 영상을 추출할 수 없으므로)
+    """
+    import youtube_downloader
+    from video_cache import VideoCache, video_key
+    info = {'title': name, 'urls': [url], 'filename': f"{name}.mp4", 'filesize': size,
+            'itags': [18], 'format': f"벤치마크 ({format_size(size)})", 'thumbnail': None}
+    VideoCache.shared().put(video_key(url), youtube_downloader.cache_source(policy), name, info)
+
+
+def run_download_video(jobs, save_path, concurrency, policy):
+    """download_video를 concurrency개의 스레드로 동시에 실행하고 영상별 (시작 시각, 성공 여부)를 돌려줍니다."""
+    import youtube_downloader
+    for url, name, size in jobs:
+        seed_pytube_cache(url, name, size, policy)
+
+    def job(url, name, size):
+        started = time.time()
+        youtube_downloader.download_video(url, save_path, policy)
+        file_path = os.path.join(save_path, f"{name}.mp4")
+        # download_video는 오류를 출력만 하므로 받은 파일로 성공 여부를 판단합니다.
+        return started, os.path.exists(file_path) and os.path.getsize(file_path) == size
+
+    # 진행률 출력은 버립니다. (벤치마크 결과는 stderr로 출력)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(lambda job_args: job(*job_args), jobs))
+
+
+def prepare_ytdlp(jobs, save_path, policy):
+    # 대기열에 추가할 때처럼 영상 정보를 먼저 가져와 캐시에 넣어 둡니다.
+    from youtube_downloader_gui import YtDlpEngine
+    for url, name, size in jobs:
+        YtDlpEngine.shared().resolve(url, save_path, policy)
+
+
+def run_threads(thread_class, jobs, save_path, concurrency, policy):
+    """
+    GUI의 다운로드 스레드를 대기열처럼 최대 concurrency개씩 실행합니다.
+    진행 상황은 GUI와 같이 ProgressBoard에 기록됩니다.
+    """
+    from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+    from youtube_downloader_gui import ProgressBoard
+    board = ProgressBoard()
+    pending = list(jobs)
+    running = {}
+    outcomes = {}
+
+    def start_next():
+        while pending and len(running) < concurrency:
+            url, name, size = pending.pop(0)
+            thread = thread_class(url, save_path, board=board, board_key=url, policy=policy)
+            thread.completed.connect(lambda message, file_path, url=url: outcomes[url].append(True))
+            thread.error.connect(lambda message, url=url: outcomes[url].append(False))
+            thread.finished.connect(lambda url=url: finished(url))
+            running[url] = thread
+            outcomes[url] = [time.time()]
+            thread.start()
+
+    def finished(url):
+        running.pop(url).wait()
+        start_next()
+
+    start_next()
+    tick = QTimer()
+    tick.start(50) # processEvents가 마지막 스레드가 끝난 뒤에도 계속 기다리지 않게 합니다.
+    deadline = time.monotonic() + SCENARIO_TIMEOUT_S
+    try:
+        while running or pending:
+            if time.monotonic() > deadline:
+                pending.clear()
+                for thread in list(running.values()):
+                    thread.stop()
+                    thread.wait()
+                break
+            QCoreApplication.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents)
+            board.take()
+    finally:
+        tick.stop()
+    return [(outcomes[url][0], outcomes[url][1:] == [True]) if url in outcomes else (time.time(), False)
+            for url, name, size in jobs]
+
+
+def available_drivers():
+    # 드라이버 이름 -> 실행할 수 없는 이유 (실행 가능하면 None)
+    try:
+        import yt_dlp
+    except ImportError:
+        yt_dlp = None
+    return {
+        'download_video': None,
+        'engine': None if yt_dlp else "yt_dlp 모듈이 없습니다.",
+        'process': None if shutil.which('yt-dlp') else "yt-dlp가 PATH에 없습니다.",
+    }
+
+
+def run_scenario(server, sampler, driver, profile_name, concurrency, videos, size, save_path, policy, tag):
+    jobs = [(media_url(server.base_url, f"{tag}-{i}", size), f"{tag}-{i}", size) for i in range(videos)]
+    os.makedirs(save_path, exist_ok=True)
+    server.configure(NETWORK_PROFILES['lan'])
+    if driver != 'download_video':
+        prepare_ytdlp(jobs, save_path, policy) # 정보 추출은 측정하지 않습니다.
+    server.configure(NETWORK_PROFILES[profile_name])
+    server.take_stats()
+
+    sampler.reset()
+    rss_before = current_rss()
+    cpu_before = cpu_seconds()
+    started = time.perf_counter()
+    if driver == 'download_video':
+        outcomes = run_download_video(jobs, save_path, concurrency, policy)
+    else:
+        from youtube_downloader_gui import DownloaderThread, EngineDownloaderThread
+        thread_class = EngineDownloaderThread if driver == 'engine' else DownloaderThread
+        outcomes = run_threads(thread_class, jobs, save_path, concurrency, policy)
+    wall = time.perf_counter() - started
+    cpu = cpu_seconds() - cpu_before
+    peak = max(sampler.peak, current_rss())
+    stats = server.take_stats()
+    shutil.rmtree(save_path, ignore_errors=True)
+
+    done = sum(1 for _, ok in outcomes if ok)
+    megabytes = done * size / 1024 ** 2
+    # TTFB: 작업을 시작한 뒤 서버가 그 영상의 본문 첫 바이트를 보낼 때까지 (서버와 같은 시계 사용)
+    ttfbs = sorted(stats['first_byte'][name] - start
+                   for (url, name, _), (start, ok) in zip(jobs, outcomes) if ok and name in stats['first_byte'])
+    return {
+        'wall_s': wall,
+        'mb_per_s': megabytes / wall if wall else 0.0,
+        'ttfb_s': statistics.median(ttfbs) if ttfbs else None,
+        'ttfb_max_s': ttfbs[-1] if ttfbs else None,
+        'cpu_s_per_mb': cpu / megabytes if megabytes else None,
+        'peak_rss_mb': peak / 1024 ** 2,
+        'rss_growth_mb': (peak - rss_before) / 1024 ** 2,
+        'videos': videos,
+        'failed': videos - done,
+        'requests': stats['requests'],
+        'served_mb': stats['bytes_sent'] / 1024 ** 2,
+        'injected_failures': sum(stats['failures'].values()),
+    }
+
+
+def merge_runs(runs):
+    # 반복 실행한 결과는 항목별 중앙값으로 합칩니다. (실패 수는 최대값)
+    merged = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        if not values:
+            merged[key] = None
+        elif key == 'failed':
+            merged[key] = max(values)
+        else:
+            merged[key] = statistics.median(values)
+        if isinstance(merged[key], float):
+            merged[key] = round(merged[key], 6)
+    merged['runs'] = len(runs)
+    return merged
+
+
+# --- 결과 비교 ---
+def compare(results, baseline, threshold):
+    """기준 결과보다 threshold 이상 나빠진 항목을 한 줄씩 돌려줍니다."""
+    regressions = []
+    for key, base in sorted(baseline.items()):
+        current = results.get(key)
+        if current is None:
+            continue
+        if (current.get('failed') or 0) > (base.get('failed') or 0):
+            regressions.append(f"{key} failed: {base.get('failed')} -> {current['failed']}")
+        for metric, (worse, minimum) in REGRESSION_METRICS.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if worse == 'lower':
+                change = -change
+            if change > threshold and abs(new - old) > minimum:
+                regressions.append(f"{key} {metric}: {old:.4g} -> {new:.4g} ({change * 100:+.0f}% 나빠짐)")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"{'시나리오':<32} {'MB/s':>8} {'TTFB':>9} {'CPU/MB':>9} {'RSS 증가':>9} {'실패':>4} {'기준 대비':>8}",
+          file=sys.stderr)
+    for key, result in results.items():
+        if result.get('skipped'):
+            print(f"{key:<32} 건너뜀: {result['skipped']}", file=sys.stderr)
+            continue
+        base = (baseline or {}).get(key, {}).get('mb_per_s')
+        change = f"{(result['mb_per_s'] / base - 1) * 100:+.0f}%" if base else ''
+        ttfb = f"{result['ttfb_s'] * 1000:.0f}ms" if result['ttfb_s'] is not None else '-'
+        cpu = f"{result['cpu_s_per_mb'] * 1000:.1f}ms" if result['cpu_s_per_mb'] is not None else '-'
+        print(f"{key:<32} {result['mb_per_s']:>8.1f} {ttfb:>9} {cpu:>9} {result['rss_growth_mb']:>7.1f}MB "
+              f"{result['failed']:>4} {change:>8}", file=sys.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="로컬 가짜 영상 서버로 다운로더 성능을 잽니다.")
+    parser.add_argument('--drivers', default=','.join(DRIVERS), help=f"측정할 드라이버 (기본값: {','.join(DRIVERS)})")
+    parser.add_argument('--profiles', default=DEFAULT_PROFILES,
+                        help=f"네트워크 프로필 ({', '.join(NETWORK_PROFILES)}, 기본값: {DEFAULT_PROFILES})")
+    parser.add_argument('--concurrency', default=DEFAULT_CONCURRENCY,
+                        help=f"동시 다운로드 수 목록 (기본값: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--videos', type=int, default=DEFAULT_VIDEOS, help="시나리오마다 받는 영상 수")
+    parser.add_argument('--size', default=DEFAULT_VIDEO_SIZE, help=f"영상 하나의 크기 (기본값: {DEFAULT_VIDEO_SIZE})")
+    parser.add_argument('--repeat', type=int, default=1, help="시나리오 반복 횟수 (항목별 중앙값)")
+    parser.add_argument('-o', '--output', help="결과 JSON을 저장할 경로 (없으면 표준 출력)")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"회귀로 볼 나빠진 비율 (기본값: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--serve', action='store_true', help="가짜 영상 서버만 실행합니다.")
+    parser.add_argument('--port', type=int, default=0, help="--serve의 포트 (기본값: 빈 포트)")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.port)
+        return 0
+
+    drivers = [driver.strip() for driver in args.drivers.split(',') if driver.strip()]
+    profiles = [profile.strip() for profile in args.profiles.split(',') if profile.strip()]
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    for name, known in ((drivers, DRIVERS), (profiles, NETWORK_PROFILES)):
+        unknown = [item for item in name if item not in known]
+        if unknown:
+            parser.error(f"알 수 없는 항목: {', '.join(unknown)}")
+    size = parse_size(args.size)
+
+    scratch = tempfile.mkdtemp(prefix='bench_downloader-')
+    # 영상 정보 캐시와 다운로드 보관 목록을 사용자 것과 섞지 않습니다.
+    os.environ['XDG_CACHE_HOME'] = os.path.join(scratch, 'cache')
+    os.environ['XDG_DATA_HOME'] = os.path.join(scratch, 'data')
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from video_formats import FormatPolicy
+    policy = FormatPolicy.parse('best')
+    app = None
+    if any(driver != 'download_video' for driver in drivers):
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication(sys.argv[:1]) # 다운로드 스레드의 신호를 받기 위한 이벤트 루프
+
+    unavailable = available_drivers()
+    server = ServerProcess()
+    sampler = RssSampler()
+    sampler.start()
+    results = {}
+    try:
+        for driver in drivers:
+            for profile in profiles:
+                for concurrency in levels:
+                    key = f"{driver}[{profile},c{concurrency}]"
+                    if unavailable[driver]:
+                        results[key] = {'skipped': unavailable[driver]}
+                        continue
+                    print(f"{key} 측정 중...", file=sys.stderr)
+                    runs = [run_scenario(server, sampler, driver, profile, concurrency, args.videos, size,
+                                         os.path.join(scratch, 'downloads'), policy,
+                                         f"{driver}-{profile}-c{concurrency}-r{repeat}")
+                            for repeat in range(args.repeat)]
+                    results[key] = merge_runs(runs)
+    finally:
+        sampler.stop()
+        server.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'video_size': format_size(size),
+            'videos': args.videos,
+            'repeat': args.repeat,
+            'profiles': {name: NETWORK_PROFILES[name] for name in profiles},
+        },
+        'results': results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_table(results, baseline)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"회귀: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
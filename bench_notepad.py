@@ -0,0 +1,497 @@
+"""Benchmarks for the notepad's file, search, replace and session hot paths.
+
+Runs real Notepad windows headlessly (QT_QPA_PLATFORM=offscreen) against
+generated corpora and writes the results as JSON, so runs from different
+commits can be compared:
+
+    python bench_notepad.py --sizes 1K,1M,16M -o before.json
+    python bench_notepad.py --sizes 1K,1M,16M -o after.json --baseline before.json
+
+Each result holds the median wall time over --repeat runs, the peak RSS
+seen while the operation ran and how far it rose above the RSS at the start.
+Only the rise is compared, since the absolute peak depends on what ran
+before. A separate run with tracemalloc enabled adds the Python allocation
+peak, since tracing would skew the timings. With --baseline, the script
+exits with status 1 when any operation got slower (or used more memory)
+than the baseline by more than --threshold.
+"""
+import sys
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import statistics
+import subprocess
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import QEventLoop, QTimer, QT_VERSION_STR, PYQT_VERSION_STR
+
+import pyqt_notepad
+from pyqt_notepad import Notepad, TextEditor, LargeFileView, LARGE_FILE_THRESHOLD
+
+DEFAULT_SIZES = "1K,64K,1M,16M" # Pass e.g. 128M or 500M to include the paged large-file view
+DEFAULT_REPEAT = 3 # Timed runs per operation; the median is reported
+DEFAULT_THRESHOLD = 0.20 # Relative slowdown that counts as a regression
+MIN_REGRESSION_S = 0.005 # Slowdowns below this are timer noise, whatever the ratio
+MIN_REGRESSION_RSS_MB = 8 # Same for the RSS rise
+FIND_CALLS = 200 # find_text calls per timed forward/backward run
+SESSION_TABS = 50 # Tabs per session benchmark, half files and half unsaved text
+SESSION_TAB_SIZE = 16 * 1024 # Bytes of text in each session tab
+RSS_SAMPLE_INTERVAL_S = 0.002
+WAIT_TIMEOUT_S = 600 # Give up on a load that never finishes
+CORPUS_SEED = 20240601 # Corpora are deterministic, so cached files are reused across runs
+CORPUS_BLOCK_LINES = 10000 # Lines generated once and repeated to fill larger corpora
+
+# Search terms planted in the corpus: term -> one occurrence every N lines.
+# None of them appears in the filler vocabulary, so match counts are exact.
+DENSITIES = {
+    "sparse": ("zanzibar", 1000),
+    "medium": ("quokka", 10),
+    "dense": ("lorem", 1),
+}
+VOCABULARY = ("the quick brown fox jumps over lazy dog while seven wizards "
+              "box daily and pack my jug with five dozen liquor jars").split()
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+
+
+def size_label(size):
+    for unit in ("G", "M", "K"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+
+# --- Corpus ---
+def corpus_block():
+    rng = random.Random(CORPUS_SEED)
+    lines = []
+    for i in range(CORPUS_BLOCK_LINES):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 14))]
+        for term, every in DENSITIES.values():
+            if i % every == 0:
+                words.insert(rng.randint(0, len(words)), term)
+        lines.append(" ".join(words) + "\n")
+    return "".join(lines).encode("utf-8")
+
+
+def make_corpus(folder, size):
+    """Write (once) a text file of exactly size bytes and return its path."""
+    path = os.path.join(folder, f"corpus-{size_label(size)}.txt")
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    block = corpus_block()
+    with open(path + ".tmp", "wb") as f:
+        remaining = size
+        while remaining > 0:
+            chunk = block[:remaining]
+            if remaining < len(block):
+                # End on a whole line so a search term is never cut in half
+                cut = chunk.rfind(b"\n") + 1
+                chunk = chunk[:cut] + b" " * (remaining - cut - 1) + b"\n" if cut else b" " * remaining
+            f.write(chunk)
+            remaining -= len(chunk)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+# --- Measuring ---
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource # Not Linux: fall back to the process-wide high-water mark
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler(threading.Thread):
+    """Polls the resident set size so each measurement can report its own peak.
+
+    PyQt releases the GIL while Qt runs, so the samples keep coming during
+    long C++ calls such as document layout.
+    """
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(RSS_SAMPLE_INTERVAL_S):
+            rss = current_rss()
+            with self.lock:
+                self.peak = max(self.peak, rss)
+
+    def reset(self):
+        with self.lock:
+            self.peak = current_rss()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Recorder:
+    """Collects the samples of every (operation, size) pair."""
+    def __init__(self, tracing=False):
+        self.tracing = tracing # Allocation pass: timings are skewed, so only memory is kept
+        self.results = {}
+        self.sampler = RssSampler()
+        self.sampler.start()
+
+    def measure(self, operation, label, calls=1, **extra):
+        return Measurement(self, f"{operation}[{label}]", calls, extra)
+
+    def add(self, key, wall, rss_before, rss_peak, alloc_peak, extra):
+        result = self.results.setdefault(key, {"runs": [], "peak_rss_mb": 0.0})
+        if self.tracing:
+            result["py_alloc_peak_mb"] = max(result.get("py_alloc_peak_mb", 0.0), alloc_peak / 1024 ** 2)
+        else:
+            result["runs"].append(wall)
+            result["peak_rss_mb"] = max(result["peak_rss_mb"], rss_peak / 1024 ** 2)
+            growth = (rss_peak - rss_before) / 1024 ** 2
+            result["rss_growth_mb"] = max(result.get("rss_growth_mb", 0.0), growth)
+        result.update(extra)
+
+    def summary(self):
+        summary = {}
+        for key, result in self.results.items():
+            entry = dict(result)
+            runs = entry.pop("runs")
+            if runs:
+                entry["wall_s"] = statistics.median(runs)
+                entry["min_s"] = min(runs)
+                entry["runs"] = len(runs)
+            summary[key] = {name: round(value, 6) if isinstance(value, float) else value
+                            for name, value in entry.items()}
+        return summary
+
+    def close(self):
+        self.sampler.stop()
+
+
+class Measurement:
+    """Context manager timing one run; extra fields (e.g. match counts) can be set inside."""
+    def __init__(self, recorder, key, calls, extra):
+        self.recorder = recorder
+        self.key = key
+        self.calls = calls
+        self.extra = extra
+
+    def __enter__(self):
+        self.recorder.sampler.reset()
+        self.rss_before = current_rss()
+        if self.recorder.tracing:
+            tracemalloc.start()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = (time.perf_counter() - self.started) / self.calls
+        alloc_peak = 0
+        if self.recorder.tracing:
+            alloc_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if exc_type is None:
+            self.recorder.add(self.key, wall, self.rss_before,
+                              max(self.recorder.sampler.peak, current_rss()), alloc_peak, self.extra)
+        return False
+
+
+# --- Driving the notepad ---
+def process_events():
+    QApplication.processEvents(QEventLoop.AllEvents)
+
+
+def wait_until(predicate, timeout=WAIT_TIMEOUT_S):
+    # A ticking timer keeps processEvents from blocking past the moment predicate turns true
+    tick = QTimer()
+    tick.start(5)
+    deadline = time.monotonic() + timeout
+    try:
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for the notepad")
+            QApplication.processEvents(QEventLoop.AllEvents | QEventLoop.WaitForMoreEvents)
+    finally:
+        tick.stop()
+
+
+def is_loaded(window, editor):
+    if isinstance(editor, LargeFileView):
+        return editor.indexer.isFinished()
+    return editor not in window.loaders
+
+
+def new_window(restore=False):
+    window = Notepad(restore=restore)
+    window.show()
+    process_events()
+    return window
+
+
+def dispose(window, forget_session=True):
+    """Drop a window without the save prompts and session writes of closeEvent."""
+    for editor in list(window.loaders):
+        window.stop_loader(editor)
+    window.save_pool.waitForDone()
+    for i in range(window.tab_widget.count()):
+        editor = window.tab_widget.widget(i)
+        if isinstance(editor, TextEditor):
+            editor.match_index.wait_ready() # A search thread must not outlive its editor
+    process_events()
+    window.session_timer.stop()
+    if forget_session:
+        window.session_store.remove_window(window.window_id)
+    window.session_store.flush()
+    window.hide()
+    window.deleteLater()
+    process_events()
+
+
+def open_and_wait(window, file_path):
+    window.open_file(file_path)
+    editor = window.tab_widget.currentWidget()
+    wait_until(lambda: is_loaded(window, editor))
+    return editor
+
+
+# --- Benchmarks ---
+def bench_file(recorder, corpus_path, work_dir):
+    """open_file, save_file, find_text and replace_all_text on one corpus."""
+    size = os.path.getsize(corpus_path)
+    label = size_label(size)
+    window = new_window()
+    try:
+        if size >= LARGE_FILE_THRESHOLD:
+            # Paged view: read-only, and its search only covers the visible lines
+            with recorder.measure("open_file", label, view="paged"):
+                open_and_wait(window, corpus_path)
+            return
+
+        file_path = os.path.join(work_dir, os.path.basename(corpus_path))
+        shutil.copyfile(corpus_path, file_path) # Saving and replacing must not touch the cached corpus
+        with recorder.measure("open_file", label, view="text"):
+            editor = open_and_wait(window, file_path)
+
+        editor.textCursor().insertText("edited ")
+        with recorder.measure("save_file", label):
+            window.save_file(wait=True)
+        editor.textCursor().insertText("again ")
+        with recorder.measure("save_file_async", label):
+            window.save_file()
+            wait_until(lambda: editor not in window.saves_in_flight)
+
+        term = DENSITIES["medium"][0]
+        editor.moveCursor(QTextCursor.Start)
+        with recorder.measure("find_text.first", label) as run:
+            # Includes the initial background scan that builds the match index
+            window.find_text(term)
+            wait_until(editor.match_index.is_ready)
+            run.extra["matches"] = len(editor.match_index.starts)
+        with recorder.measure("find_text.forward", label, calls=FIND_CALLS):
+            for _ in range(FIND_CALLS):
+                window.find_text(term, find_next=True)
+        with recorder.measure("find_text.backward", label, calls=FIND_CALLS):
+            for _ in range(FIND_CALLS):
+                window.find_text(term, find_next=True, backward=True)
+        editor.moveCursor(QTextCursor.End)
+        with recorder.measure("find_text.wrap", label):
+            window.find_text(term, find_next=True)
+
+        for density, (term, _) in DENSITIES.items():
+            with recorder.measure(f"replace_all_text.{density}", label) as run:
+                run.extra["matches"] = window.replace_all_text(term, term.upper())
+        editor.document().setModified(False)
+    finally:
+        dispose(window)
+
+
+def bench_session(recorder, work_dir, tab_count):
+    """save_session with many tabs, then restoring them and switching through them."""
+    label = f"{tab_count}tabs"
+    text = corpus_block().decode("utf-8")[:SESSION_TAB_SIZE]
+    window = new_window()
+    for i in range(tab_count):
+        if i % 2:
+            window.new_tab(content=text) # Unsaved text is stored in the journal itself
+        else:
+            file_path = os.path.join(work_dir, f"session-{i}.txt")
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            open_and_wait(window, file_path)
+    with recorder.measure("save_session", label):
+        window.save_session()
+        window.session_store.flush()
+    dispose(window, forget_session=False)
+
+    with recorder.measure("restore_session", label):
+        window = new_window(restore=True)
+        wait_until(lambda: all(is_loaded(window, editor) for editor in list(window.loaders)))
+    try:
+        count = window.tab_widget.count()
+        with recorder.measure("tab_switch.materialize", label, calls=count):
+            for i in range(count):
+                window.tab_widget.setCurrentIndex(i)
+                wait_until(lambda: not window.loaders)
+        with recorder.measure("tab_switch", label, calls=count * 4):
+            for _ in range(4):
+                for i in range(count):
+                    window.tab_widget.setCurrentIndex(i)
+                    process_events()
+        for i in range(count):
+            editor = window.tab_widget.widget(i)
+            if isinstance(editor, TextEditor):
+                editor.document().setModified(False)
+    finally:
+        dispose(window)
+
+
+def run_pass(recorder, corpora, work_dir, tab_count):
+    for corpus_path in corpora:
+        bench_file(recorder, corpus_path, work_dir)
+    if tab_count:
+        bench_session(recorder, work_dir, tab_count)
+
+
+# --- Reporting ---
+def compare(results, baseline, threshold):
+    """Return one line per regression of results against a baseline summary."""
+    regressions = []
+    for key, base in sorted(baseline.items()):
+        current = results.get(key)
+        if current is None:
+            continue
+        checks = [("wall_s", MIN_REGRESSION_S, "s"), ("rss_growth_mb", MIN_REGRESSION_RSS_MB, " MB")]
+        for field, minimum, unit in checks:
+            if field not in base or field not in current or base[field] <= 0:
+                continue
+            ratio = current[field] / base[field]
+            if ratio > 1 + threshold and current[field] - base[field] > minimum:
+                regressions.append(f"{key} {field}: {base[field]:.4g}{unit} -> "
+                                   f"{current[field]:.4g}{unit} (+{(ratio - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results, baseline=None):
+    print(f"{'operation':<40} {'wall':>10} {'RSS rise':>10} {'py alloc':>10} {'vs base':>8}",
+          file=sys.stderr)
+    for key, result in sorted(results.items()):
+        wall = result.get("wall_s")
+        change = ""
+        base = (baseline or {}).get(key, {}).get("wall_s")
+        if base and wall is not None:
+            change = f"{(wall / base - 1) * 100:+.0f}%"
+        print(f"{key:<40} {wall * 1000 if wall is not None else 0:>8.2f}ms "
+              f"{result.get('rss_growth_mb', 0):>8.1f}MB "
+              f"{result.get('py_alloc_peak_mb', 0):>8.1f}MB {change:>8}", file=sys.stderr)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the notepad's file, search and session paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Corpus sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs per operation")
+    parser.add_argument("--tabs", type=int, default=SESSION_TABS,
+                        help="Tabs in the session benchmark (0 to skip)")
+    parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--corpus-dir",
+                        help="Where generated corpora are kept between runs (default: temporary)")
+    parser.add_argument("-o", "--output", help="Write the JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="JSON from an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown against the baseline "
+                             f"(default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+
+    scratch = tempfile.mkdtemp(prefix="bench_notepad-")
+    # Settings, recent files and the session journal go to the scratch folder, not the user's profile
+    os.environ["XDG_CONFIG_HOME"] = os.path.join(scratch, "config")
+    os.environ["XDG_DATA_HOME"] = os.path.join(scratch, "data")
+    app = QApplication(sys.argv[:1])
+    app.setOrganizationName("GeminiCLI")
+    app.setApplicationName("PyQtNotepadBench")
+    # replace_all_text reports through a modal box, which would block a headless run
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+
+    corpus_dir = args.corpus_dir or os.path.join(scratch, "corpus")
+    work_dir = os.path.join(scratch, "work")
+    os.makedirs(corpus_dir, exist_ok=True)
+    os.makedirs(work_dir, exist_ok=True)
+    recorder = Recorder()
+    try:
+        corpora = [make_corpus(corpus_dir, size) for size in sizes]
+        for _ in range(args.repeat):
+            run_pass(recorder, corpora, work_dir, args.tabs)
+        if not args.no_alloc:
+            recorder.tracing = True
+            run_pass(recorder, corpora, work_dir, args.tabs)
+    finally:
+        recorder.close()
+        pyqt_notepad.SessionStore.shared().stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    results = recorder.summary()
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+            "sizes": [size_label(size) for size in sizes],
+            "repeat": args.repeat,
+            "tabs": args.tabs,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
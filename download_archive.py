@@ -0,0 +1,177 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import sqlite3
+import threading
+
+# 이미 받은 영상 목록 (다운로드 보관 목록)
+# 네트워크에 접속하기 전에 영상 키와 포맷만으로 이미 받은 영상인지 확인합니다.
+
+ANY_FORMAT = '' # 디렉터리 스캔 등으로 가져와 포맷을 모르는 항목 (어떤 포맷 요청과도 일치)
+HASH_BLOCK_SIZE = 1024 * 1024
+REFRESH_INTERVAL_S = 5.0 # 다른 프로세스가 바꾼 항목이 있는지 데이터베이스를 확인하는 최소 간격 (초)
+
+# yt-dlp 기본 파일 이름 형식 '제목 [영상ID].확장자'에서 영상 ID를 찾습니다.
+ID_IN_NAME_PATTERN = re.compile(r"\[([0-9A-Za-z_-]{11})\]\.[0-9A-Za-z]+$")
+
+def default_archive_path():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'youtube_downloader', 'archive.sqlite3')
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DownloadArchive:
+    """
+    (영상 키, 포맷)별로 받은 파일의 경로, 크기, SHA-256을 기록하는 SQLite 보관 목록.
+    시작할 때 모든 키를 메모리 집합에 올려 조회는 O(1)로 처리하고,
+    다른 프로세스가 바꾼 항목은 REFRESH_INTERVAL_S마다 한 번 확인해 바뀌었으면 통째로 다시 읽습니다.
+    """
+    _shared = None
+    _shared_lock = threading.Lock() # 여러 작업자 스레드가 처음 부를 때 하나만 만들도록
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # 여러 스레드에서 쓰므로 연결 하나를 잠금으로 보호하고,
+        # 다른 프로세스와 동시에 쓸 때는 WAL과 busy_timeout으로 기다립니다.
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS downloads (
+            video_key TEXT NOT NULL,
+            format TEXT NOT NULL,
+            file_path TEXT,
+            size INTEGER,
+            sha256 TEXT,
+            downloaded REAL NOT NULL,
+            PRIMARY KEY (video_key, format))""")
+        self.keys = set()
+        self.video_keys = set()
+        self.data_version = None
+        self.next_refresh = 0.0
+        self.refresh()
+
+    def refresh(self):
+        """다른 연결이 커밋한 변경이 있으면 (data_version이 바뀜) 모든 키를 다시 읽습니다."""
+        with self.lock:
+            self.next_refresh = time.monotonic() + REFRESH_INTERVAL_S
+            version = self.db.execute("PRAGMA data_version").fetchone()[0]
+            if version == self.data_version:
+                return
+            self.data_version = version
+            keys = set(self.db.execute("SELECT video_key, format FROM downloads"))
+            # 조회는 잠금 없이 하므로 새 집합을 다 만든 뒤 한 번에 바꿔 끼웁니다.
+            self.keys, self.video_keys = keys, {key[0] for key in keys}
+
+    def _remember(self, keys):
+        for video_key, format in keys:
+            self.keys.add((video_key, format))
+            self.video_keys.add(video_key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def contains(self, video_key, format=ANY_FORMAT):
+        """
+        이미 받은 영상인지 메모리 집합에서 확인합니다. format을 생략하면 포맷과 관계없이 확인합니다.
+        """
+        if time.monotonic() >= self.next_refresh:
+            self.refresh()
+        if format == ANY_FORMAT:
+            return video_key in self.video_keys
+        keys = self.keys
+        return (video_key, format) in keys or (video_key, ANY_FORMAT) in keys
+
+    def add(self, video_key, format, file_path, compute_hash=True):
+        # 파일 해시는 잠금 밖에서 계산합니다. (큰 파일은 오래 걸림)
+        size = os.path.getsize(file_path) if file_path and os.path.exists(file_path) else None
+        sha256 = file_sha256(file_path) if compute_hash and size is not None else None
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?)",
+                            (video_key, format, file_path, size, sha256, time.time()))
+            self._remember([(video_key, format)])
+
+    def remove(self, video_key, format=None):
+        with self.lock:
+            if format is None:
+                self.db.execute("DELETE FROM downloads WHERE video_key = ?", (video_key,))
+                self.keys = {key for key in self.keys if key[0] != video_key}
+            else:
+                self.db.execute("DELETE FROM downloads WHERE video_key = ? AND format = ?", (video_key, format))
+                self.keys.discard((video_key, format))
+            if not any(key[0] == video_key for key in self.keys):
+                self.video_keys.discard(video_key)
+
+    def _bulk_insert(self, rows):
+        # 한 트랜잭션으로 넣고, 이미 있는 항목은 그대로 둡니다.
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.db.total_changes
+                self.db.executemany("INSERT OR IGNORE INTO downloads VALUES (?, ?, ?, ?, ?, ?)", rows)
+                added = self.db.total_changes - before
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self._remember((row[0], row[1]) for row in rows)
+        return added
+
+    def import_directory(self, directory, compute_hash=False):
+        """
+        폴더를 재귀적으로 훑어 이름에 '[영상ID]'가 들어 있는 파일을 포맷을 모르는 항목으로 추가합니다.
+        추가된 항목 수를 돌려줍니다. 해시는 compute_hash=True일 때만 계산합니다.
+        """
+        now = time.time()
+        rows = []
+        for root, _, files in os.walk(directory):
+            for name in files:
+                match = ID_IN_NAME_PATTERN.search(name)
+                if not match or name.endswith(('.part', '.ytdl', '.json')):
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    size = os.path.getsize(file_path)
+                    sha256 = file_sha256(file_path) if compute_hash else None
+                except OSError:
+                    continue
+                rows.append((match.group(1), ANY_FORMAT, file_path, size, sha256, now))
+        return self._bulk_insert(rows)
+
+    def import_ytdlp_archive(self, archive_path):
+        """
+        yt-dlp --download-archive 파일('<추출기> <영상ID>' 한 줄씩)을 가져옵니다.
+        """
+        now = time.time()
+        rows = []
+        with open(archive_path, encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) == 2:
+                    rows.append((fields[1], ANY_FORMAT, None, None, None, now))
+        return self._bulk_insert(rows)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,309 @@
+import os
+import time
+import tempfile
+import threading
+import subprocess
+import urllib.request
+
+from video_formats import ffmpeg_available
+
+# 다운로드가 끝난 파일의 후처리 (컨테이너 변경, 음성 추출, 썸네일 넣기)
+# 다운로드와 별도의 작업자 풀에서 실행하므로 다음 다운로드와 겹쳐서 진행됩니다.
+#
+# 후처리 문자열은 쉼표로 구분한 단계를 실행할 순서대로 적습니다. 예: "remux:mkv,audio:mp3,thumbnail"
+#   remux:<확장자>   다시 인코딩하지 않고 컨테이너만 바꿉니다. (원본 파일을 대체)
+#   audio[:<형식>]   음성만 따로 저장합니다. (mp3, m4a, opus, mka=원본 코덱 그대로, 기본값 mp3)
+#   thumbnail       썸네일을 표지 이미지로 넣습니다. (mp4/m4a/mov/mkv/mka)
+
+POSTPROCESS_WORKERS = 2 # 동시에 실행하는 후처리 작업 수 (다운로드 작업자와 별도)
+PIPE_BLOCK_SIZE = 1024 * 1024 # 받는 중인 파일을 ffmpeg에 흘려보내는 단위
+THUMBNAIL_TIMEOUT_S = 30
+
+AUDIO_CODEC_ARGS = {
+    'mp3': ['-c:a', 'libmp3lame', '-q:a', '2'],
+    'm4a': ['-c:a', 'aac', '-b:a', '192k'],
+    'opus': ['-c:a', 'libopus', '-b:a', '128k'],
+    'mka': ['-c:a', 'copy'],
+}
+COVER_ART_EXTS = ('mp4', 'm4a', 'mov') # 표지를 영상 트랙(attached_pic)으로 넣는 컨테이너
+ATTACHMENT_EXTS = ('mkv', 'mka') # 표지를 첨부 파일로 넣는 컨테이너
+
+
+class DownloadAborted(Exception):
+    """스트리밍 후처리 중 다운로드가 실패하거나 중단되었을 때 발생합니다."""
+
+
+def run_ffmpeg(arguments, source=None):
+    """
+    ffmpeg를 실행하고, 실패하면 ffmpeg의 오류 메시지로 OSError를 일으키는 함수
+    source(StreamingInput)가 주어지면 입력 'pipe:0'으로 받는 중인 파일을 흘려보냅니다.
+    """
+    process = subprocess.Popen(['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error'] + arguments,
+                               stdin=subprocess.PIPE if source else subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    feeder = None
+    if source:
+        feeder = threading.Thread(target=source.feed, args=(process.stdin,), daemon=True)
+        feeder.start()
+    stderr = process.stderr.read().decode('utf-8', 'replace')
+    process.wait()
+    if feeder:
+        feeder.join()
+    if process.returncode != 0:
+        raise OSError(f"ffmpeg 실패: {stderr.strip().splitlines()[-1] if stderr.strip() else process.returncode}")
+
+
+class StreamingInput:
+    """
+    받는 중인 파일의 앞에서부터 끊김 없이 기록된 구간만 ffmpeg 입력 파이프로 흘려보냅니다.
+    다운로드 쪽에서는 advance(기록된 바이트 수)를 부르고, 끝나면 finish(최종 경로) 또는 abort()를 부릅니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.ready = 0
+        self.done = False
+        self.aborted = False
+        self.condition = threading.Condition()
+
+    def advance(self, ready):
+        with self.condition:
+            if ready > self.ready:
+                self.ready = ready
+                self.condition.notify_all()
+
+    def finish(self, path):
+        with self.condition:
+            self.path = path
+            self.done = True
+            self.condition.notify_all()
+
+    def abort(self):
+        with self.condition:
+            self.aborted = True
+            self.condition.notify_all()
+
+    def wait(self):
+        # 다운로드가 끝날 때까지 기다리고, 성공했는지 돌려줍니다.
+        with self.condition:
+            while not self.done and not self.aborted:
+                self.condition.wait()
+            return not self.aborted
+
+    def feed(self, pipe):
+        sent = 0
+        try:
+            while True:
+                with self.condition:
+                    while self.ready <= sent and not self.done and not self.aborted:
+                        self.condition.wait()
+                    if self.aborted:
+                        return
+                    ready, path, done = self.ready, self.path, self.done
+                try:
+                    with open(path, 'rb') as f:
+                        f.seek(sent)
+                        while done or sent < ready:
+                            block = f.read(PIPE_BLOCK_SIZE if done else min(PIPE_BLOCK_SIZE, ready - sent))
+                            if not block:
+                                break
+                            pipe.write(block)
+                            sent += len(block)
+                except FileNotFoundError:
+                    # '.part'가 최종 이름으로 바뀌는 중: finish가 불릴 때까지 잠깐 기다립니다.
+                    with self.condition:
+                        self.condition.wait(0.1)
+                    continue
+                if done:
+                    return
+        except OSError:
+            pass # ffmpeg가 먼저 끝났습니다. (오류는 ffmpeg 종료 코드로 보고됨)
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class PostStep:
+    """후처리 한 단계. 파일 하나를 받아 ffmpeg로 새 파일을 만듭니다."""
+    streamable = False # 받는 중인 파일을 파이프로 입력받을 수 있는지
+    replaces_input = False # 결과가 입력 파일을 대체하는지 (이후 단계의 입력이 됨)
+
+    def __init__(self, option=None):
+        self.option = option
+
+    @property
+    def name(self):
+        return f"{self.key}:{self.option}" if self.option else self.key
+
+    def output_path(self, file_path):
+        raise NotImplementedError
+
+    def arguments(self, input, output_path, job):
+        raise NotImplementedError
+
+
+class RemuxStep(PostStep):
+    key = 'remux'
+    streamable = True
+    replaces_input = True
+
+    def __init__(self, option=None):
+        if not option:
+            raise ValueError("remux에는 확장자가 필요합니다. (예: remux:mkv)")
+        super().__init__(option)
+
+    def output_path(self, file_path):
+        return f"{os.path.splitext(file_path)[0]}.{self.option}"
+
+    def arguments(self, input, output_path, job):
+        return ['-i', input, '-map', '0', '-c', 'copy', output_path]
+
+
+class AudioStep(PostStep):
+    key = 'audio'
+    streamable = True
+
+    def __init__(self, option=None):
+        if option and option not in AUDIO_CODEC_ARGS:
+            raise ValueError(f"지원하지 않는 음성 형식: {option} ({', '.join(AUDIO_CODEC_ARGS)})")
+        super().__init__(option)
+
+    def output_path(self, file_path):
+        return f"{os.path.splitext(file_path)[0]}.{self.option or 'mp3'}"
+
+    def arguments(self, input, output_path, job):
+        return ['-i', input, '-vn'] + AUDIO_CODEC_ARGS[self.option or 'mp3'] + [output_path]
+
+
+class ThumbnailStep(PostStep):
+    key = 'thumbnail'
+    replaces_input = True
+
+    def output_path(self, file_path):
+        return file_path
+
+    def arguments(self, input, output_path, job):
+        ext = os.path.splitext(output_path)[1][1:].lower()
+        if ext in COVER_ART_EXTS:
+            # 표지는 JPEG로 다시 인코딩합니다. (유튜브 썸네일이 webp인 경우)
+            return ['-i', input, '-i', job.thumbnail_path, '-map', '0', '-map', '1', '-c', 'copy',
+                    '-c:v:1', 'mjpeg', '-disposition:v:1', 'attached_pic', output_path]
+        if ext in ATTACHMENT_EXTS:
+            mimetype = 'image/webp' if job.thumbnail_path.endswith('.webp') else 'image/jpeg'
+            return ['-i', input, '-map', '0', '-c', 'copy', '-attach', job.thumbnail_path,
+                    '-metadata:s:t', f"mimetype={mimetype}", output_path]
+        raise ValueError(f"썸네일을 넣을 수 없는 컨테이너입니다: {ext}")
+
+
+STEP_CLASSES = {step.key: step for step in (RemuxStep, AudioStep, ThumbnailStep)}
+
+
+class PostJob:
+    """후처리 한 건의 입력과 결과. timings에는 (단계 이름, 걸린 초)가 실행 순서대로 쌓입니다."""
+
+    def __init__(self, file_path, thumbnail_url=None):
+        self.file_path = file_path # 현재 본 파일 (remux 등으로 바뀔 수 있음)
+        self.thumbnail_url = thumbnail_url
+        self.thumbnail_path = None
+        self.outputs = [] # 새로 만든 파일 (본 파일 제외)
+        self.timings = []
+
+
+class Pipeline:
+    """후처리 단계 목록. run은 작업자 스레드에서 호출합니다."""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __bool__(self):
+        return bool(self.steps)
+
+    @classmethod
+    def parse(cls, spec):
+        steps = []
+        for token in filter(None, (token.strip().lower() for token in (spec or '').split(','))):
+            key, _, option = token.partition(':')
+            if key not in STEP_CLASSES:
+                raise ValueError(f"알 수 없는 후처리 단계: {token}")
+            steps.append(STEP_CLASSES[key](option or None))
+        if steps and not ffmpeg_available():
+            raise ValueError("후처리에는 ffmpeg가 필요합니다. ffmpeg가 PATH에 있는지 확인하세요.")
+        return cls(steps)
+
+    @property
+    def name(self):
+        return ','.join(step.name for step in self.steps)
+
+    @property
+    def streamable(self):
+        return bool(self.steps) and self.steps[0].streamable
+
+    def run(self, file_path, thumbnail_url=None, source=None):
+        """
+        단계를 순서대로 실행하고 PostJob을 돌려줍니다.
+        source(StreamingInput)가 주어지면 첫 단계는 다운로드가 끝나기 전부터 파이프로 입력을 받고,
+        파이프 입력으로 실패하면 (앞부분만으로 읽을 수 없는 파일 등) 다운로드가 끝난 뒤 파일로 다시 실행합니다.
+        """
+        job = PostJob(file_path, thumbnail_url)
+        try:
+            for index, step in enumerate(self.steps):
+                start = time.perf_counter()
+                name = step.name
+                if index == 0 and source and step.streamable:
+                    try:
+                        self.run_step(step, job, 'pipe:0', source)
+                        name += ' (스트리밍)'
+                    except OSError:
+                        self.wait_download(source)
+                        self.run_step(step, job, job.file_path)
+                else:
+                    if index == 0 and source:
+                        self.wait_download(source)
+                    self.run_step(step, job, job.file_path)
+                job.timings.append((name, time.perf_counter() - start))
+        finally:
+            if job.thumbnail_path:
+                os.remove(job.thumbnail_path)
+        return job
+
+    @staticmethod
+    def wait_download(source):
+        if not source.wait():
+            raise DownloadAborted("다운로드가 끝나지 않아 후처리를 취소했습니다.")
+
+    def run_step(self, step, job, input, source=None):
+        if isinstance(step, ThumbnailStep) and job.thumbnail_path is None:
+            if not job.thumbnail_url:
+                raise ValueError("썸네일 주소를 알 수 없습니다.")
+            job.thumbnail_path = fetch_thumbnail(job.thumbnail_url)
+        output_path = step.output_path(job.file_path)
+        # ffmpeg는 확장자로 출력 형식을 정하므로 임시 파일도 같은 확장자를 씁니다.
+        root, ext = os.path.splitext(output_path)
+        temp_path = f"{root}.temp{ext}"
+        try:
+            run_ffmpeg(step.arguments(input, temp_path, job), source)
+            if source:
+                self.wait_download(source) # 중단된 다운로드의 앞부분만으로 만든 결과는 버립니다.
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, output_path)
+        if step.replaces_input:
+            if output_path != job.file_path:
+                os.remove(job.file_path)
+            job.file_path = output_path
+        else:
+            job.outputs.append(output_path)
+
+
+def fetch_thumbnail(url):
+    # 썸네일을 임시 파일로 받아 경로를 돌려줍니다. (확장자는 URL에서, 모르면 jpg)
+    ext = os.path.splitext(url.split('?')[0])[1] or '.jpg'
+    with urllib.request.urlopen(url, timeout=THUMBNAIL_TIMEOUT_S) as response:
+        data = response.read()
+    with tempfile.NamedTemporaryFile('wb', suffix=ext, delete=False) as f:
+        f.write(data)
+    return f.name
@@ -2,11 +2,221 @@ import sys
 import os
 import json
 import datetime
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QTextEdit, QAction, QFileDialog, 
+import time
+import re
+import io
+import codecs
+import mmap
+import shutil
+import bisect
+import random
+import threading
+import fnmatch
+import itertools
+import concurrent.futures
+import queue
+import sqlite3
+import uuid
+import functools
+import contextlib
+import collections
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QAction, QFileDialog, 
                              QMessageBox, QTabWidget, QWidget, QVBoxLayout,
-                             QInputDialog, QLineEdit, QPushButton, QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QComboBox, QSpinBox)
-from PyQt5.QtGui import QIcon, QTextCursor, QTextDocument, QFont
-from PyQt5.QtCore import Qt, QSettings
+                             QInputDialog, QLineEdit, QPushButton, QHBoxLayout, QLabel, QDialog, QDialogButtonBox, QComboBox, QSpinBox,
+                             QPlainTextEdit, QScrollBar, QProgressBar, QCheckBox, QTextEdit,
+                             QDockWidget, QListWidget, QListWidgetItem)
+from PyQt5.QtGui import QIcon, QTextCursor, QTextDocument, QFont, QColor, QTextCharFormat, QTextLayout
+from PyQt5.QtCore import (Qt, QSettings, QThread, QObject, QTimer, QPoint, QStandardPaths, QRunnable, QThreadPool,
+                          QFileSystemWatcher, pyqtSignal)
+
+LARGE_FILE_THRESHOLD = 64 * 1024 * 1024 # Files at least this big open in paged, read-only mode
+LINE_INDEX_BLOCK = 64 * 1024 # Bytes covered by one entry of the line index
+LOAD_CHUNK_SIZE = 1024 * 1024 # Bytes read per step by the background loader
+FOLLOW_BATCH_MS = 100 # Writes to a followed file within this window are appended in one update
+FOLLOW_POLL_MS = 1000 # Fallback check of followed files, for file systems without change notifications
+FOLLOW_MAX_LINES = 100000 # Lines kept in a followed tab; the oldest are dropped from the top
+REPLACE_PREVIEW_LIMIT = 20 # Matches listed in the Replace All preview
+SEARCH_DEBOUNCE_MS = 150 # Pause in typing before search-as-you-type runs
+FIND_IN_FILES_WORKERS = 4 # Files searched concurrently by Find in Files
+FIND_IN_FILES_RESULT_LIMIT = 10000 # Results listed before a search stops itself
+FIND_IN_FILES_LINE_LIMIT = 200 # Characters of a matching line shown in the results
+SESSION_SAVE_DELAY_MS = 2000 # Quiet period after an edit before the session journal is written
+SESSION_COMPACT_IDLE_S = 30 # Idle time after writes before the journal is compacted
+TAB_UNLOAD_AFTER_S = 30 * 60 # Background tabs unused this long go back to placeholders
+TAB_UNLOAD_CHECK_MS = 60 * 1000 # How often background tabs are checked for unloading
+SAVE_WORKERS = 4 # Files written to disk concurrently by Save All
+PROFILE_ENV = "NOTEPAD_PROFILE" # "1" turns instrumentation on at start; a .json path also exports the trace on exit
+PROFILE_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500) # Latency histogram bounds
+PROFILE_TRACE_LIMIT = 200000 # Trace events kept for export; the oldest are dropped first
+PROFILE_OVERLAY_INTERVAL_MS = 500 # Refresh rate of the status bar performance overlay
+HIGHLIGHT_SLICE_MS = 8 # Highlighting done per pass of the event loop before it yields to input
+HIGHLIGHT_VIEWPORT_MARGIN = 100 # Lines above and below the screen highlighted ahead of the rest
+
+# --- Instrumentation ---
+def process_memory():
+    """Resident memory of this process in bytes, or None where it can't be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # The peak, the closest thing available here
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class OperationStats:
+    """Call count, total and worst time, and a latency histogram for one operation."""
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(PROFILE_BUCKETS_MS) + 1) # The last bucket takes everything slower
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(PROFILE_BUCKETS_MS, ms)] += 1
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in PROFILE_BUCKETS_MS] + [f">{PROFILE_BUCKETS_MS[-1]}ms"]
+        return {"count": self.count, "total_ms": round(self.total, 3),
+                "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max, 3), "histogram": dict(zip(labels, self.buckets))}
+
+
+class Profiler:
+    """Opt-in timings of the editor's hot paths, shared by all windows.
+
+    While off, a timed call costs one attribute check. While on, each call is
+    added to its operation's histogram and to a bounded list of trace events
+    that exports as Chrome trace JSON (chrome://tracing, Perfetto). Only the
+    GUI thread records.
+    """
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls(os.environ.get(PROFILE_ENV, ""))
+        return cls._shared
+
+    def __init__(self, setting=""):
+        self.forced = setting not in ("", "0")
+        self.export_path = setting if setting.lower().endswith(".json") else None
+        self.enabled = self.forced
+        self.owners = set() # Windows showing the overlay
+        self.origin = time.perf_counter()
+        self.stats = {}
+        self.events = collections.deque(maxlen=PROFILE_TRACE_LIMIT)
+        self.pending = {} # key -> start of a span that ends in a later call (loads, background saves)
+        self.last = None # (operation, ms) of the latest operation worth showing in the overlay
+
+    def set_enabled(self, owner, enabled):
+        if enabled:
+            self.owners.add(owner)
+        else:
+            self.owners.discard(owner)
+        self.enabled = self.forced or bool(self.owners)
+        if not self.enabled:
+            self.pending.clear()
+
+    def record(self, name, started, show=True, **args):
+        if not self.enabled:
+            return
+        ended = time.perf_counter()
+        ms = (ended - started) * 1000
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = OperationStats()
+        stats.add(ms)
+        self.events.append((name, started, ended, args))
+        if show:
+            self.last = (name, ms)
+
+    @contextlib.contextmanager
+    def span(self, name, show=True):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, show)
+
+    def begin(self, key):
+        if self.enabled:
+            self.pending[key] = time.perf_counter()
+
+    def end(self, key, name, **args):
+        started = self.pending.pop(key, None)
+        if started is not None:
+            self.record(name, started, **args)
+
+    def discard(self, key):
+        self.pending.pop(key, None)
+
+    def trace(self):
+        pid, tid = os.getpid(), threading.get_ident()
+        events = [{"name": name, "cat": "notepad", "ph": "X", "pid": pid, "tid": tid,
+                   "ts": round((started - self.origin) * 1e6, 1), "dur": round((ended - started) * 1e6, 1),
+                   "args": args}
+                  for name, started, ended, args in self.events]
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {name: stats.to_dict() for name, stats in sorted(self.stats.items())}}
+
+    def export(self, file_path):
+        write_atomically(file_path, [json.dumps(self.trace())])
+
+
+def timed(name, show=True):
+    """Record every call of the decorated method as an operation while profiling is on.
+
+    Signals hand all their arguments to the wrapper, so extra positional
+    arguments are dropped the way PyQt does when it calls a plain slot.
+    """
+    def decorate(method):
+        max_args = method.__code__.co_argcount
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            profiler = Profiler.shared()
+            if not profiler.enabled:
+                return method(*args[:max_args], **kwargs)
+            started = time.perf_counter()
+            try:
+                return method(*args[:max_args], **kwargs)
+            finally:
+                profiler.record(name, started, show)
+        return wrapper
+    return decorate
+
+
+# --- Search Options ---
+class SearchOptions(QWidget):
+    """Match case / whole word / regex check boxes shared by the find and replace dialogs."""
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.case_checkbox = QCheckBox("Match case")
+        self.case_checkbox.setChecked(True) # Searches have always been case-sensitive
+        self.word_checkbox = QCheckBox("Whole word")
+        self.regex_checkbox = QCheckBox("Regular expression")
+        for checkbox in (self.case_checkbox, self.word_checkbox, self.regex_checkbox):
+            checkbox.toggled.connect(self.changed)
+            layout.addWidget(checkbox)
+        self.setLayout(layout)
+
+    def options(self):
+        return {"case_sensitive": self.case_checkbox.isChecked(),
+                "whole_word": self.word_checkbox.isChecked(),
+                "regex": self.regex_checkbox.isChecked()}
 
 # --- Find Dialog ---
 class FindDialog(QWidget):
@@ -29,34 +239,53 @@ class FindDialog(QWidget):
         self.search_button.clicked.connect(self.find_text)
         self.find_layout.addWidget(self.search_button)
 
+        self.search_options = SearchOptions()
+        self.search_options.changed.connect(self.find_text)
+
         self.nav_layout = QHBoxLayout()
+        self.match_label = QLabel("")
         self.next_button = QPushButton("Next")
         self.prev_button = QPushButton("Previous")
         self.next_button.clicked.connect(self.find_next)
         self.prev_button.clicked.connect(self.find_prev)
+        self.nav_layout.addWidget(self.match_label)
+        self.nav_layout.addStretch()
         self.nav_layout.addWidget(self.prev_button)
         self.nav_layout.addWidget(self.next_button)
 
         self.layout.addLayout(self.find_layout)
+        self.layout.addWidget(self.search_options)
         self.layout.addLayout(self.nav_layout)
         self.setLayout(self.layout)
         
-        self.find_input.returnPressed.connect(self.find_text)
+        self.find_input.returnPressed.connect(self.find_next)
+
+        # Search as you type, once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.find_text)
+        self.find_input.textChanged.connect(self.search_timer.start)
 
     def find_text(self):
         text = self.find_input.text()
-        if text and self.parent:
-            self.parent.find_text(text)
+        if not self.parent:
+            return
+        if text:
+            self.parent.find_text(text, options=self.search_options.options())
+        else:
+            self.parent.clear_search_highlights()
+            self.match_label.setText("")
 
     def find_next(self):
         text = self.find_input.text()
         if text and self.parent:
-            self.parent.find_text(text, find_next=True)
+            self.parent.find_text(text, find_next=True, options=self.search_options.options())
 
     def find_prev(self):
         text = self.find_input.text()
         if text and self.parent:
-            self.parent.find_text(text, find_next=True, backward=True)
+            self.parent.find_text(text, find_next=True, backward=True, options=self.search_options.options())
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
@@ -64,6 +293,11 @@ class FindDialog(QWidget):
         else:
             super().keyPressEvent(event)
 
+    def closeEvent(self, event):
+        if self.parent:
+            self.parent.clear_search_highlights()
+        super().closeEvent(event)
+
 # --- Replace Dialog ---
 class ReplaceDialog(QWidget):
     def __init__(self, parent=None):
@@ -88,18 +322,24 @@ class ReplaceDialog(QWidget):
         self.replace_layout.addWidget(self.replace_input)
         self.layout.addLayout(self.replace_layout)
 
+        self.search_options = SearchOptions()
+        self.layout.addWidget(self.search_options)
+
         self.button_layout = QHBoxLayout()
         self.find_button = QPushButton("Find")
         self.replace_button = QPushButton("Replace")
         self.replace_all_button = QPushButton("Replace All")
+        self.preview_button = QPushButton("Preview")
 
         self.find_button.clicked.connect(self.find_text)
         self.replace_button.clicked.connect(self.replace_text)
         self.replace_all_button.clicked.connect(self.replace_all_text)
+        self.preview_button.clicked.connect(self.preview_replace_all)
 
         self.button_layout.addWidget(self.find_button)
         self.button_layout.addWidget(self.replace_button)
         self.button_layout.addWidget(self.replace_all_button)
+        self.button_layout.addWidget(self.preview_button)
         self.layout.addLayout(self.button_layout)
 
         self.setLayout(self.layout)
@@ -107,19 +347,25 @@ class ReplaceDialog(QWidget):
     def find_text(self):
         text = self.find_input.text()
         if text and self.parent:
-            self.parent.find_text(text)
+            self.parent.find_text(text, find_next=True, options=self.search_options.options())
 
     def replace_text(self):
         find_text = self.find_input.text()
         replace_text = self.replace_input.text()
         if find_text and self.parent:
-            self.parent.replace_text(find_text, replace_text)
+            self.parent.replace_text(find_text, replace_text, options=self.search_options.options())
 
     def replace_all_text(self):
         find_text = self.find_input.text()
         replace_text = self.replace_input.text()
         if find_text and self.parent:
-            self.parent.replace_all_text(find_text, replace_text)
+            self.parent.replace_all_text(find_text, replace_text, options=self.search_options.options())
+
+    def preview_replace_all(self):
+        find_text = self.find_input.text()
+        replace_text = self.replace_input.text()
+        if find_text and self.parent:
+            self.parent.replace_all_text(find_text, replace_text, dry_run=True, options=self.search_options.options())
 
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Escape:
@@ -197,14 +443,1419 @@ class FontDialog(QDialog):
         return font
 
 
+# --- Large File Support ---
+class MappedFile:
+    """Read-only memory map of a file plus a sparse line index.
+
+    The index stores, for every LINE_INDEX_BLOCK bytes, how many newlines
+    precede that block, so memory stays tiny no matter how many lines exist.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = open(file_path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.block_lines = [0] # Newlines before the start of each indexed block
+        self.indexed_bytes = 0
+        self.complete = False
+        self.lock = threading.Lock()
+
+    def build_index(self, should_stop=lambda: False, report=None):
+        pos = 0
+        count = 0
+        while pos < self.size:
+            if should_stop():
+                return
+            end = min(pos + LINE_INDEX_BLOCK, self.size)
+            count += self.mm[pos:end].count(b'\n')
+            with self.lock:
+                self.block_lines.append(count)
+                self.indexed_bytes = end
+            pos = end
+            if report and len(self.block_lines) % 256 == 0:
+                report(count)
+        with self.lock:
+            self.complete = True
+        if report:
+            report(count)
+
+    def line_count(self):
+        with self.lock:
+            count = self.block_lines[-1]
+            if self.complete and self.size and self.mm[self.size - 1:self.size] != b'\n':
+                count += 1 # Last line has no trailing newline
+            return count
+
+    def line_start(self, line):
+        """Byte offset where the given zero-based line starts."""
+        if line <= 0:
+            return 0
+        with self.lock:
+            block = bisect.bisect_left(self.block_lines, line) - 1
+            skip = line - self.block_lines[block]
+        pos = block * LINE_INDEX_BLOCK
+        for _ in range(skip):
+            pos = self.mm.find(b'\n', pos) + 1
+        return pos
+
+    def read_lines(self, first, count):
+        start = self.line_start(first)
+        end = start
+        for _ in range(count):
+            newline = self.mm.find(b'\n', end)
+            if newline == -1:
+                end = self.size
+                break
+            end = newline + 1
+        return self.mm[start:end].decode('utf-8', errors='replace')
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+class LineIndexer(QThread):
+    """Builds the line index of a MappedFile in the background."""
+    progress = pyqtSignal(int)
+
+    def __init__(self, mapped, parent=None):
+        super().__init__(parent)
+        self.mapped = mapped
+
+    def run(self):
+        self.mapped.build_index(self.isInterruptionRequested, self.progress.emit)
+
+
+class LargeFileView(QPlainTextEdit):
+    """Read-only view that only materializes the lines currently on screen."""
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.mapped = MappedFile(file_path)
+        self.first_line = 0
+        self.setReadOnly(True)
+        self.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+        # The real scroll bar spans the whole file instead of the visible window
+        self.line_scrollbar = QScrollBar(Qt.Vertical, self)
+        self.line_scrollbar.valueChanged.connect(self.scroll_to_line)
+        self.setViewportMargins(0, 0, self.line_scrollbar.sizeHint().width(), 0)
+
+        self.indexer = LineIndexer(self.mapped, self)
+        self.indexer.progress.connect(self.update_line_range)
+        self.indexer.finished.connect(self.update_line_range)
+        self.indexer.start()
+        self.refresh()
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // max(1, self.fontMetrics().lineSpacing()))
+
+    def line_count(self):
+        return self.mapped.line_count()
+
+    def update_line_range(self, *args):
+        self.line_scrollbar.setRange(0, max(0, self.line_count() - self.visible_line_count()))
+        self.line_scrollbar.setPageStep(self.visible_line_count())
+        if self.document().blockCount() < self.visible_line_count():
+            self.refresh() # More lines became known while the window was short
+
+    def scroll_to_line(self, line):
+        line = max(0, min(line, self.line_scrollbar.maximum()))
+        if self.line_scrollbar.value() != line:
+            self.line_scrollbar.setValue(line) # Re-enters through valueChanged
+            return
+        self.first_line = line
+        self.refresh()
+
+    def refresh(self):
+        text = self.mapped.read_lines(self.first_line, self.visible_line_count())
+        self.setPlainText(text[:-1] if text.endswith('\n') else text)
+
+    def release(self):
+        self.indexer.requestInterruption()
+        self.indexer.wait()
+        self.mapped.close()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        rect = self.contentsRect()
+        width = self.line_scrollbar.sizeHint().width()
+        self.line_scrollbar.setGeometry(rect.right() - width + 1, rect.top(), width, rect.height())
+        self.update_line_range()
+        self.refresh()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == event.FontChange:
+            self.update_line_range()
+            self.refresh()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() // 120 * QApplication.wheelScrollLines()
+        self.scroll_to_line(self.first_line - steps)
+
+    def keyPressEvent(self, event):
+        moves = {Qt.Key_Up: -1, Qt.Key_Down: 1,
+                 Qt.Key_PageUp: -self.visible_line_count(), Qt.Key_PageDown: self.visible_line_count()}
+        if event.key() in moves:
+            self.scroll_to_line(self.first_line + moves[event.key()])
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.scroll_to_line(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.scroll_to_line(self.line_scrollbar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+
+# --- Background File Loading ---
+class FileLoader(QThread):
+    """Streams a file in chunks and decodes it incrementally off the GUI thread."""
+    chunk_loaded = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.position = None # (device, inode, bytes read) once done, where follow mode picks up
+
+    def run(self):
+        try:
+            total = os.path.getsize(self.file_path)
+            # Same decoding and newline translation as open(..., 'r', encoding='utf-8')
+            decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+            loaded = 0
+            last_percent = -1
+            with open(self.file_path, 'rb') as f:
+                status = os.fstat(f.fileno())
+                while not self.isInterruptionRequested():
+                    data = f.read(LOAD_CHUNK_SIZE)
+                    text = decoder.decode(data, final=not data)
+                    if text:
+                        self.chunk_loaded.emit(text)
+                    if not data:
+                        self.position = (status.st_dev, status.st_ino, loaded)
+                        break
+                    loaded += len(data)
+                    percent = loaded * 100 // total if total else 100
+                    if percent != last_percent:
+                        last_percent = percent
+                        self.progress.emit(percent)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+# --- Follow Mode ---
+class FileFollower(QObject):
+    """Reads what gets appended to a file, for a tab in follow mode.
+
+    Change notifications start a short batch timer, so a burst of writes
+    becomes one append; a slower poll covers file systems without
+    notifications. Each read starts at the last offset and takes at most
+    LOAD_CHUNK_SIZE, which keeps it cheap enough for the GUI thread. When the
+    path is replaced (rotation), the old file is read to its end before the
+    new one is read from the start; a file that shrank is read again from
+    the start.
+    """
+    appended = pyqtSignal(str)
+    restarted = pyqtSignal(str) # Why reading started over: "rotated" or "truncated"
+    failed = pyqtSignal(str)
+
+    def __init__(self, file_path, position=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.file = open(file_path, 'rb')
+        self.decoder = self.new_decoder()
+        self.diverged = False # Lines were dropped or reading started over, so the tab no longer matches the file
+        status = os.fstat(self.file.fileno())
+        if position is None:
+            self.offset = status.st_size # What the tab holds is unknown, so only new writes are followed
+        elif tuple(position[:2]) != (status.st_dev, status.st_ino) or status.st_size < position[2]:
+            self.offset = 0 # Replaced or truncated since it was read
+            self.diverged = True
+        else:
+            self.offset = position[2]
+        self.watcher = QFileSystemWatcher([file_path], self)
+        self.watcher.fileChanged.connect(self.schedule)
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.setInterval(FOLLOW_BATCH_MS)
+        self.batch_timer.timeout.connect(self.read_appended)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(FOLLOW_POLL_MS)
+        self.poll_timer.timeout.connect(self.schedule)
+        self.poll_timer.start()
+        self.schedule() # Whatever was written since the tab was loaded
+
+    @staticmethod
+    def new_decoder():
+        # Same decoding and newline translation as FileLoader
+        return io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+
+    def schedule(self):
+        # Restarting a pending timer would let a steady stream of writes hold the batch back forever
+        if not self.batch_timer.isActive():
+            self.batch_timer.start()
+
+    def start_over(self, file, reason):
+        self.file = file
+        self.offset = 0
+        self.decoder = self.new_decoder()
+        self.diverged = True
+        self.restarted.emit(reason)
+
+    def read_appended(self):
+        text = ''
+        error = None
+        try:
+            if self.file_path not in self.watcher.files() and os.path.exists(self.file_path):
+                self.watcher.addPath(self.file_path) # The watch ends when the file is renamed or deleted
+            current = os.fstat(self.file.fileno())
+            if current.st_size < self.offset:
+                self.start_over(self.file, "truncated") # Truncated in place, like logrotate's copytruncate
+            self.file.seek(self.offset)
+            data = self.file.read(LOAD_CHUNK_SIZE)
+            self.offset += len(data)
+            text = self.decoder.decode(data)
+            if len(data) == LOAD_CHUNK_SIZE:
+                self.schedule() # More is waiting; the next batch goes on after the editor caught up
+            else:
+                try:
+                    status = os.stat(self.file_path)
+                except FileNotFoundError:
+                    status = None # Moved away and not created again yet
+                if status and (status.st_dev, status.st_ino) != (current.st_dev, current.st_ino):
+                    # The old file is read to its end, so the rest of its lines come before the new file's
+                    text += self.decoder.decode(b'', final=True)
+                    self.file.close()
+                    self.start_over(open(self.file_path, 'rb'), "rotated")
+                    self.schedule()
+        except OSError as e:
+            error = str(e)
+        if text:
+            self.appended.emit(text)
+        if error:
+            self.failed.emit(error)
+
+    def position(self):
+        # Bytes the decoder still holds (a split character, a lone CR) are read again next time
+        buffered, flags = self.decoder.getstate()
+        status = os.fstat(self.file.fileno())
+        return (status.st_dev, status.st_ino, self.offset - len(buffered) - (flags & 1))
+
+    def close(self):
+        self.batch_timer.stop()
+        self.poll_timer.stop()
+        self.file.close()
+
+
+# --- Text Buffer ---
+class _Piece:
+    """Immutable treap node; every edit builds new nodes so old roots stay valid snapshots."""
+    __slots__ = ('text', 'start', 'length', 'priority', 'left', 'right', 'size')
+
+    def __init__(self, text, start, length, priority, left=None, right=None):
+        self.text = text
+        self.start = start
+        self.length = length
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.size = length + (left.size if left else 0) + (right.size if right else 0)
+
+    def with_children(self, left, right):
+        return _Piece(self.text, self.start, self.length, self.priority, left, right)
+
+
+class PieceTable:
+    """Plain-text buffer stored as pieces of immutable strings in an implicit treap.
+
+    Inserts and deletes are O(log n) in the number of pieces and never copy
+    existing text. Since nodes are never mutated, snapshot() is O(1) and can be
+    handed to worker threads while the editor keeps changing.
+    """
+    MERGE_LIMIT = 4096 # Small inserted pieces are coalesced so typing doesn't fragment the tree
+
+    def __init__(self, text='', _root=None):
+        self.root = _root
+        if text:
+            self.root = self._node(text, 0, len(text))
+
+    def __len__(self):
+        return self.root.size if self.root else 0
+
+    @staticmethod
+    def _node(text, start, length, left=None, right=None):
+        return _Piece(text, start, length, random.random(), left, right)
+
+    def _split(self, node, offset):
+        """Split into (first offset characters, the rest)."""
+        if node is None:
+            return None, None
+        left_size = node.left.size if node.left else 0
+        if offset <= left_size:
+            left, right = self._split(node.left, offset)
+            return left, node.with_children(right, node.right)
+        offset -= left_size
+        if offset >= node.length:
+            left, right = self._split(node.right, offset - node.length)
+            return node.with_children(node.left, left), right
+        # The split point falls inside this piece
+        head = self._node(node.text, node.start, offset)
+        tail = self._node(node.text, node.start + offset, node.length - offset)
+        return self._merge(node.left, head), self._merge(tail, node.right)
+
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            return left.with_children(left.left, self._merge(left.right, right))
+        return right.with_children(self._merge(left, right.left), right.right)
+
+    def _last_piece(self, node):
+        while node and node.right:
+            node = node.right
+        return node
+
+    def insert(self, position, text):
+        if not text:
+            return
+        left, right = self._split(self.root, position)
+        last = self._last_piece(left)
+        if last and last.start == 0 and last.length == len(last.text) and \
+                last.length + len(text) <= self.MERGE_LIMIT:
+            left, _ = self._split(left, left.size - last.length)
+            text = last.text + text
+        self.root = self._merge(self._merge(left, self._node(text, 0, len(text))), right)
+
+    def delete(self, position, length):
+        if length <= 0:
+            return
+        left, rest = self._split(self.root, position)
+        _, right = self._split(rest, length)
+        self.root = self._merge(left, right)
+
+    def snapshot(self):
+        return PieceTable(_root=self.root)
+
+    def chunks(self, start=0, end=None):
+        """Yield the text between start and end piece by piece, without joining it."""
+        end = len(self) if end is None else min(end, len(self))
+        stack, node, offset = [], self.root, 0
+        while (stack or node) and offset < end:
+            if node:
+                stack.append(node)
+                node = node.left
+                continue
+            node = stack.pop()
+            piece_start = offset
+            offset += node.length
+            if offset > start:
+                lo = max(start - piece_start, 0)
+                hi = min(end - piece_start, node.length)
+                if lo == 0 and hi == len(node.text) and node.start == 0:
+                    yield node.text # Whole string, no copy
+                else:
+                    yield node.text[node.start + lo:node.start + hi]
+            node = node.right
+
+    def text(self, start=0, end=None):
+        return ''.join(self.chunks(start, end))
+
+
+class TextEditor(QPlainTextEdit):
+    """Plain-text editor tab whose contents are mirrored into a PieceTable.
+
+    QPlainTextEdit skips the rich-text layout of QTextEdit, and the buffer lets
+    save, session and search code read the text without toPlainText() copies.
+    """
+    def __init__(self, content='', parent=None):
+        super().__init__(parent)
+        self.buffer = PieceTable()
+        self.document().contentsChange.connect(self.sync_buffer)
+        self.setPlainText(content)
+        self.match_index = MatchIndex(self) # Connected after sync_buffer so it sees the updated buffer
+        self.highlighter = Highlighter(self)
+        self.file_position = None # (device, inode, byte offset) the text was loaded up to, for follow mode
+
+    @timed("paint", show=False)
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+    @timed("layout", show=False) # Wrapped lines are laid out again when the width changes
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.highlighter.schedule()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.highlighter.schedule()
+
+    def sync_buffer(self, position, removed, added):
+        document_length = self.document().characterCount() - 1 # Drop the final paragraph separator
+        # Whole-document resets may report the trailing separator as well
+        removed = min(removed, len(self.buffer) - position)
+        added = min(added, document_length - position)
+        if len(self.buffer) - removed + added != document_length:
+            self.buffer = PieceTable(self.document().toRawText().replace('\u2029', '\n'))
+            return
+        self.buffer.delete(position, removed)
+        if added:
+            cursor = QTextCursor(self.document())
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+            self.buffer.insert(position, cursor.selectedText().replace('\u2029', '\n'))
+
+
+# --- Search Helpers ---
+def compile_search_pattern(text, case_sensitive=True, whole_word=False, regex=False):
+    pattern = text if regex else re.escape(text)
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+
+
+def plan_replacements(text, pattern, replacement, regex=False):
+    """Scan text once and return (start, end, new_text) for every match."""
+    spans = []
+    for match in pattern.finditer(text):
+        if match.start() == match.end():
+            continue # Empty regex matches would replace nothing useful
+        spans.append((match.start(), match.end(), match.expand(replacement) if regex else replacement))
+    return spans
+
+
+class SearchWorker(QThread):
+    """Collects every match of a pattern in a buffer snapshot."""
+    def __init__(self, snapshot, pattern, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self.pattern = pattern
+        self.starts = []
+        self.ends = []
+
+    def run(self):
+        for match in self.pattern.finditer(self.snapshot.text()):
+            if match.start() != match.end():
+                self.starts.append(match.start())
+                self.ends.append(match.end())
+            if len(self.starts) % 4096 == 0 and self.isInterruptionRequested():
+                return
+
+
+class MatchIndex(QObject):
+    """Sorted match positions of the current search pattern in one TextEditor.
+
+    The first scan runs on a SearchWorker; after that, each contentsChange only
+    rescans the lines around the edit and shifts the matches that follow it.
+    """
+    changed = pyqtSignal()
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.pattern = None
+        self.literal_length = 0 # Reach of a literal match across an edit, 0 for regexes
+        self.starts = []
+        self.ends = []
+        self.length = 0 # Buffer length the positions refer to
+        self.worker = None
+        self.highlighting = False
+        editor.document().contentsChange.connect(self.on_contents_change)
+        editor.verticalScrollBar().valueChanged.connect(self.update_highlights)
+
+    def set_pattern(self, pattern, literal_length):
+        if self.pattern is not None and (pattern.pattern, pattern.flags) == (self.pattern.pattern, self.pattern.flags):
+            return
+        self.pattern = pattern
+        self.literal_length = literal_length
+        self.rescan()
+
+    def clear(self):
+        self.pattern = None
+        self.starts, self.ends = [], []
+        self.set_highlighting(False)
+
+    def is_ready(self):
+        return self.worker is None
+
+    def rescan(self):
+        if self.worker:
+            self.worker.requestInterruption()
+        self.worker = SearchWorker(self.editor.buffer.snapshot(), self.pattern, self)
+        self.length = len(self.editor.buffer)
+        worker = self.worker
+        worker.finished.connect(lambda: self.collect(worker))
+        worker.start()
+
+    def collect(self, worker):
+        # Runs once per worker, from its finished signal; a superseded scan is just dropped
+        if worker is self.worker:
+            self.take_results(worker)
+        worker.deleteLater()
+
+    def take_results(self, worker):
+        self.worker = None
+        self.starts, self.ends = worker.starts, worker.ends
+        self.update_highlights()
+        self.changed.emit()
+
+    def wait_ready(self):
+        # Blocks until the scan is done; only the benchmark uses it, the GUI waits for changed
+        worker = self.worker
+        if worker:
+            worker.wait()
+            self.take_results(worker) # Its queued finished signal still arrives and deletes it
+
+    def on_contents_change(self, position, removed, added):
+        if self.pattern is None:
+            return
+        buffer = self.editor.buffer
+        if self.worker:
+            self.rescan() # The running scan is already stale
+            return
+        delta = len(buffer) - self.length
+        removed = min(removed, self.length - position)
+        added = removed + delta
+        if removed < 0 or added < 0:
+            self.rescan()
+            return
+        self.length = len(buffer)
+
+        # Rescan whole lines around the edit; matches starting in there are replaced
+        document = self.editor.document()
+        window_start = document.findBlock(max(0, position - self.literal_length)).position()
+        last_block = document.findBlock(min(position + added + self.literal_length, len(buffer)))
+        window_end = min(last_block.position() + last_block.length() - 1, len(buffer))
+        first = bisect.bisect_left(self.starts, window_start)
+        last = bisect.bisect_left(self.starts, window_end - delta)
+        starts, ends = [], []
+        for match in self.pattern.finditer(buffer.text(window_start, window_end)):
+            if match.start() != match.end():
+                starts.append(window_start + match.start())
+                ends.append(window_start + match.end())
+        self.starts[first:] = starts + [start + delta for start in self.starts[last:]]
+        self.ends[first:] = ends + [end + delta for end in self.ends[last:]]
+        self.update_highlights()
+        self.changed.emit()
+
+    def find_from(self, position, backward=False):
+        """Return (match number, wrapped) for the nearest match, or (None, False)."""
+        if not self.starts:
+            return None, False
+        if backward:
+            index = bisect.bisect_left(self.starts, position) - 1
+            if index < 0:
+                return len(self.starts) - 1, True
+            return index, False
+        index = bisect.bisect_left(self.starts, position)
+        if index == len(self.starts):
+            return 0, True
+        return index, False
+
+    def set_highlighting(self, enabled):
+        self.highlighting = enabled
+        self.update_highlights()
+
+    def update_highlights(self):
+        # Only matches on screen get an extra selection, so the cost doesn't grow with N
+        if not self.highlighting or self.worker:
+            self.editor.setExtraSelections([])
+            return
+        viewport = self.editor.viewport()
+        first = self.editor.firstVisibleBlock().position()
+        last = self.editor.cursorForPosition(QPoint(viewport.width(), viewport.height())).block()
+        last = last.position() + last.length()
+        selections = []
+        for index in range(bisect.bisect_left(self.starts, first), bisect.bisect_left(self.starts, last)):
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(self.editor.document())
+            selection.cursor.setPosition(self.starts[index])
+            selection.cursor.setPosition(self.ends[index], QTextCursor.KeepAnchor)
+            selection.format.setBackground(QColor(255, 235, 120))
+            selections.append(selection)
+        self.editor.setExtraSelections(selections)
+
+
+# --- Syntax Highlighting ---
+def text_format(color=None, bold=False, italic=False):
+    char_format = QTextCharFormat()
+    if color:
+        char_format.setForeground(QColor(*color))
+    if bold:
+        char_format.setFontWeight(QFont.Bold)
+    if italic:
+        char_format.setFontItalic(True)
+    return char_format
+
+
+HIGHLIGHT_FORMATS = {
+    # Markdown
+    "heading": text_format((0, 70, 160), bold=True),
+    "fence": text_format((120, 120, 120)),
+    "code": text_format((150, 60, 30)),
+    "quote": text_format((90, 110, 90), italic=True),
+    "marker": text_format((170, 90, 0), bold=True),
+    "strong": text_format(bold=True),
+    "emphasis": text_format(italic=True),
+    "link": text_format((0, 100, 200)),
+    # JSON
+    "key": text_format((130, 30, 130)),
+    "string": text_format((20, 120, 40)),
+    "number": text_format((30, 80, 200)),
+    "literal": text_format((190, 90, 0), bold=True),
+    # Logs
+    "timestamp": text_format((110, 110, 110)),
+    "error": text_format((200, 0, 0), bold=True),
+    "warning": text_format((190, 120, 0), bold=True),
+    "info": text_format((0, 120, 60)),
+    "debug": text_format((120, 120, 160)),
+    "trace": text_format((170, 60, 60)),
+}
+
+
+class MarkdownRules:
+    """Markdown line by line; the state tells whether the line is inside a ``` (1) or ~~~ (2) fence."""
+    FENCE = re.compile(r'\s{0,3}(`{3,}|~{3,})')
+    HEADING = re.compile(r'\s{0,3}#{1,6}(\s|$)')
+    QUOTE = re.compile(r'\s{0,3}>')
+    LIST_MARKER = re.compile(r'\s*([-*+]|\d{1,9}[.)])\s')
+    INLINE = re.compile(r'(?P<code>`+)[^`]+?(?P=code)'
+                        r'|(?P<strong>\*\*|__)\S(?:.*?\S)??(?P=strong)'
+                        r'|(?P<emphasis>[*_])\S(?:.*?\S)??(?P=emphasis)'
+                        r'|(?P<link>!?\[[^\]]*\]\([^)\s]*\)|<https?://[^>\s]+>)')
+
+    def highlight(self, text, state):
+        fence = self.FENCE.match(text)
+        if state:
+            if fence and fence.group(1)[0] == "`~"[state - 1]:
+                return [(0, len(text), "fence")], 0
+            return [(0, len(text), "code")], state
+        if fence:
+            return [(0, len(text), "fence")], 1 if fence.group(1)[0] == "`" else 2
+        if self.HEADING.match(text):
+            return [(0, len(text), "heading")], 0
+        spans = []
+        if self.QUOTE.match(text):
+            spans.append((0, len(text), "quote"))
+        else:
+            marker = self.LIST_MARKER.match(text)
+            if marker:
+                spans.append((marker.start(1), marker.end(1) - marker.start(1), "marker"))
+        spans.extend((match.start(), match.end() - match.start(), match.lastgroup)
+                     for match in self.INLINE.finditer(text))
+        return spans, 0
+
+
+class JsonRules:
+    """JSON tokens; strings can't span lines, so every line starts from state 0."""
+    TOKEN = re.compile(r'(?P<key>"(?:[^"\\]|\\.)*"(?=\s*:))'
+                       r'|(?P<string>"(?:[^"\\]|\\.)*"?)'
+                       r'|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)'
+                       r'|(?P<literal>\b(?:true|false|null)\b)')
+
+    def highlight(self, text, state):
+        return [(match.start(), match.end() - match.start(), match.lastgroup)
+                for match in self.TOKEN.finditer(text)], 0
+
+
+class LogRules:
+    """Timestamps and levels of common log formats.
+
+    A line with a timestamp or a leading level starts an entry; lines without
+    either continue the entry above, and the state (1) marks that entry as an
+    error so its stack trace is shown in the error color too.
+    """
+    TIMESTAMP = re.compile(r'\s*\[?(?:\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'
+                           r'|[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}' # syslog
+                           r'|\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)\]?')
+    LEVEL = re.compile(r'\b(?:(?P<error>FATAL|CRITICAL|SEVERE|ERROR|ERR)|(?P<warning>WARNING|WARN)'
+                       r'|(?P<info>INFO|NOTICE)|(?P<debug>DEBUG|TRACE))\b', re.IGNORECASE)
+
+    def find_level(self, text, position):
+        # Lowercase levels only count as "[error]" or "level=error", not as words of the message
+        level = self.LEVEL.search(text, position)
+        while level and not (level.group().isupper() or text[level.start() - 1:level.start()] in ("[", "=")):
+            level = self.LEVEL.search(text, level.end())
+        return level
+
+    def highlight(self, text, state):
+        spans = []
+        stamp = self.TIMESTAMP.match(text)
+        if stamp:
+            spans.append((stamp.start(), stamp.end() - stamp.start(), "timestamp"))
+            level = self.find_level(text, stamp.end())
+        else:
+            level = self.find_level(text, 0)
+            if level and text[:level.start()].strip(" \t[<"):
+                level = None # Only a level at the start of the line begins an entry
+        if level:
+            spans.append((level.start(), level.end() - level.start(), level.lastgroup))
+        elif not stamp:
+            return ([(0, len(text), "trace")] if state and text.strip() else []), state
+        return spans, 1 if level and level.lastgroup == "error" else 0
+
+
+HIGHLIGHT_RULES = {".md": MarkdownRules(), ".markdown": MarkdownRules(), ".json": JsonRules(),
+                   ".log": LogRules()}
+
+
+def highlight_rules_for(file_path):
+    name = re.sub(r'\.\d+$', '', os.path.basename(file_path or '').lower()) # Rotated logs: app.log.1
+    return HIGHLIGHT_RULES.get(os.path.splitext(name)[1])
+
+
+class Highlighter(QObject):
+    """Syntax highlighting of one TextEditor, done a slice of blocks at a time.
+
+    Each block's userState packs the rule state it was highlighted from and the
+    one it ended in, so a block is only highlighted again when its text changes
+    or the block above it now ends in a different state. Blocks around the
+    viewport go first; the rest is filled in from a zero-interval timer.
+    Formats go straight onto the block layouts, which doesn't emit
+    contentsChange, so the buffer mirror and match index never see them.
+    """
+    STATE_LIMIT = 256 # Rule states must stay below this to fit in the packed userState
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.rules = None
+        self.pending = [] # Cursors at blocks to resume from; they move along with edits
+        self.viewport_dirty = False
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.run)
+        editor.document().contentsChange.connect(self.on_contents_change)
+        # Programmatic scrolls (centerCursor, ensureCursorVisible) don't always emit valueChanged
+        editor.updateRequest.connect(lambda rect, dy: dy and self.schedule())
+
+    def set_rules(self, rules):
+        if rules is self.rules:
+            return
+        document = self.editor.document()
+        if self.rules is not None:
+            # Only a Save As to another type gets here, so the old formats are cleared right away
+            block = document.begin()
+            while block.isValid():
+                block.setUserState(-1)
+                block.layout().clearFormats()
+                block = block.next()
+            document.markContentsDirty(0, document.characterCount())
+        self.rules = rules
+        self.pending = []
+        if rules is not None:
+            self.mark_from(document.begin())
+        self.schedule()
+
+    def mark_from(self, block):
+        cursor = QTextCursor(self.editor.document())
+        cursor.setPosition(block.position())
+        self.pending.append(cursor)
+
+    def schedule(self):
+        self.viewport_dirty = True
+        if self.rules is not None and not self.timer.isActive():
+            self.timer.start()
+
+    def on_contents_change(self, position, removed, added):
+        if self.rules is None:
+            return
+        # Edited blocks keep their old state and formats; blocks split off by the edit start out unset
+        document = self.editor.document()
+        first = document.findBlock(position)
+        first.setUserState(-1)
+        document.findBlock(position + added).setUserState(-1)
+        self.mark_from(first)
+        self.schedule()
+
+    def end_state(self, block):
+        state = block.userState()
+        return state % self.STATE_LIMIT if state >= 0 else 0 # Unhighlighted blocks are assumed to end plain
+
+    def is_current(self, block, state):
+        user_state = block.userState()
+        return user_state >= 0 and user_state // self.STATE_LIMIT == state
+
+    def highlight_block(self, block, state):
+        spans, end_state = self.rules.highlight(block.text(), state)
+        layout = block.layout()
+        if spans or layout.formats():
+            ranges = []
+            for start, length, style in spans:
+                format_range = QTextLayout.FormatRange()
+                format_range.start = start
+                format_range.length = length
+                format_range.format = HIGHLIGHT_FORMATS[style]
+                ranges.append(format_range)
+            layout.setFormats(ranges)
+            self.editor.document().markContentsDirty(block.position(), block.length())
+        block.setUserState(state * self.STATE_LIMIT + end_state)
+        return end_state
+
+    def run(self):
+        if self.rules is None or not self.editor.isVisible():
+            self.timer.stop() # Hidden tabs pick up again from showEvent
+            return
+        started = time.perf_counter()
+        deadline = started + HIGHLIGHT_SLICE_MS / 1000
+        count = 0
+        if self.viewport_dirty:
+            self.viewport_dirty = False
+            count += self.highlight_viewport()
+        while self.pending and time.perf_counter() < deadline:
+            count += self.resume(deadline)
+        if not self.pending and not self.viewport_dirty:
+            self.timer.stop()
+        if count:
+            Profiler.shared().record("highlight", started, show=False, blocks=count)
+
+    def highlight_viewport(self):
+        editor = self.editor
+        block = editor.firstVisibleBlock()
+        for _ in range(HIGHLIGHT_VIEWPORT_MARGIN):
+            if not block.previous().isValid():
+                break
+            block = block.previous()
+        lines = editor.viewport().height() // max(1, editor.fontMetrics().lineSpacing()) + 1
+        # Above an unhighlighted block the state is a guess; the background pass corrects it later
+        known = not block.previous().isValid() or block.previous().userState() >= 0
+        state = self.end_state(block.previous())
+        count = 0
+        for _ in range(lines + 2 * HIGHLIGHT_VIEWPORT_MARGIN):
+            if not block.isValid():
+                return count
+            if block.userState() < 0 or (known and not self.is_current(block, state)):
+                state = self.highlight_block(block, state)
+                count += 1
+            else:
+                state = self.end_state(block)
+            known = True
+            block = block.next()
+        if block.isValid() and not self.is_current(block, state):
+            self.mark_from(block) # The rest of the document below the screen
+        return count
+
+    def resume(self, deadline):
+        # Walk down from the earliest pending block until blocks are up to date again
+        self.pending.sort(key=QTextCursor.position)
+        cursor = self.pending[0]
+        block = self.editor.document().findBlock(cursor.position())
+        state = self.end_state(block.previous())
+        count = 0
+        while block.isValid() and not self.is_current(block, state):
+            if count % 64 == 0 and time.perf_counter() > deadline:
+                cursor.setPosition(block.position())
+                return count
+            state = self.highlight_block(block, state)
+            block = block.next()
+            count += 1
+        # Pending cursors up to the block the walk stopped at are done as well (edits move them mid-block)
+        end = block.position() + block.length() if block.isValid() else self.editor.document().characterCount()
+        self.pending = [cursor for cursor in self.pending if cursor.position() >= end]
+        return count
+
+
+# --- Find in Files ---
+def search_text_lines(text, pattern, first_line=1):
+    """Return (line number, line text) for every line of text containing a match."""
+    results = []
+    line, line_pos, last_line = first_line, 0, None
+    for match in pattern.finditer(text):
+        if match.start() == match.end():
+            continue
+        line += text.count('\n', line_pos, match.start())
+        line_pos = match.start()
+        if line == last_line:
+            continue # One result per line is enough
+        last_line = line
+        start = text.rfind('\n', 0, match.start()) + 1
+        end = text.find('\n', match.start())
+        results.append((line, text[start:end if end != -1 else len(text)][:FIND_IN_FILES_LINE_LIMIT]))
+    return results
+
+
+def search_file(file_path, pattern, cancel_event):
+    """Search a file on disk chunk by chunk through mmap, skipping binary files."""
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if b'\0' in mm[:8192]:
+                return [] # Binary file
+            results = []
+            pos, line = 0, 1
+            while pos < size and not cancel_event.is_set():
+                end = min(pos + LOAD_CHUNK_SIZE, size)
+                if end < size:
+                    newline = mm.rfind(b'\n', pos, end)
+                    end = newline + 1 if newline != -1 else end # Keep lines whole across chunks
+                text = mm[pos:end].decode('utf-8', errors='replace').replace('\r\n', '\n')
+                results.extend(search_text_lines(text, pattern, line))
+                line += text.count('\n')
+                pos = end
+            return results
+
+
+class FindInFilesWorker(QThread):
+    """Fans a search out over open tabs and a folder tree with a thread pool."""
+    file_matched = pyqtSignal(str, list) # source, [(line, text)]
+    progress = pyqtSignal(int) # sources searched so far
+
+    def __init__(self, pattern, open_buffers, folder, file_filter, parent=None):
+        super().__init__(parent)
+        self.pattern = pattern
+        self.open_buffers = open_buffers # source -> buffer snapshot of open tabs, None to read from disk
+        self.folder = folder
+        self.file_filters = file_filter.split() or ['*']
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def iter_folder_files(self):
+        if not self.folder:
+            return
+        for root, dirs, files in os.walk(self.folder):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if self.cancel_event.is_set():
+                    return
+                path = os.path.abspath(os.path.join(root, name))
+                if path not in self.open_buffers and any(fnmatch.fnmatch(name, f) for f in self.file_filters):
+                    yield path
+
+    def search_source(self, source):
+        if self.open_buffers.get(source) is not None:
+            return source, search_text_lines(self.open_buffers[source].text(), self.pattern)
+        try:
+            return source, search_file(source, self.pattern, self.cancel_event)
+        except (OSError, ValueError):
+            return source, [] # Unreadable files are skipped
+
+    def run(self):
+        searched = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=FIND_IN_FILES_WORKERS) as pool:
+            pending = set()
+            sources = itertools.chain(list(self.open_buffers), self.iter_folder_files())
+            for source in sources:
+                if self.cancel_event.is_set():
+                    break
+                pending.add(pool.submit(self.search_source, source))
+                if len(pending) < FIND_IN_FILES_WORKERS * 2:
+                    continue
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                searched += self.report(done)
+            searched += self.report(concurrent.futures.as_completed(pending))
+
+    def report(self, futures):
+        count = 0
+        for future in futures:
+            source, results = future.result()
+            count += 1
+            if results and not self.cancel_event.is_set():
+                self.file_matched.emit(source, results)
+        self.progress.emit(count)
+        return count
+
+
+class FindInFilesPanel(QDockWidget):
+    def __init__(self, parent=None):
+        super().__init__("Find in Files", parent)
+        self.parent = parent
+        self.worker = None
+        self.result_count = 0
+        self.searched_count = 0
+        self.initUI()
+
+    def initUI(self):
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        find_layout = QHBoxLayout()
+        self.find_input = QLineEdit()
+        self.find_input.returnPressed.connect(self.start_search)
+        find_layout.addWidget(QLabel("Find what:"))
+        find_layout.addWidget(self.find_input)
+        layout.addLayout(find_layout)
+
+        self.search_options = SearchOptions()
+        layout.addWidget(self.search_options)
+
+        folder_layout = QHBoxLayout()
+        self.folder_input = QLineEdit()
+        self.folder_input.setPlaceholderText("Folder (optional)")
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.clicked.connect(self.select_folder)
+        self.filter_input = QLineEdit("*.txt *.md *.log *.py *.json")
+        self.filter_input.setToolTip("File name patterns, separated by spaces")
+        folder_layout.addWidget(self.folder_input)
+        folder_layout.addWidget(self.browse_button)
+        folder_layout.addWidget(self.filter_input)
+        layout.addLayout(folder_layout)
+
+        button_layout = QHBoxLayout()
+        self.tabs_checkbox = QCheckBox("Open tabs")
+        self.tabs_checkbox.setChecked(True)
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.start_search)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_search)
+        self.cancel_button.setEnabled(False)
+        self.status_label = QLabel("")
+        button_layout.addWidget(self.tabs_checkbox)
+        button_layout.addWidget(self.status_label)
+        button_layout.addStretch()
+        button_layout.addWidget(self.search_button)
+        button_layout.addWidget(self.cancel_button)
+        layout.addLayout(button_layout)
+
+        self.results_list = QListWidget()
+        self.results_list.itemActivated.connect(self.open_result)
+        layout.addWidget(self.results_list)
+
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+    def select_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder", self.folder_input.text())
+        if folder:
+            self.folder_input.setText(folder)
+
+    def start_search(self):
+        text = self.find_input.text()
+        if not text or not self.parent:
+            return
+        try:
+            pattern = compile_search_pattern(text, **self.search_options.options())
+        except re.error as e:
+            self.status_label.setText(f"Invalid pattern: {e}")
+            return
+        self.cancel_search()
+        self.results_list.clear()
+        self.result_count = 0
+        self.searched_count = 0
+
+        open_buffers = self.parent.open_tab_snapshots() if self.tabs_checkbox.isChecked() else {}
+        folder = self.folder_input.text().strip()
+        if folder and not os.path.isdir(folder):
+            self.status_label.setText("Folder not found")
+            return
+
+        self.worker = FindInFilesWorker(pattern, open_buffers, folder, self.filter_input.text(), self)
+        self.worker.file_matched.connect(self.add_results)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.finished.connect(self.search_finished)
+        self.search_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.status_label.setText("Searching...")
+        self.worker.start()
+
+    def cancel_search(self):
+        if self.worker:
+            self.worker.cancel()
+            self.worker.wait()
+            self.search_finished()
+
+    def add_results(self, source, results):
+        for line, text in results:
+            if self.result_count >= FIND_IN_FILES_RESULT_LIMIT:
+                self.worker.cancel()
+                return
+            item = QListWidgetItem(f"{source}:{line}: {text.strip()}")
+            item.setData(Qt.UserRole, (source, line))
+            self.results_list.addItem(item)
+            self.result_count += 1
+
+    def update_progress(self, count):
+        self.searched_count += count
+        self.status_label.setText(f"Searching... {self.searched_count} files, {self.result_count} matches")
+
+    def search_finished(self):
+        worker = self.sender() if isinstance(self.sender(), FindInFilesWorker) else self.worker
+        if worker is not self.worker:
+            return
+        self.worker = None
+        worker.deleteLater()
+        self.search_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        limit_note = " (limit reached)" if self.result_count >= FIND_IN_FILES_RESULT_LIMIT else ""
+        self.status_label.setText(f"{self.result_count} matches in {self.searched_count} files{limit_note}")
+
+    def open_result(self, item):
+        source, line = item.data(Qt.UserRole)
+        self.parent.open_search_result(source, line)
+
+
+# --- Session Journal ---
+class SessionStore(QThread):
+    """Crash-safe session journal in SQLite.
+
+    Tab state is written by this thread from a queue of buffer snapshots, so
+    the GUI never waits on disk. Reads for restoring use a separate connection.
+    """
+    SCHEMA = """
+        PRAGMA auto_vacuum = INCREMENTAL;
+        CREATE TABLE IF NOT EXISTS tabs (
+            tab_id TEXT PRIMARY KEY,
+            window_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            file_path TEXT,
+            content TEXT,
+            cursor INTEGER NOT NULL DEFAULT 0,
+            scroll INTEGER NOT NULL DEFAULT 0,
+            updated REAL NOT NULL
+        );
+    """
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            folder = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+            os.makedirs(folder, exist_ok=True)
+            cls._shared = cls(os.path.join(folder, "session.sqlite3"))
+            cls._shared.start()
+            QApplication.instance().aboutToQuit.connect(cls._shared.stop)
+        return cls._shared
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.queue = queue.Queue()
+        self.reader = self.connect()
+        self.reader.executescript(self.SCHEMA)
+
+    def connect(self):
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    # Called from the GUI thread
+    def write_tabs(self, window_id, rows):
+        """Queue rows for one window; tabs of that window not in rows are dropped."""
+        self.queue.put(("write", window_id, rows))
+
+    def remove_window(self, window_id):
+        self.queue.put(("write", window_id, []))
+
+    def flush(self):
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        done.wait()
+
+    def stop(self):
+        if self.isRunning():
+            self.queue.put(("stop",))
+            self.wait()
+
+    def load_tabs(self):
+        # Content stays on disk until a tab actually needs it
+        return self.reader.execute(
+            "SELECT tab_id, file_path, content IS NOT NULL, cursor, scroll FROM tabs ORDER BY window_id, position").fetchall()
+
+    def load_content(self, tab_id):
+        row = self.reader.execute("SELECT content FROM tabs WHERE tab_id = ?", (tab_id,)).fetchone()
+        return row[0] if row else None
+
+    def adopt_tabs(self, window_id):
+        with self.reader:
+            self.reader.execute("UPDATE tabs SET window_id = ?", (window_id,))
+
+    # Writer thread
+    def run(self):
+        connection = self.connect()
+        pending_compaction = False
+        while True:
+            try:
+                item = self.queue.get(timeout=SESSION_COMPACT_IDLE_S)
+            except queue.Empty:
+                if pending_compaction:
+                    self.compact(connection)
+                    pending_compaction = False
+                continue
+            if item[0] == "stop":
+                break
+            if item[0] == "flush":
+                item[1].set()
+                continue
+            try:
+                self.apply_write(connection, *item[1:])
+                pending_compaction = True
+            except sqlite3.Error:
+                pass # A failed journal write must never take the editor down
+        connection.close()
+
+    def apply_write(self, connection, window_id, rows):
+        now = time.time()
+        with connection:
+            for row in rows:
+                if row["content_changed"]:
+                    content = row["snapshot"].text() if row["snapshot"] is not None else None
+                    connection.execute(
+                        "INSERT OR REPLACE INTO tabs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (row["tab_id"], window_id, row["position"], row["file_path"], content,
+                         row["cursor"], row["scroll"], now))
+                else:
+                    connection.execute(
+                        "INSERT INTO tabs (tab_id, window_id, position, file_path, cursor, scroll, updated) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(tab_id) DO UPDATE SET "
+                        "window_id = excluded.window_id, position = excluded.position, file_path = excluded.file_path, "
+                        "cursor = excluded.cursor, scroll = excluded.scroll",
+                        (row["tab_id"], window_id, row["position"], row["file_path"],
+                         row["cursor"], row["scroll"], now))
+            keep = [row["tab_id"] for row in rows]
+            connection.execute(
+                f"DELETE FROM tabs WHERE window_id = ? AND tab_id NOT IN ({','.join('?' * len(keep))})",
+                [window_id] + keep)
+
+    def compact(self, connection):
+        try:
+            connection.execute("PRAGMA incremental_vacuum")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error:
+            pass
+
+
+# --- Lazy Tabs ---
+class TabPlaceholder(QWidget):
+    """Lightweight stand-in for a tab whose editor is created on first activation."""
+    def __init__(self, session_id, file_path, has_content=False, cursor=0, scroll=0, parent=None):
+        super().__init__(parent)
+        self.setProperty("session_id", session_id)
+        self.setProperty("file_path", file_path)
+        self.has_content = has_content # Text lives in the session journal rather than on disk
+        self.cursor = cursor
+        self.scroll = scroll
+
+
+# --- Save Pipeline ---
+def write_atomically(file_path, chunks):
+    """Write chunks to a temp file next to file_path, fsync it and rename it into place."""
+    folder = os.path.dirname(os.path.abspath(file_path))
+    while True:
+        # Not mkstemp, which creates owner-only files: a new file gets the umask's usual permissions
+        temp_path = os.path.join(folder, f".{os.path.basename(file_path)}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable
+        dir_fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SaveSignals(QObject):
+    saved = pyqtSignal()
+    failed = pyqtSignal(str)
+
+
+class SaveTask(QRunnable):
+    """Writes one buffer snapshot to disk on the save thread pool."""
+    def __init__(self, file_path, snapshot):
+        super().__init__()
+        self.file_path = file_path
+        self.snapshot = snapshot
+        self.signals = SaveSignals()
+
+    def run(self):
+        try:
+            write_atomically(self.file_path, self.snapshot.chunks())
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.saved.emit()
+
+
+class ClipboardState(QObject):
+    """Whether the clipboard holds text, cached for the Paste action.
+
+    Reading the clipboard's mime data can be slow (large contents, a remote X
+    server), so it is only read again when the clipboard reports a change.
+    """
+    changed = pyqtSignal()
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls(QApplication.clipboard())
+        return cls._shared
+
+    def __init__(self, clipboard):
+        super().__init__()
+        self.clipboard = clipboard
+        self.has_text = False
+        clipboard.dataChanged.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self):
+        mime_data = self.clipboard.mimeData()
+        self.has_text = bool(mime_data and mime_data.hasText()) # Some platforms report no mime data at all
+        self.changed.emit()
+
+
 # --- Main Notepad Window ---
 class Notepad(QMainWindow):
     def __init__(self, restore=True):
         super().__init__()
         self.last_search = ""
+        self.last_search_options = {"case_sensitive": True, "whole_word": False, "regex": False}
         self.find_dialog = None
         self.replace_dialog = None
+        self.find_in_files_panel = None
+        self.pending_search = None # (editor, text, find_next, backward) waiting for its match index
+        self.search_sources = {} # Find in Files source name -> untitled editor it came from
+        self.pending_lines = {} # editor -> line to show once its file has loaded
         self.is_closing_window = False # Flag to differentiate between close window and exit
+        self.loaders = {} # editor -> FileLoader for tabs still being read from disk
+        self.followers = {} # editor -> FileFollower for tabs in follow mode
+        self.pending_cursors = {} # editor -> restored (cursor, scroll) to apply once loaded
+        self.window_id = uuid.uuid4().hex
+        self.session_store = SessionStore.shared()
+        self.session_dirty = set() # Editors whose content changed since the last journal write
+        self.session_timer = QTimer(self)
+        self.session_timer.setSingleShot(True)
+        self.session_timer.setInterval(SESSION_SAVE_DELAY_MS)
+        self.session_timer.timeout.connect(self.save_session)
+        self.restoring = False # Placeholders are only materialized once restore is done
+        self.active_tab = None
+        self.save_pool = QThreadPool(self)
+        self.save_pool.setMaxThreadCount(SAVE_WORKERS)
+        self.saves_in_flight = {} # editor -> SaveTask being written
+        self.resave = set() # Editors saved again while their previous save was still running
+        self.unload_timer = QTimer(self)
+        self.unload_timer.setInterval(TAB_UNLOAD_CHECK_MS)
+        self.unload_timer.timeout.connect(self.unload_inactive_tabs)
+        # Selection, tab and clipboard changes within one event loop pass share one edit menu update
+        self.edit_menu_timer = QTimer(self)
+        self.edit_menu_timer.setSingleShot(True)
+        self.edit_menu_timer.setInterval(0)
+        self.edit_menu_timer.timeout.connect(self.update_edit_menu)
+        self.edit_menu_state = None # (has selection, clipboard has text, has editor) the actions show
+        ClipboardState.shared().changed.connect(self.schedule_edit_menu_update)
         self.initUI()
         if restore:
             if not self.restore_session():
@@ -214,7 +1865,11 @@ class Notepad(QMainWindow):
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_current_tab_action)
-        self.tab_widget.currentChanged.connect(self.update_edit_menu)
+        self.tab_widget.currentChanged.connect(self.on_current_tab_changed) # First, so later slots see the real editor
+        self.tab_widget.currentChanged.connect(self.schedule_edit_menu_update)
+        self.tab_widget.currentChanged.connect(self.update_load_indicator)
+        self.tab_widget.currentChanged.connect(self.update_follow_action)
+        self.tab_widget.tabBar().tabMoved.connect(self.session_timer.start)
         self.setCentralWidget(self.tab_widget)
 
         self.setup_menus()
@@ -224,6 +1879,27 @@ class Notepad(QMainWindow):
         self.setWindowIcon(QIcon.fromTheme("accessories-text-editor"))
         self.statusBar()
 
+        # Load progress of the current tab, hidden unless it is still loading
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(150)
+        self.load_cancel_button = QPushButton("Cancel")
+        self.load_cancel_button.clicked.connect(lambda: self.cancel_loading(self.current_editor()))
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.statusBar().addPermanentWidget(self.load_cancel_button)
+        self.update_load_indicator()
+        self.update_follow_action()
+
+        # Performance overlay: latency of the last timed operation and the size of the current document
+        self.performance_label = QLabel()
+        self.performance_label.setVisible(False)
+        self.statusBar().addPermanentWidget(self.performance_label)
+        self.performance_timer = QTimer(self)
+        self.performance_timer.setInterval(PROFILE_OVERLAY_INTERVAL_MS)
+        self.performance_timer.timeout.connect(self.update_performance_overlay)
+        self.performance_action.setChecked(QSettings().value("performanceOverlay", False, type=bool)
+                                           or Profiler.shared().forced)
+        self.export_trace_action.setEnabled(Profiler.shared().enabled)
+
     def setup_menus(self):
         menubar = self.menuBar()
         
@@ -252,12 +1928,12 @@ class Notepad(QMainWindow):
 
         save_action = QAction('Save', self)
         save_action.setShortcut('Ctrl+S')
-        save_action.triggered.connect(self.save_file)
+        save_action.triggered.connect(lambda: self.save_file())
         file_menu.addAction(save_action)
 
         save_as_action = QAction('Save As...', self)
         save_as_action.setShortcut('Ctrl+Shift+S')
-        save_as_action.triggered.connect(self.save_as_file)
+        save_as_action.triggered.connect(lambda: self.save_as_file())
         file_menu.addAction(save_as_action)
         
         save_all_action = QAction('Save All', self)
@@ -295,6 +1971,7 @@ class Notepad(QMainWindow):
         self.find_next_action = self.edit_menu.addAction('Find Next', self.find_next, 'F3')
         self.find_prev_action = self.edit_menu.addAction('Find Previous', self.find_prev, 'Shift+F3')
         self.replace_action = self.edit_menu.addAction('Replace...', self.show_replace_dialog, 'Ctrl+H')
+        self.find_in_files_action = self.edit_menu.addAction('Find in Files...', self.show_find_in_files, 'Ctrl+Shift+F')
         self.edit_menu.addSeparator()
         self.go_to_action = self.edit_menu.addAction('Go To...', self.go_to_line, 'Ctrl+G')
         self.select_all_action = self.edit_menu.addAction('Select All', self.select_all, 'Ctrl+A')
@@ -311,29 +1988,112 @@ class Notepad(QMainWindow):
         view_menu.addAction('Default Zoom', self.default_zoom, 'Ctrl+0')
         view_menu.addSeparator()
         view_menu.addAction('Restore Default Zoom', self.default_zoom) # Duplicate of Default Zoom, as requested
+        view_menu.addSeparator()
+        self.unload_tabs_action = view_menu.addAction('Unload Inactive Tabs')
+        self.unload_tabs_action.setCheckable(True)
+        self.unload_tabs_action.toggled.connect(self.set_unload_inactive_tabs)
+        self.unload_tabs_action.setChecked(QSettings().value("unloadInactiveTabs", True, type=bool))
+        self.follow_action = view_menu.addAction('Follow File')
+        self.follow_action.setShortcut('Ctrl+Shift+L')
+        self.follow_action.setCheckable(True)
+        self.follow_action.triggered.connect(lambda checked: self.set_following(self.current_editor(), checked))
+        view_menu.addSeparator()
+        self.performance_action = view_menu.addAction('Performance Overlay')
+        self.performance_action.setCheckable(True)
+        self.performance_action.toggled.connect(self.set_performance_overlay)
+        # Only a choice made in the menu is remembered, not one forced by the environment
+        self.performance_action.triggered.connect(lambda checked: QSettings().setValue("performanceOverlay", checked))
+        self.export_trace_action = view_menu.addAction('Export Performance Trace...', self.export_performance_trace)
+
+    def set_performance_overlay(self, enabled):
+        profiler = Profiler.shared()
+        profiler.set_enabled(self, enabled)
+        self.performance_label.setVisible(enabled)
+        self.export_trace_action.setEnabled(profiler.enabled)
+        if enabled:
+            self.update_performance_overlay()
+            self.performance_timer.start()
+        else:
+            self.performance_timer.stop()
+
+    def update_performance_overlay(self):
+        parts = []
+        if Profiler.shared().last:
+            name, ms = Profiler.shared().last
+            parts.append(f"{name}: {ms:.1f} ms")
+        editor = self.current_editor()
+        if editor:
+            document = editor.document()
+            parts.append(f"{document.blockCount():,} blocks")
+            if isinstance(editor, LargeFileView):
+                parts.append(f"{editor.mapped.size / 1024 ** 2:.1f} MB mapped")
+            else:
+                # The document keeps UTF-16 text and the buffer mirrors it as Python strings
+                parts.append(f"~{(document.characterCount() * 2 + len(editor.buffer)) / 1024 ** 2:.1f} MB text")
+        memory = process_memory()
+        if memory:
+            parts.append(f"{memory / 1024 ** 2:.0f} MB process")
+        self.performance_label.setText(" | ".join(parts))
+
+    def export_performance_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Performance Trace", "notepad-trace.json",
+                                                   "Chrome Trace (*.json);;All Files (*)")
+        if not file_path:
+            return
+        try:
+            Profiler.shared().export(file_path)
+            self.statusBar().showMessage(f"Trace saved to {os.path.basename(file_path)}", 3000)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not save trace: {e}")
 
+    def schedule_edit_menu_update(self):
+        # Restarting a pending timer would push the update back another pass
+        if not self.edit_menu_timer.isActive():
+            self.edit_menu_timer.start()
+
+    @timed("update_edit_menu", show=False) # Runs on every selection change, so it would hide everything else
     def update_edit_menu(self):
+        self.edit_menu_timer.stop() # Called directly, so a pending coalesced update is not needed
         editor = self.current_editor()
-        has_selection = bool(editor and editor.textCursor().hasSelection())
-        self.cut_action.setEnabled(has_selection)
-        self.copy_action.setEnabled(has_selection)
-        self.delete_action.setEnabled(has_selection)
-        self.paste_action.setEnabled(QApplication.clipboard().mimeData().hasText())
-        self.go_to_action.setEnabled(bool(editor))
-        self.select_all_action.setEnabled(bool(editor))
-        self.time_date_action.setEnabled(bool(editor))
-        self.font_action.setEnabled(bool(editor))
+        state = (bool(editor and editor.textCursor().hasSelection()), ClipboardState.shared().has_text, bool(editor))
+        previous = self.edit_menu_state or (None, None, None)
+        self.edit_menu_state = state
+        has_selection, has_text, has_editor = state
+        # Only actions whose state changed are touched
+        if has_selection != previous[0]:
+            self.cut_action.setEnabled(has_selection)
+            self.copy_action.setEnabled(has_selection)
+            self.delete_action.setEnabled(has_selection)
+        if has_text != previous[1]:
+            self.paste_action.setEnabled(has_text)
+        if has_editor != previous[2]:
+            self.go_to_action.setEnabled(has_editor)
+            self.select_all_action.setEnabled(has_editor)
+            self.time_date_action.setEnabled(has_editor)
+            self.font_action.setEnabled(has_editor)
 
     def current_editor(self):
-        return self.tab_widget.currentWidget()
-
-    def new_tab(self, file_path=None, content=''):
-        editor = QTextEdit()
-        editor.setAcceptRichText(False)
-        editor.setText(content)
-        editor.copyAvailable.connect(self.update_edit_menu)
+        editor = self.tab_widget.currentWidget()
+        return None if isinstance(editor, TabPlaceholder) else editor
+
+    def new_tab(self, file_path=None, content='', index=None):
+        editor = TextEditor(content)
+        return self.add_editor_tab(editor, file_path, index)
+
+    def add_editor_tab(self, editor, file_path=None, index=None):
+        editor.copyAvailable.connect(self.schedule_edit_menu_update)
+        editor.setProperty("session_id", uuid.uuid4().hex)
+        if isinstance(editor, TextEditor):
+            editor.match_index.changed.connect(lambda: self.complete_pending_search(editor))
+            editor.document().contentsChanged.connect(lambda: self.mark_session_dirty(editor))
+            editor.document().modificationChanged.connect(lambda: self.mark_session_dirty(editor))
+            self.mark_session_dirty(editor)
         
-        index = self.tab_widget.addTab(editor, "Untitled")
+        editor.setProperty("last_active", time.monotonic())
+        if index is None:
+            index = self.tab_widget.addTab(editor, "Untitled")
+        else:
+            index = self.tab_widget.insertTab(index, editor, "Untitled")
         self.tab_widget.setCurrentIndex(index)
         
         if file_path:
@@ -345,8 +2105,16 @@ class Notepad(QMainWindow):
     def set_tab_file_path(self, index, file_path):
         editor = self.tab_widget.widget(index)
         editor.setProperty("file_path", file_path)
+        if isinstance(editor, TextEditor):
+            self.stop_following(editor)
+            editor.file_position = None
+            if editor.property("follow_diverged"):
+                editor.setProperty("follow_diverged", False)
+                editor.setReadOnly(False) # Saved under a new name, so it is that file's text now
+            editor.highlighter.set_rules(highlight_rules_for(file_path))
         self.tab_widget.setTabText(index, os.path.basename(file_path))
         self.add_to_recent_files(file_path)
+        self.update_follow_action()
 
     def new_window(self):
         # The logic in __main__ handles creating new windows
@@ -356,50 +2124,280 @@ class Notepad(QMainWindow):
         if not file_path:
             options = QFileDialog.Options()
             file_path, _ = QFileDialog.getOpenFileName(self, "Open File", "",
-                                                       "Text Files (*.txt *.md);;All Files (*)", options=options)
+                                                       "Text Files (*.txt *.md *.json *.log);;All Files (*)", options=options)
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                for i in range(self.tab_widget.count()):
-                    if self.tab_widget.widget(i).property("file_path") == file_path:
-                        self.tab_widget.setCurrentIndex(i)
+                with Profiler.shared().span("open_file"):
+                    for i in range(self.tab_widget.count()):
+                        if self.tab_widget.widget(i).property("file_path") == file_path:
+                            self.tab_widget.setCurrentIndex(i)
+                            return
+
+                    if os.path.getsize(file_path) >= LARGE_FILE_THRESHOLD:
+                        self.open_large_file(file_path)
                         return
 
-                editor = self.current_editor()
-                if editor and not editor.toPlainText() and not editor.property("file_path"):
-                     editor.setText(content)
-                     self.set_tab_file_path(self.tab_widget.currentIndex(), file_path)
-                else:
-                    self.new_tab(file_path=file_path, content=content)
+                    editor = self.current_editor()
+                    if editor and editor.document().isEmpty() and not editor.property("file_path"):
+                         self.set_tab_file_path(self.tab_widget.currentIndex(), file_path)
+                    else:
+                        editor = self.new_tab(file_path=file_path)
+                    self.load_file(editor, file_path)
                 
-                self.add_to_recent_files(file_path)
+                    self.add_to_recent_files(file_path)
 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Could not open file: {e}")
 
-    def save_file(self, index=None):
+    def load_file(self, editor, file_path):
+        # The tab is usable right away; text is appended as the loader streams it in
+        editor.setReadOnly(True)
+        editor.document().setUndoRedoEnabled(False)
+        loader = FileLoader(file_path, self)
+        loader.chunk_loaded.connect(lambda text: self.append_loaded_text(editor, text))
+        loader.progress.connect(lambda percent: self.update_load_progress(editor, percent))
+        loader.failed.connect(lambda message: self.loading_failed(editor, message))
+        loader.finished.connect(lambda: self.loading_finished(editor))
+        self.loaders[editor] = loader
+        Profiler.shared().begin(("load", editor))
+        loader.start()
+        self.update_load_indicator()
+
+    def append_loaded_text(self, editor, text):
+        if editor not in self.loaders:
+            return # Cancelled, drop chunks still queued from the worker
+        cursor = QTextCursor(editor.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        editor.document().setModified(False)
+
+    def update_load_progress(self, editor, percent):
+        index = self.tab_widget.indexOf(editor)
+        if index != -1 and editor in self.loaders:
+            self.tab_widget.setTabText(index, f"{os.path.basename(editor.property('file_path'))} ({percent}%)")
+        if editor is self.current_editor():
+            self.load_progress.setValue(percent)
+
+    def loading_finished(self, editor):
+        loader = self.loaders.pop(editor, None)
+        if loader is None:
+            return
+        loader.deleteLater()
+        Profiler.shared().end(("load", editor), "open_file (load)", characters=len(editor.buffer))
+        editor.file_position = loader.position
+        editor.document().setUndoRedoEnabled(True)
+        editor.document().setModified(False)
+        editor.setReadOnly(False)
+        editor.moveCursor(QTextCursor.Start)
+        index = self.tab_widget.indexOf(editor)
+        if index != -1:
+            self.tab_widget.setTabText(index, os.path.basename(editor.property("file_path")))
+        if editor in self.pending_cursors:
+            self.restore_view(editor, *self.pending_cursors.pop(editor))
+        if editor in self.pending_lines:
+            self.show_line(editor, self.pending_lines.pop(editor))
+        self.update_load_indicator()
+        self.update_follow_action()
+
+    def loading_failed(self, editor, message):
+        self.cancel_loading(editor)
+        QMessageBox.critical(self, "Error", f"Could not open file: {message}")
+
+    def stop_loader(self, editor):
+        loader = self.loaders.pop(editor, None)
+        self.pending_lines.pop(editor, None)
+        self.pending_cursors.pop(editor, None)
+        Profiler.shared().discard(("load", editor))
+        if loader is None:
+            return False
+        loader.requestInterruption()
+        loader.wait()
+        loader.deleteLater()
+        return True
+
+    def cancel_loading(self, editor):
+        if not self.stop_loader(editor):
+            return
+        # A partially read document must not be saved over the original file
+        index = self.tab_widget.indexOf(editor)
+        if index != -1:
+            self.tab_widget.removeTab(index)
+        if self.tab_widget.count() == 0:
+            self.new_tab()
+        self.update_load_indicator()
+
+    def update_load_indicator(self):
+        loader = self.loaders.get(self.current_editor())
+        self.load_progress.setVisible(loader is not None)
+        self.load_cancel_button.setVisible(loader is not None)
+        if loader is None:
+            self.load_progress.setValue(0)
+
+    def set_following(self, editor, enabled):
+        if not enabled:
+            self.stop_following(editor)
+        elif (editor not in self.followers and isinstance(editor, TextEditor) and editor.property("file_path")
+              and editor not in self.loaders):
+            file_path = editor.property("file_path")
+            if editor.document().isModified():
+                QMessageBox.information(self, "Follow File", "Save or undo your changes before following the file.")
+            else:
+                try:
+                    follower = FileFollower(file_path, editor.file_position, self)
+                except OSError as e:
+                    QMessageBox.critical(self, "Error", f"Could not follow file: {e}")
+                else:
+                    name = os.path.basename(file_path)
+                    follower.appended.connect(lambda text: self.append_followed_text(editor, text))
+                    follower.restarted.connect(lambda reason: self.statusBar().showMessage(
+                        f"{name} was {reason}, following it from the start", 5000))
+                    follower.failed.connect(lambda message: self.follow_failed(editor, message))
+                    self.followers[editor] = follower
+                    document = editor.document()
+                    if follower.diverged or document.blockCount() > FOLLOW_MAX_LINES:
+                        follower.diverged = True
+                        self.statusBar().showMessage(f"{name} changed since it was loaded, following it from the start", 5000)
+                    # The tab mirrors the end of the file: no edits, no undo history, and a capped line count
+                    editor.setReadOnly(True)
+                    document.setUndoRedoEnabled(False)
+                    document.setMaximumBlockCount(FOLLOW_MAX_LINES)
+                    editor.moveCursor(QTextCursor.End)
+                    self.tab_widget.setTabText(self.tab_widget.indexOf(editor), f"{name} (following)")
+        self.update_follow_action()
+
+    @timed("follow_append", show=False)
+    def append_followed_text(self, editor, text):
+        follower = self.followers.get(editor)
+        if follower is None:
+            return # Stopped, drop text still queued from the follower
+        document = editor.document()
+        if document.blockCount() + text.count('\n') > FOLLOW_MAX_LINES:
+            follower.diverged = True # The oldest lines are about to be dropped
+        scroll_bar = editor.verticalScrollBar()
+        at_end = scroll_bar.value() == scroll_bar.maximum() # Only keep up with the end while it is in view
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        document.setModified(False)
+        if at_end:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def follow_failed(self, editor, message):
+        self.stop_following(editor)
+        self.statusBar().showMessage(f"Stopped following: {message}", 5000)
+
+    def stop_following(self, editor):
+        follower = self.followers.pop(editor, None)
+        if follower is None:
+            return
+        try:
+            editor.file_position = follower.position()
+        except OSError:
+            editor.file_position = None
+        follower.close()
+        follower.deleteLater()
+        document = editor.document()
+        document.setMaximumBlockCount(0)
+        document.setUndoRedoEnabled(True)
+        if follower.diverged or editor.property("follow_diverged"):
+            # Saving the tab now would replace the file with only the part that was kept
+            editor.setProperty("follow_diverged", True)
+            self.statusBar().showMessage("The tab no longer matches the file; close and reopen it to edit", 5000)
+        else:
+            editor.setReadOnly(False)
+        index = self.tab_widget.indexOf(editor)
+        if index != -1:
+            self.tab_widget.setTabText(index, os.path.basename(editor.property("file_path")))
+        self.update_follow_action()
+
+    def update_follow_action(self):
+        editor = self.current_editor()
+        self.follow_action.setEnabled(isinstance(editor, TextEditor) and bool(editor.property("file_path"))
+                                      and editor not in self.loaders)
+        self.follow_action.setChecked(editor in self.followers)
+
+    def open_large_file(self, file_path, index=None):
+        # Replace a pristine "Untitled" tab, like open_file does for small files
+        editor = self.current_editor()
+        if index is None and editor and editor.document().isEmpty() and not editor.property("file_path") \
+                and not editor.document().isModified():
+            self.tab_widget.removeTab(self.tab_widget.currentIndex())
+
+        view = LargeFileView(file_path)
+        view.indexer.progress.connect(
+            lambda lines: self.statusBar().showMessage(f"Indexing {os.path.basename(file_path)}: {lines:,} lines"))
+        view.indexer.finished.connect(
+            lambda: self.statusBar().showMessage(f"{os.path.basename(file_path)}: {view.line_count():,} lines (read-only)", 5000))
+        self.add_editor_tab(view, file_path, index)
+        self.add_to_recent_files(file_path)
+        return view
+
+    def save_file(self, index=None, wait=False):
         if index is None:
             index = self.tab_widget.currentIndex()
         editor = self.tab_widget.widget(index)
         if not editor: return False
             
+        if isinstance(editor, (LargeFileView, TabPlaceholder)):
+            return True # Paged views are read-only and placeholders unchanged; the file on disk is current
+        if editor in self.followers or editor.property("follow_diverged"):
+            return True # Followed tabs only hold the end of the file, which is on disk already
+
         file_path = editor.property("file_path")
         if file_path is None:
-            return self.save_as_file(index)
-        else:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(editor.toPlainText())
-                editor.document().setModified(False)
-                self.add_to_recent_files(file_path)
+            return self.save_as_file(index, wait)
+        with Profiler.shared().span("save_file"):
+            if wait:
+                if editor in self.saves_in_flight:
+                    self.save_pool.waitForDone()
+                try:
+                    write_atomically(file_path, editor.buffer.chunks())
+                    editor.document().setModified(False)
+                    self.add_to_recent_files(file_path)
+                    return True
+                except Exception as e:
+                    QMessageBox.critical(self, "Error", f"Could not save file: {e}")
+                    return False
+
+            if editor in self.saves_in_flight:
+                self.resave.add(editor) # Written again with the latest text once this one lands
                 return True
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not save file: {e}")
-                return False
+            # The snapshot is O(1) and immutable, so editing can continue while it is written
+            task = SaveTask(file_path, editor.buffer.snapshot())
+            revision = editor.document().revision()
+            task.signals.saved.connect(lambda: self.save_finished(editor, file_path, revision))
+            task.signals.failed.connect(lambda message: self.save_failed(editor, file_path, message))
+            self.saves_in_flight[editor] = task
+            Profiler.shared().begin(("save", editor))
+            self.statusBar().showMessage(f"Saving {os.path.basename(file_path)}...")
+            self.save_pool.start(task)
+            return True
 
-    def save_as_file(self, index=None):
+    def save_finished(self, editor, file_path, revision):
+        self.saves_in_flight.pop(editor, None)
+        Profiler.shared().end(("save", editor), "save_file (write)", characters=len(editor.buffer))
+        if editor.document().revision() == revision and editor.property("file_path") == file_path:
+            editor.document().setModified(False)
+            editor.file_position = None # Rewritten as a new file; follow mode starts from its end
+        self.add_to_recent_files(file_path)
+        self.statusBar().showMessage(f"Saved {os.path.basename(file_path)}", 3000)
+        self.save_next(editor)
+
+    def save_failed(self, editor, file_path, message):
+        self.saves_in_flight.pop(editor, None)
+        Profiler.shared().discard(("save", editor))
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Error", f"Could not save file: {message}")
+        self.save_next(editor)
+
+    def save_next(self, editor):
+        if editor in self.resave:
+            self.resave.discard(editor)
+            index = self.tab_widget.indexOf(editor)
+            if index != -1:
+                self.save_file(index)
+
+    def save_as_file(self, index=None, wait=False):
         if index is None:
             index = self.tab_widget.currentIndex()
         editor = self.tab_widget.widget(index)
@@ -407,16 +2405,23 @@ class Notepad(QMainWindow):
 
         options = QFileDialog.Options()
         file_path, _ = QFileDialog.getSaveFileName(self, "Save File As", "",
-                                                   "Text Files (*.txt *.md);;All Files (*)", options=options)
+                                                   "Text Files (*.txt *.md *.json *.log);;All Files (*)", options=options)
+        if file_path and isinstance(editor, LargeFileView):
+            try:
+                shutil.copyfile(editor.mapped.file_path, file_path)
+                self.add_to_recent_files(file_path)
+                return True
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Could not save file: {e}")
+                return False
         if file_path:
             self.set_tab_file_path(index, file_path)
-            return self.save_file(index)
+            return self.save_file(index, wait)
         return False
         
     def save_all_files(self):
         for i in range(self.tab_widget.count()):
-            editor = self.tab_widget.widget(i)
-            if editor.document().isModified():
+            if self.is_modified(self.tab_widget.widget(i)):
                 self.save_file(i)
 
     def close_current_tab_action(self):
@@ -424,8 +2429,16 @@ class Notepad(QMainWindow):
 
     def close_tab(self, index):
         editor = self.tab_widget.widget(index)
+        self.stop_loader(editor)
         if self.maybe_save(editor):
             self.tab_widget.removeTab(index)
+            self.stop_following(editor)
+            self.session_dirty.discard(editor)
+            self.session_timer.start()
+            if isinstance(editor, LargeFileView):
+                editor.release()
+            if isinstance(editor, TabPlaceholder):
+                editor.deleteLater()
             if self.tab_widget.count() == 0:
                 self.close() # Close window if last tab is closed
         else:
@@ -436,8 +2449,11 @@ class Notepad(QMainWindow):
         self.is_closing_window = True
         self.close()
 
+    def is_modified(self, editor):
+        return isinstance(editor, TextEditor) and editor.document().isModified()
+
     def maybe_save(self, editor):
-        if not editor or not editor.document().isModified():
+        if not editor or not self.is_modified(editor):
             return True
         
         file_name = self.tab_widget.tabText(self.tab_widget.indexOf(editor))
@@ -446,7 +2462,7 @@ class Notepad(QMainWindow):
                                      QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel)
 
         if ret == QMessageBox.Save:
-            return self.save_file(self.tab_widget.indexOf(editor))
+            return self.save_file(self.tab_widget.indexOf(editor), wait=True)
         elif ret == QMessageBox.Cancel:
             return False
         return True
@@ -467,11 +2483,25 @@ class Notepad(QMainWindow):
         editor = self.current_editor()
         if not editor: return
 
+        if isinstance(editor, LargeFileView):
+            line_number, ok = QInputDialog.getInt(self, "Go To Line", "Line number:",
+                                                  editor.first_line + 1, 1, max(1, editor.line_count()), 1)
+            if ok:
+                editor.scroll_to_line(line_number - 1)
+            return
+
         line_number, ok = QInputDialog.getInt(self, "Go To Line", "Line number:",
                                               editor.textCursor().blockNumber() + 1, 1, editor.document().blockCount(), 1)
         if ok:
-            cursor = QTextCursor(editor.document().findBlockByLineNumber(line_number - 1))
-            editor.setTextCursor(cursor)
+            self.show_line(editor, line_number)
+
+    def show_line(self, editor, line_number):
+        if isinstance(editor, LargeFileView):
+            editor.scroll_to_line(line_number - 1)
+            return
+        cursor = QTextCursor(editor.document().findBlockByNumber(line_number - 1))
+        editor.setTextCursor(cursor)
+        editor.centerCursor()
 
     def select_all(self):
         editor = self.current_editor()
@@ -510,41 +2540,86 @@ class Notepad(QMainWindow):
         self.find_dialog.show()
         self.find_dialog.activateWindow()
 
-    def find_text(self, text, find_next=False, backward=False):
+    @timed("find_text")
+    def find_text(self, text, find_next=False, backward=False, options=None):
         self.last_search = text
+        if options is not None:
+            self.last_search_options = options
         editor = self.current_editor()
-        if not editor: return
+        if not editor: return False
 
-        flags = QTextDocument.FindFlags()
-        flags |= QTextDocument.FindCaseSensitively # Make it case-sensitive
+        if not isinstance(editor, TextEditor):
+            return self.find_in_view(editor, text, backward)
 
-        if backward:
-            flags |= QTextDocument.FindBackward
+        try:
+            pattern = compile_search_pattern(text, **self.last_search_options)
+        except re.error as e:
+            self.show_search_status(f"Invalid pattern: {e}")
+            return False
 
-        # Store original cursor position for wrap-around logic
-        original_cursor = editor.textCursor()
-        
-        # If it's the first search (not find_next), start from the beginning
-        if not find_next:
-            cursor = editor.textCursor()
-            cursor.movePosition(QTextCursor.Start)
-            editor.setTextCursor(cursor)
+        index = editor.match_index
+        index.set_pattern(pattern, 0 if self.last_search_options["regex"] else len(text))
+        index.set_highlighting(bool(self.find_dialog and self.find_dialog.isVisible()))
+        if not index.is_ready():
+            # The first scan runs in the background; the match is selected once its results arrive
+            self.pending_search = (editor, text, find_next, backward)
+            self.show_search_status("Searching...")
+            return True
+        self.pending_search = None
+        return self.select_match(editor, text, find_next, backward)
+
+    def complete_pending_search(self, editor):
+        if self.pending_search is None or self.pending_search[0] is not editor or not editor.match_index.is_ready():
+            return
+        _, text, find_next, backward = self.pending_search
+        self.pending_search = None
+        if editor is self.current_editor():
+            self.select_match(editor, text, find_next, backward)
+
+    def select_match(self, editor, text, find_next, backward):
+        index = editor.match_index
+        cursor = editor.textCursor()
+        position = cursor.selectionStart()
+        if find_next and not backward and cursor.hasSelection():
+            position += 1 # Step past the current match
+        match, wrapped = index.find_from(position, backward)
+        if match is None:
+            self.show_search_status(f"Cannot find '{text}'")
+            return False
 
+        cursor.setPosition(index.starts[match])
+        cursor.setPosition(index.ends[match], QTextCursor.KeepAnchor)
+        editor.setTextCursor(cursor)
+
+        status = f"{match + 1} of {len(index.starts)}"
+        if wrapped and find_next:
+            status += f" (continued from {'beginning' if not backward else 'end'})"
+        self.show_search_status(status)
+        return True
+
+    def find_in_view(self, editor, text, backward):
+        # Paged views only hold the visible lines, so search just that window
+        flags = QTextDocument.FindFlags()
+        if self.last_search_options["case_sensitive"]:
+            flags |= QTextDocument.FindCaseSensitively
+        if self.last_search_options["whole_word"]:
+            flags |= QTextDocument.FindWholeWords
+        if backward:
+            flags |= QTextDocument.FindBackward
         found = editor.find(text, flags)
+        self.show_search_status("" if found else f"Cannot find '{text}' in the visible lines")
+        return found
 
-        if not found:
-            # If not found, try wrapping around
-            # Move cursor to beginning/end based on search direction
-            cursor = editor.textCursor()
-            cursor.movePosition(QTextCursor.Start if not backward else QTextCursor.End)
-            editor.setTextCursor(cursor)
-            
-            found = editor.find(text, flags)
-            
-            if found:
-                QMessageBox.information(self, "Find", f"Reached {'end' if not backward else 'beginning'} of document. Continuing from {'beginning' if not backward else 'end'}.")
-            else:
-                QMessageBox.information(self, "Find", f"Cannot find '{text}'")
+    def show_search_status(self, message):
+        self.statusBar().showMessage(message, 5000)
+        if self.find_dialog:
+            self.find_dialog.match_label.setText(message)
+
+    def clear_search_highlights(self):
+        for i in range(self.tab_widget.count()):
+            editor = self.tab_widget.widget(i)
+            if isinstance(editor, TextEditor):
+                editor.match_index.clear()
 
     def find_next(self):
         if self.last_search:
@@ -554,6 +2629,50 @@ class Notepad(QMainWindow):
         if self.last_search:
             self.find_text(self.last_search, find_next=True, backward=True)
 
+    # --- Find in Files ---
+    def show_find_in_files(self):
+        if not self.find_in_files_panel:
+            self.find_in_files_panel = FindInFilesPanel(self)
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.find_in_files_panel)
+        self.find_in_files_panel.show()
+        self.find_in_files_panel.find_input.setFocus()
+
+    def open_tab_snapshots(self):
+        # Loaded tabs are searched from memory, including unsaved edits
+        snapshots = {}
+        self.search_sources = {}
+        for i in range(self.tab_widget.count()):
+            editor = self.tab_widget.widget(i)
+            if editor in self.loaders:
+                continue
+            file_path = editor.property("file_path")
+            source = os.path.abspath(file_path) if file_path else f"{self.tab_widget.tabText(i)} (tab {i + 1})"
+            if isinstance(editor, TabPlaceholder) and editor.has_content:
+                snapshots[source] = PieceTable(self.session_store.load_content(editor.property("session_id")) or '')
+            elif isinstance(editor, (LargeFileView, TabPlaceholder)):
+                snapshots[source] = None # Searched from disk
+            else:
+                snapshots[source] = editor.buffer.snapshot()
+            if not file_path:
+                self.search_sources[source] = editor
+        return snapshots
+
+    def open_search_result(self, source, line):
+        editor = self.search_sources.get(source)
+        if editor is not None and self.tab_widget.indexOf(editor) != -1:
+            self.tab_widget.setCurrentWidget(editor)
+            editor = self.current_editor() # A placeholder is replaced when activated
+        else:
+            self.open_file(source)
+            editor = self.current_editor()
+            if editor is None or os.path.abspath(editor.property("file_path") or '') != source:
+                return
+        if editor in self.loaders:
+            self.pending_lines[editor] = line
+        else:
+            self.show_line(editor, line)
+        editor.setFocus()
+
     # --- Replace Functionality ---
     def show_replace_dialog(self):
         if not self.replace_dialog:
@@ -561,39 +2680,78 @@ class Notepad(QMainWindow):
         self.replace_dialog.show()
         self.replace_dialog.activateWindow()
 
-    def replace_text(self, find_text, replace_text):
+    def replace_text(self, find_text, replace_text, options=None):
         editor = self.current_editor()
-        if not editor: return
+        if not editor or editor.isReadOnly(): return
+        if options is not None:
+            self.last_search_options = options
+
+        try:
+            pattern = compile_search_pattern(find_text, **self.last_search_options)
+        except re.error as e:
+            self.show_search_status(f"Invalid pattern: {e}")
+            return
 
         cursor = editor.textCursor()
-        if cursor.hasSelection() and cursor.selectedText() == find_text:
-            cursor.insertText(replace_text)
+        match = pattern.fullmatch(cursor.selectedText().replace('\u2029', '\n')) if cursor.hasSelection() else None
+        if match:
+            cursor.insertText(match.expand(replace_text) if self.last_search_options["regex"] else replace_text)
             editor.setTextCursor(cursor)
         else:
             self.find_text(find_text) # Find the next occurrence
 
-    def replace_all_text(self, find_text, replace_text):
+    def replace_all_text(self, find_text, replace_text, dry_run=False, options=None):
         editor = self.current_editor()
-        if not editor: return
+        if not editor or editor.isReadOnly(): return
+        if options is not None:
+            self.last_search_options = options
 
-        editor.blockSignals(True) # Prevent signals during mass replacement
-        cursor = editor.textCursor()
-        
-        # Move to the beginning of the document
-        cursor.movePosition(QTextCursor.Start)
-        editor.setTextCursor(cursor)
-
-        replacements = 0
-        flags = QTextDocument.FindFlags()
-        flags |= QTextDocument.FindCaseSensitively # Ensure case-sensitive search
-        
-        while editor.find(find_text, flags):
+        started = time.perf_counter()
+        text = editor.buffer.text()
+        try:
+            pattern = compile_search_pattern(find_text, **self.last_search_options)
+        except re.error as e:
+            self.show_search_status(f"Invalid pattern: {e}")
+            return
+        spans = plan_replacements(text, pattern, replace_text, self.last_search_options["regex"])
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if dry_run:
+            lines = []
+            line, line_pos = 1, 0
+            for start, end, new_text in spans[:REPLACE_PREVIEW_LIMIT]:
+                line += text.count('\n', line_pos, start)
+                line_pos = start
+                lines.append(f"Line {line}: {text[start:end]!r} -> {new_text!r}")
+            if len(spans) > REPLACE_PREVIEW_LIMIT:
+                lines.append(f"... and {len(spans) - REPLACE_PREVIEW_LIMIT} more")
+            Profiler.shared().record("replace_all_text (preview)", started, matches=len(spans))
+            QMessageBox.information(self, "Replace All Preview",
+                                    f"{len(spans)} occurrences would be replaced (scanned in {elapsed_ms:.0f} ms).\n\n" + "\n".join(lines))
+            return len(spans)
+
+        if spans:
+            # Splice the whole affected range in one edit: one undo step, one relayout
+            first, last = spans[0][0], spans[-1][1]
+            parts = []
+            pos = first
+            for start, end, new_text in spans:
+                parts.append(text[pos:start])
+                parts.append(new_text)
+                pos = end
+            editor.setUpdatesEnabled(False)
             cursor = editor.textCursor()
-            cursor.insertText(replace_text)
-            replacements += 1
-        
-        editor.blockSignals(False)
-        QMessageBox.information(self, "Replace All", f"Replaced {replacements} occurrences.")
+            cursor.beginEditBlock()
+            cursor.setPosition(first)
+            cursor.setPosition(last, QTextCursor.KeepAnchor)
+            cursor.insertText(''.join(parts))
+            cursor.endEditBlock()
+            editor.setUpdatesEnabled(True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        Profiler.shared().record("replace_all_text", started, matches=len(spans)) # Before the dialog waits on the user
+
+        QMessageBox.information(self, "Replace All", f"Replaced {len(spans)} occurrences in {elapsed_ms:.0f} ms.")
+        return len(spans)
 
     # --- Recent Files ---
     def get_recent_files(self):
@@ -633,21 +2791,49 @@ class Notepad(QMainWindow):
         self.update_recent_files_menu()
 
     # --- Session Management ---
+    def mark_session_dirty(self, editor):
+        if editor in self.followers:
+            return # Its text never goes into the journal, and steady appends would keep pushing the write back
+        self.session_dirty.add(editor)
+        self.session_timer.start()
+
     def save_session(self):
-        session_data = []
+        # Only tabs whose text changed carry a snapshot; the rest update position/cursor only
+        rows = []
         for i in range(self.tab_widget.count()):
             editor = self.tab_widget.widget(i)
             file_path = editor.property("file_path")
-            # Save unsaved content only if it's not empty
-            if not file_path and editor.toPlainText():
-                 session_data.append({"file_path": None, "content": editor.toPlainText()})
-            elif file_path:
-                 session_data.append({"file_path": file_path})
-
-        settings = QSettings()
-        settings.setValue("session", json.dumps(session_data))
-        settings.setValue("geometry", self.saveGeometry())
+            if isinstance(editor, TabPlaceholder):
+                # Not loaded, so whatever the journal holds for it is still current
+                rows.append({"tab_id": editor.property("session_id"), "position": i, "file_path": file_path,
+                             "content_changed": False, "snapshot": None,
+                             "cursor": editor.cursor, "scroll": editor.scroll})
+                continue
+            is_text = isinstance(editor, TextEditor) and editor not in self.loaders
+            # Unsaved content is kept for untitled tabs and for modified files, for crash recovery
+            keep_content = is_text and (editor.document().isModified() if file_path else len(editor.buffer) > 0)
+            if not file_path and not keep_content:
+                continue # Empty untitled tabs are not worth restoring
+            content_changed = editor in self.session_dirty
+            rows.append({
+                "tab_id": editor.property("session_id"),
+                "position": i,
+                "file_path": file_path,
+                "content_changed": content_changed,
+                "snapshot": editor.buffer.snapshot() if content_changed and keep_content else None,
+                "cursor": editor.textCursor().position() if is_text else 0,
+                "scroll": editor.verticalScrollBar().value() if is_text else 0,
+            })
+        self.session_dirty.clear()
+        self.session_store.write_tabs(self.window_id, rows)
+
+    def restore_view(self, editor, cursor_position, scroll):
+        cursor = editor.textCursor()
+        cursor.setPosition(min(cursor_position, len(editor.buffer)))
+        editor.setTextCursor(cursor)
+        editor.verticalScrollBar().setValue(scroll)
 
+    @timed("restore_session")
     def restore_session(self):
         settings = QSettings()
         
@@ -656,27 +2842,134 @@ class Notepad(QMainWindow):
         if geometry:
             self.restoreGeometry(geometry)
 
+        restored = self.restore_legacy_session(settings)
+
+        # Tabs come back as placeholders; only the current one is loaded now
+        tabs = self.session_store.load_tabs()
+        self.session_store.adopt_tabs(self.window_id)
+        self.restoring = True
+        for tab_id, file_path, has_content, cursor, scroll in tabs:
+            if not file_path and not has_content:
+                continue
+            placeholder = TabPlaceholder(tab_id, file_path, bool(has_content), cursor, scroll)
+            placeholder.setProperty("last_active", time.monotonic())
+            index = self.tab_widget.addTab(placeholder, os.path.basename(file_path) if file_path else "Untitled")
+            self.tab_widget.setCurrentIndex(index)
+            restored = True
+        self.restoring = False
+        self.on_current_tab_changed(self.tab_widget.currentIndex())
+        return restored
+
+    # --- Lazy Tabs ---
+    def on_current_tab_changed(self, index):
+        if self.active_tab is not None:
+            self.active_tab.setProperty("last_active", time.monotonic())
+        if not self.restoring and isinstance(self.tab_widget.widget(index), TabPlaceholder):
+            self.materialize_tab(index)
+        self.active_tab = self.tab_widget.currentWidget()
+
+    def materialize_tab(self, index):
+        placeholder = self.tab_widget.widget(index)
+        file_path = placeholder.property("file_path")
+        editor = None
+        # Swap the widget silently so the tab switch isn't seen as another change
+        self.tab_widget.blockSignals(True)
+        try:
+            self.tab_widget.removeTab(index)
+            if placeholder.has_content:
+                content = self.session_store.load_content(placeholder.property("session_id")) or ''
+                editor = self.new_tab(file_path, content=content, index=index)
+                editor.document().setModified(bool(file_path)) # Recovered edits to a file are unsaved
+                self.restore_view(editor, placeholder.cursor, placeholder.scroll)
+            elif os.path.getsize(file_path) >= LARGE_FILE_THRESHOLD:
+                editor = self.open_large_file(file_path, index)
+            else:
+                editor = self.new_tab(file_path, index=index)
+                self.load_file(editor, file_path)
+                self.pending_cursors[editor] = (placeholder.cursor, placeholder.scroll)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not open file: {e}")
+        finally:
+            self.tab_widget.blockSignals(False)
+
+        if editor is not None:
+            editor.setProperty("session_id", placeholder.property("session_id"))
+            self.session_dirty.discard(editor) # The journal already has this content
+        elif self.tab_widget.count() == 0:
+            self.new_tab()
+        placeholder.deleteLater()
+        self.active_tab = self.tab_widget.currentWidget()
+        self.update_edit_menu()
+        self.update_load_indicator()
+        self.update_follow_action()
+
+    def set_unload_inactive_tabs(self, enabled):
+        QSettings().setValue("unloadInactiveTabs", enabled)
+        if enabled:
+            self.unload_timer.start()
+        else:
+            self.unload_timer.stop()
+
+    def unload_inactive_tabs(self):
+        now = time.monotonic()
+        for index in range(self.tab_widget.count()):
+            editor = self.tab_widget.widget(index)
+            if editor is self.tab_widget.currentWidget() or isinstance(editor, TabPlaceholder):
+                continue
+            if (not editor.property("file_path") or self.is_modified(editor) or editor in self.loaders
+                    or editor in self.followers or editor.property("follow_diverged")):
+                continue # Only tabs that can be reloaded from disk unchanged
+            if now - (editor.property("last_active") or now) < TAB_UNLOAD_AFTER_S:
+                continue
+            self.unload_tab(index)
+
+    def unload_tab(self, index):
+        editor = self.tab_widget.widget(index)
+        is_text = isinstance(editor, TextEditor)
+        placeholder = TabPlaceholder(editor.property("session_id"), editor.property("file_path"),
+                                     cursor=editor.textCursor().position() if is_text else 0,
+                                     scroll=editor.verticalScrollBar().value() if is_text else 0)
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, placeholder, os.path.basename(editor.property("file_path")))
+        self.tab_widget.blockSignals(False)
+        if isinstance(editor, LargeFileView):
+            editor.release()
+        self.session_dirty.discard(editor)
+        editor.deleteLater()
+
+    def restore_legacy_session(self, settings):
+        # Sessions from before the journal were a JSON blob in QSettings
         session_data_json = settings.value("session")
         if not session_data_json:
             return False
-            
+        settings.remove("session")
         try:
             session_data = json.loads(session_data_json)
-            if not session_data: # If session was empty
-                return False
-
-            for item in session_data:
-                if item.get("file_path"):
-                    self.open_file(item["file_path"])
-                elif "content" in item:
-                    self.new_tab(content=item["content"])
-            return True
         except (json.JSONDecodeError, TypeError):
             return False
+        for item in session_data or []:
+            if item.get("file_path"):
+                self.open_file(item["file_path"])
+            elif "content" in item:
+                self.new_tab(content=item["content"])
+        return bool(session_data)
 
     def closeEvent(self, event):
+        if self.find_in_files_panel:
+            self.find_in_files_panel.cancel_search()
+        if self.saves_in_flight:
+            self.save_pool.waitForDone() # Never leave a save half done
+            QApplication.processEvents() # Deliver the results so finished saves aren't prompted for
         if self.is_closing_window:
+            for editor in list(self.loaders):
+                self.stop_loader(editor)
+            for editor in list(self.followers):
+                self.stop_following(editor)
+            self.session_timer.stop()
             self.save_session()
+            self.session_store.flush()
+            QSettings().setValue("geometry", self.saveGeometry())
             # Don't check for saving changes, just save state and close
             event.accept()
             return
@@ -688,8 +2981,10 @@ class Notepad(QMainWindow):
                 return
         
         # Clear session on proper exit
+        self.session_timer.stop()
+        self.session_store.remove_window(self.window_id)
+        self.session_store.flush()
         settings = QSettings()
-        settings.remove("session")
         settings.remove("geometry")
         
         event.accept()
@@ -700,6 +2995,9 @@ class Application(QApplication):
         super().__init__(*args, **kwargs)
         self.setOrganizationName("GeminiCLI")
         self.setApplicationName("PyQtNotepad")
+        profiler = Profiler.shared()
+        if profiler.export_path:
+            self.aboutToQuit.connect(lambda: profiler.export(profiler.export_path))
         self.windows = []
         self.new_window(restore=True) # Start with one window
 
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_scratch = tempfile.mkdtemp(prefix="notepad-test-")
+os.environ["XDG_CONFIG_HOME"] = os.path.join(_scratch, "config")
+os.environ["XDG_DATA_HOME"] = os.path.join(_scratch, "data")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtWidgets import QApplication
+
+import pyqt_notepad
+
+
+@pytest.fixture(scope="module")
+def app():
+    application = QApplication.instance() or QApplication([])
+    application.setApplicationName("PyQtNotepadTest")
+    application.clipboard().setText("") # The offscreen clipboard has no mime data until it is set
+    yield application
+    pyqt_notepad.SessionStore.shared().stop()
+
+
+@pytest.fixture
+def notepad(app):
+    window = pyqt_notepad.Notepad(restore=False)
+    window.new_tab()
+    window.show()
+    yield window
+    window.close_window()
+    window.deleteLater()
+    app.processEvents()
+
+
+def test_find_dialog_opens_and_closes(app, notepad, monkeypatch):
+    errors = []
+    # PyQt aborts on an exception escaping closeEvent; collect it instead
+    monkeypatch.setattr(sys, "excepthook", lambda *info: errors.append(info))
+    notepad.current_editor().setPlainText("needle in a haystack, needle again")
+    notepad.show_find_dialog()
+    dialog = notepad.find_dialog
+    dialog.find_input.setText("needle")
+    dialog.find_next()
+    app.processEvents()
+    assert dialog.isVisible()
+    assert notepad.current_editor().match_index.highlighting
+
+    dialog.close()
+    app.processEvents()
+
+    assert errors == []
+    assert not dialog.isVisible()
+    assert not notepad.current_editor().match_index.highlighting # Closing clears highlight-all
+
+
+def test_find_text_does_not_wait_for_the_match_index(app, notepad):
+    editor = notepad.current_editor()
+    editor.setPlainText("filler line\n" * 200000 + "needle\n")
+    editor.moveCursor(pyqt_notepad.QTextCursor.Start)
+
+    notepad.find_text("needle")
+    assert not editor.textCursor().hasSelection() # Returned before the background scan finished
+
+    while not editor.match_index.is_ready():
+        app.processEvents()
+    app.processEvents()
+
+    cursor = editor.textCursor()
+    assert cursor.selectedText() == "needle"
+    assert cursor.selectionStart() == len("filler line\n") * 200000
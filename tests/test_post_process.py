@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+_scratch = tempfile.mkdtemp(prefix="post-process-test-")
+os.environ["XDG_CACHE_HOME"] = os.path.join(_scratch, "cache")
+os.environ["XDG_DATA_HOME"] = os.path.join(_scratch, "data")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from post_process import Pipeline, StreamingInput, DownloadAborted
+from video_formats import ffmpeg_available
+
+pytestmark = pytest.mark.skipif(not ffmpeg_available(), reason="ffmpeg is not installed")
+
+BLOCK_SIZE = 4096 # Size of each write while a fixture is being "downloaded"
+
+
+def make_clip(path, *movflags):
+    # A few seconds of test pattern and tone (~200 KB, well past ffmpeg's pipe read buffer)
+    subprocess.run(["ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc=duration=4:size=320x240:rate=30",
+                    "-f", "lavfi", "-i", "sine=frequency=440:duration=4",
+                    "-c:v", "mpeg4", "-q:v", "2", "-c:a", "aac", "-shortest", *movflags, path], check=True)
+    return path
+
+
+@pytest.fixture
+def clip(tmp_path):
+    return make_clip(str(tmp_path / "clip [abcdefghijk].mp4"))
+
+
+@pytest.fixture
+def fragmented_clip(tmp_path):
+    # DASH-style mp4 with the index up front, so ffmpeg can read it from a pipe
+    return make_clip(str(tmp_path / "clip [abcdefghijk].mp4"), "-movflags", "frag_keyframe+empty_moov")
+
+
+def download_slowly(source_path, file_path, stream, fail_at=None):
+    # Replays a finished file as a download into '.part', the way ranged_download reports it
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    os.remove(source_path)
+    part_path = file_path + '.part'
+    with open(part_path, 'wb') as f:
+        for start in range(0, len(data), BLOCK_SIZE):
+            if fail_at is not None and start >= len(data) * fail_at:
+                stream.abort()
+                return
+            f.write(data[start:start + BLOCK_SIZE])
+            f.flush()
+            stream.advance(f.tell())
+    os.replace(part_path, file_path)
+    stream.finish(file_path)
+
+
+def run_streaming(pipeline, source_path, fail_at=None):
+    stream = StreamingInput(source_path + '.part')
+    downloader = threading.Thread(target=download_slowly, args=(source_path, source_path, stream, fail_at))
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(pipeline.run, source_path, None, stream)
+        downloader.start()
+        downloader.join()
+        return future.result()
+
+
+def leftovers(folder):
+    return [name for name in os.listdir(folder) if '.temp.' in name or name.endswith('.part')]
+
+
+def test_remux_and_audio_from_a_finished_file(clip):
+    job = Pipeline.parse("remux:mkv,audio:m4a").run(clip)
+
+    assert job.file_path == clip[:-len(".mp4")] + ".mkv"
+    assert os.path.exists(job.file_path)
+    assert not os.path.exists(clip) # Remux replaces the downloaded file
+    assert job.outputs == [clip[:-len(".mp4")] + ".m4a"]
+    assert os.path.getsize(job.outputs[0]) > 0
+    assert [name for name, _ in job.timings] == ["remux:mkv", "audio:m4a"]
+    assert all(seconds >= 0 for _, seconds in job.timings)
+    assert leftovers(os.path.dirname(clip)) == []
+
+
+def test_remux_streams_while_the_file_downloads(fragmented_clip):
+    job = run_streaming(Pipeline.parse("remux:mkv"), fragmented_clip)
+
+    assert [name for name, _ in job.timings] == ["remux:mkv (스트리밍)"]
+    assert os.path.exists(job.file_path)
+    assert not os.path.exists(fragmented_clip)
+    assert leftovers(os.path.dirname(fragmented_clip)) == []
+
+
+def test_streaming_falls_back_to_the_file_when_the_pipe_cannot_be_read(clip):
+    # A plain mp4 keeps its index after the media data, so remuxing it from a pipe fails
+    job = run_streaming(Pipeline.parse("remux:mkv"), clip)
+
+    assert [name for name, _ in job.timings] == ["remux:mkv"]
+    assert os.path.getsize(job.file_path) > 0
+    assert not os.path.exists(clip)
+    assert leftovers(os.path.dirname(clip)) == []
+
+
+def test_streaming_stops_when_the_download_fails(fragmented_clip):
+    with pytest.raises(DownloadAborted):
+        run_streaming(Pipeline.parse("remux:mkv"), fragmented_clip, fail_at=0.5)
+
+    # The half-written '.part' stays for a resume, but no output from its first half is kept
+    folder = os.path.dirname(fragmented_clip)
+    assert not any(name.endswith('.mkv') for name in os.listdir(folder))
+    assert not any('.temp.' in name for name in os.listdir(folder))
+
+
+def test_download_job_settles_streaming_post_process_on_failure(fragmented_clip, monkeypatch):
+    import youtube_downloader
+
+    file_path = fragmented_clip
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    os.remove(file_path)
+
+    def resolve_video(url, path, policy):
+        return "clip", ["http://example.invalid/clip"], file_path, "mp4", None
+
+    def ranged_download(url, file_path, on_progress=None, stop_event=None, on_ready=None):
+        with open(file_path + '.part', 'wb') as f:
+            f.write(data[:len(data) // 2])
+        on_ready(len(data) // 2)
+        raise ConnectionError("connection reset")
+
+    post_process = youtube_downloader.post_process
+    def slow_post_process(*args):
+        try:
+            return post_process(*args)
+        finally:
+            time.sleep(0.2) # Still winding down ffmpeg when the download has already failed
+
+    monkeypatch.setattr(youtube_downloader, "resolve_video", resolve_video)
+    monkeypatch.setattr(youtube_downloader, "ranged_download", ranged_download)
+    monkeypatch.setattr(youtube_downloader, "post_process", slow_post_process)
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        submit = pool.submit
+        monkeypatch.setattr(pool, "submit", lambda *args: futures.append(submit(*args)) or futures[-1])
+        outcome = asyncio.run(youtube_downloader.download_job(
+            "https://www.youtube.com/watch?v=abcdefghijk", os.path.dirname(file_path),
+            asyncio.Semaphore(1), threading.Event(), pipeline=Pipeline.parse("remux:mkv"), post_pool=pool))
+        settled = [future.done() for future in futures]
+
+    assert outcome == 'failed'
+    assert settled == [True] # download_job waited for the aborted post-process before returning
+    assert not any('.temp.' in name for name in os.listdir(os.path.dirname(file_path)))
@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+# 영상 정보(제목, 포맷, 크기, 스트림 URL) 캐시
+# youtube_downloader.py(pytube)와 youtube_downloader_gui.py(yt-dlp)가 함께 사용합니다.
+
+CACHE_TTL_S = 6 * 60 * 60 # 캐시된 정보의 최대 유효 기간
+CACHE_MAX_ENTRIES = 1000 # 이보다 많으면 가장 오래 쓰지 않은 항목부터 지웁니다. (LRU)
+URL_EXPIRY_MARGIN_S = 10 * 60 # 스트림 URL 만료가 이만큼 남았으면 만료된 것으로 봅니다.
+
+def default_cache_path():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'youtube_downloader', 'video_cache.sqlite3')
+
+def video_id_from_url(url):
+    """
+    유튜브 URL에서 영상 ID를 꺼내는 함수 (유튜브 영상 URL이 아니면 None)
+    """
+    parts = urlsplit(url)
+    host = parts.netloc.lower().split(':')[0]
+    if host == 'youtu.be':
+        return parts.path.strip('/').split('/')[0] or None
+    if host.endswith('youtube.com') or host.endswith('youtube-nocookie.com'):
+        if parts.path == '/watch':
+            return parse_qs(parts.query).get('v', [None])[0]
+        segments = parts.path.strip('/').split('/')
+        if len(segments) >= 2 and segments[0] in ('shorts', 'embed', 'live', 'v'):
+            return segments[1]
+    return None
+
+def video_key(url):
+    # 캐시/보관 목록의 키: 유튜브 영상이면 영상 ID, 아니면 URL 그대로
+    return video_id_from_url(url) or url
+
+def stream_url_expiry(url):
+    """
+    googlevideo 스트림 URL의 expire 값(유닉스 시각)을 돌려주는 함수 (없으면 None)
+    """
+    expire = parse_qs(urlsplit(url).query).get('expire', [None])[0]
+    try:
+        return float(expire) if expire else None
+    except ValueError:
+        return None
+
+
+class VideoCache:
+    """
+    (영상 키, 출처)별로 영상 정보를 JSON으로 저장하는 SQLite 캐시.
+    출처는 정보를 만든 라이브러리('pytube', 'yt-dlp')로, 형식이 서로 달라 따로 저장합니다.
+    TTL이 지났거나 스트림 URL이 곧 만료되는 항목은 없는 것으로 취급합니다.
+    """
+    _shared = None
+    _shared_lock = threading.Lock() # 여러 작업자 스레드가 처음 부를 때 하나만 만들도록
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, path=None, ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 여러 작업 스레드에서 쓰므로 연결 하나를 잠금으로 보호합니다.
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS videos (
+            video_key TEXT NOT NULL,
+            source TEXT NOT NULL,
+            title TEXT,
+            data TEXT NOT NULL,
+            fetched REAL NOT NULL,
+            expires REAL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (video_key, source))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS videos_last_used ON videos (last_used)")
+
+    def get(self, video_key, source):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT data, fetched, expires FROM videos WHERE video_key = ? AND source = ?",
+                (video_key, source)).fetchone()
+            if row is None:
+                return None
+            data, fetched, expires = row
+            if now - fetched > self.ttl or (expires is not None and expires - now < URL_EXPIRY_MARGIN_S):
+                self.db.execute("DELETE FROM videos WHERE video_key = ? AND source = ?", (video_key, source))
+                return None
+            self.db.execute("UPDATE videos SET last_used = ? WHERE video_key = ? AND source = ?",
+                            (now, video_key, source))
+        return json.loads(data)
+
+    def put(self, video_key, source, title, data, expires=None):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (video_key, source, title, json.dumps(data, ensure_ascii=False), now, expires, now))
+            self.db.execute("""DELETE FROM videos WHERE rowid IN (
+                SELECT rowid FROM videos ORDER BY last_used DESC LIMIT -1 OFFSET ?)""", (self.max_entries,))
+
+    def invalidate(self, video_key, source):
+        with self.lock:
+            self.db.execute("DELETE FROM videos WHERE video_key = ? AND source = ?", (video_key, source))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
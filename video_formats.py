@@ -0,0 +1,302 @@
+import re
+import shutil
+
+# 포맷 선택 정책
+# youtube_downloader.py(pytube 스트림)와 youtube_downloader_gui.py(yt-dlp 포맷)가 같은 규칙으로 포맷을 고릅니다.
+#
+# 정책 문자열은 쉼표로 구분한 항목의 조합입니다. 예: "1080p,vp9,max=500M,efficient"
+#   best          제한 없이 최고 화질 (기본값)
+#   <N>p          세로 해상도 상한 (예: 720p)
+#   audio         오디오만
+#   avc1|vp9|av01 선호 코덱 (적은 순서대로 우선, h264/av1 별칭 허용)
+#   max=<크기>     예상 크기 상한 (예: 300M, 2G). 맞는 포맷이 없으면 가장 작은 포맷
+#   efficient     같은 해상도면 코덱 선호나 비트레이트보다 용량이 작은 쪽 우선
+#   progressive   영상+음성이 합쳐진 스트림만 (ffmpeg 병합 없이)
+
+CODEC_ALIASES = {'avc1': 'avc1', 'avc': 'avc1', 'h264': 'avc1',
+                 'vp9': 'vp9', 'vp09': 'vp9',
+                 'av01': 'av01', 'av1': 'av01'}
+DEFAULT_CODECS = ('avc1', 'vp9', 'av01') # 재생 호환성 순
+# 영상 컨테이너별로 ffmpeg 복사(-c copy)만으로 합칠 수 있는 음성 컨테이너
+AUDIO_EXT_FOR_VIDEO = {'mp4': ('m4a', 'mp4'), 'webm': ('webm',)}
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+def ffmpeg_available():
+    return shutil.which('ffmpeg') is not None
+
+def parse_size(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMG]?)i?B?", text.strip(), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"잘못된 크기: {text}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+def format_size(size):
+    # parse_size의 반대: 나누어떨어지는 가장 큰 단위로 표시합니다. (정책 이름용)
+    for unit in ('G', 'M', 'K'):
+        if size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return str(size)
+
+def codec_family(codec):
+    # 'avc1.64001F' -> 'avc1', 'vp09.00.40.08' -> 'vp9', 'mp4a.40.2' -> 'mp4a'
+    # 'none'은 트랙이 없다는 뜻(None), 값이 없으면 트랙은 있지만 코덱을 모르는 것('unknown')입니다.
+    if codec == 'none':
+        return None
+    if not codec:
+        return 'unknown'
+    name = codec.split('.')[0].lower()
+    return CODEC_ALIASES.get(name, name)
+
+
+class MediaFormat:
+    """
+    pytube 스트림이나 yt-dlp 포맷 딕셔너리를 같은 형태로 다루기 위한 포맷 정보.
+    size는 바이트 단위 예상 크기, bitrate는 초당 비트이며 모르면 None입니다.
+    """
+    __slots__ = ('key', 'ext', 'height', 'vcodec', 'acodec', 'bitrate', 'size', 'source')
+
+    def __init__(self, key, ext, height, vcodec, acodec, bitrate, size, source):
+        self.key = key
+        self.ext = ext
+        self.height = height
+        self.vcodec = vcodec
+        self.acodec = acodec
+        self.bitrate = bitrate
+        self.size = size
+        self.source = source
+
+    @property
+    def has_video(self):
+        return self.vcodec is not None
+
+    @property
+    def has_audio(self):
+        return self.acodec is not None
+
+    @classmethod
+    def from_ytdlp(cls, f):
+        tbr = f.get('tbr') or f.get('vbr') or f.get('abr')
+        return cls(str(f.get('format_id')), f.get('ext'), f.get('height'),
+                   codec_family(f.get('vcodec')), codec_family(f.get('acodec')),
+                   tbr * 1000 if tbr else None,
+                   f.get('filesize') or f.get('filesize_approx'), f)
+
+    @classmethod
+    def from_pytube(cls, stream, duration=None):
+        height = int(stream.resolution[:-1]) if getattr(stream, 'resolution', None) else None
+        # filesize 속성은 크기를 모르면 네트워크 요청을 하므로, 매니페스트에 있는 값이나 추정치만 씁니다.
+        size = getattr(stream, '_filesize', 0) or None
+        if size is None and stream.bitrate and duration:
+            size = int(stream.bitrate * duration / 8)
+        return cls(str(stream.itag), stream.subtype, height,
+                   codec_family(stream.video_codec) if stream.includes_video_track else None,
+                   codec_family(stream.audio_codec) if stream.includes_audio_track else None,
+                   stream.bitrate, size, stream)
+
+
+class Selection:
+    """선택된 포맷 조합: [합쳐진 스트림], [영상, 음성] 또는 [음성]"""
+    __slots__ = ('formats',)
+
+    def __init__(self, formats):
+        self.formats = formats
+
+    @classmethod
+    def from_ytdlp_info(cls, info):
+        # yt-dlp가 이미 고른 포맷(영상 정보의 requested_formats 또는 정보 자체)
+        return cls([MediaFormat.from_ytdlp(f) for f in info.get('requested_formats') or [info]])
+
+    @property
+    def key(self):
+        return '+'.join(f.key for f in self.formats)
+
+    @property
+    def video(self):
+        return next((f for f in self.formats if f.has_video), None)
+
+    @property
+    def size(self):
+        sizes = [f.size for f in self.formats]
+        return None if None in sizes else sum(sizes)
+
+    @property
+    def bitrate(self):
+        return sum(f.bitrate or 0 for f in self.formats)
+
+    def describe(self):
+        video = self.video
+        codecs = (video.vcodec if video else None,) + tuple(f.acodec for f in self.formats)
+        codecs = '+'.join(c for c in codecs if c and c != 'unknown')
+        size = f"{self.size / 1024 / 1024:.1f} MiB" if self.size else '크기 모름'
+        if video is None:
+            label = '오디오'
+        else:
+            label = f"{video.height}p" if video.height else (video.ext or '영상')
+        return f"{label} {codecs} · 예상 {size}" if codecs else f"{label} · 예상 {size}"
+
+
+class FormatPolicy:
+    """사용 가능한 포맷을 정책에 따라 순위를 매겨 하나를 고릅니다."""
+
+    def __init__(self, max_height=None, audio_only=False, codecs=DEFAULT_CODECS, max_size=None,
+                 efficient=False, progressive=False, can_merge=True):
+        self.max_height = max_height
+        self.audio_only = audio_only
+        self.codecs = tuple(codecs)
+        self.max_size = max_size
+        self.efficient = efficient
+        self.progressive = progressive
+        self.can_merge = can_merge # 병합 도구(ffmpeg)가 있는지: 정책 이름에는 들어가지 않습니다.
+
+    @property
+    def adaptive(self):
+        # 영상+음성 조합을 후보로 넣을지
+        return self.can_merge and not self.progressive
+
+    @classmethod
+    def parse(cls, spec, can_merge=None):
+        """
+        정책 문자열을 해석합니다. can_merge를 주지 않으면 ffmpeg가 있을 때만 영상+음성 조합을 허용합니다.
+        """
+        policy = cls(can_merge=ffmpeg_available() if can_merge is None else can_merge)
+        codecs = []
+        for token in filter(None, (token.strip().lower() for token in (spec or 'best').split(','))):
+            if token == 'best':
+                continue
+            elif token == 'audio':
+                policy.audio_only = True
+            elif token == 'efficient':
+                policy.efficient = True
+            elif token == 'progressive':
+                policy.progressive = True
+            elif re.fullmatch(r"\d+p", token):
+                policy.max_height = int(token[:-1])
+            elif token.startswith('max='):
+                policy.max_size = parse_size(token[4:])
+            elif token in CODEC_ALIASES:
+                codecs.append(CODEC_ALIASES[token])
+            else:
+                raise ValueError(f"알 수 없는 포맷 정책 항목: {token}")
+        if codecs:
+            policy.codecs = tuple(codecs) + tuple(c for c in DEFAULT_CODECS if c not in codecs)
+        return policy
+
+    @property
+    def name(self):
+        # 같은 정책은 항상 같은 문자열이 되도록 정규화합니다. (보관 목록/캐시 키로 사용)
+        tokens = []
+        if self.audio_only:
+            tokens.append('audio')
+        if self.max_height:
+            tokens.append(f"{self.max_height}p")
+        if self.codecs != DEFAULT_CODECS:
+            tokens.extend(self.codecs)
+        if self.max_size:
+            tokens.append(f"max={format_size(self.max_size)}")
+        if self.efficient:
+            tokens.append('efficient')
+        if self.progressive:
+            tokens.append('progressive')
+        return ','.join(tokens) or 'best'
+
+    def candidates(self, formats):
+        audio = [f for f in formats if f.has_audio and not f.has_video]
+        if self.audio_only:
+            return [Selection([f]) for f in audio] or [Selection([f]) for f in formats if f.has_audio]
+        video = [f for f in formats
+                 if f.has_video and (not self.max_height or not f.height or f.height <= self.max_height)]
+        selections = [Selection([f]) for f in video if f.has_audio]
+        if self.adaptive:
+            for f in video:
+                if f.has_audio:
+                    continue
+                # 컨테이너를 그대로 합칠 수 있는 음성 중 가장 좋은 것과 짝짓습니다.
+                compatible = [a for a in audio if a.ext in AUDIO_EXT_FOR_VIDEO.get(f.ext, ())]
+                if compatible:
+                    selections.append(Selection([f, max(compatible, key=self.audio_rank)]))
+        return selections
+
+    def audio_rank(self, f):
+        return -(f.size or 0) if self.efficient else (f.bitrate or 0)
+
+    def rank(self, selection):
+        size = selection.size
+        fits = not self.max_size or (size is not None and size <= self.max_size)
+        video = selection.video
+        codec = video.vcodec if video else None
+        codec_rank = -self.codecs.index(codec) if codec in self.codecs else -len(self.codecs)
+        height = (video.height or 0) if video else 0
+        single = len(selection.formats) == 1 # 같은 조건이면 병합이 필요 없는 쪽
+        if self.efficient:
+            return (fits, height, -(size or float('inf')), codec_rank, single)
+        return (fits, height, codec_rank, single, selection.bitrate)
+
+    def select(self, formats):
+        """
+        MediaFormat 목록에서 가장 알맞은 Selection을 고릅니다. (후보가 없으면 None)
+        크기 상한에 맞는 후보가 없으면 예상 크기가 가장 작은 후보를 고릅니다.
+        """
+        selections = self.candidates(formats)
+        if not selections:
+            return None
+        best = max(selections, key=self.rank)
+        if self.max_size and not self.rank(best)[0]:
+            sized = [s for s in selections if s.size]
+            if sized:
+                best = min(sized, key=lambda s: s.size)
+        return best
+
+    # --- yt-dlp 연동 ---
+    def ytdlp_format_selector(self, ydl, on_selected=None):
+        """
+        YoutubeDL 인스턴스의 format_selector 속성에 넣을 선택 함수를 만듭니다.
+        고른 포맷 ID로 yt-dlp 자체의 선택기를 만들어 쓰므로 영상+음성 병합 정보도 yt-dlp가 채웁니다.
+        on_selected(Selection)는 포맷이 정해질 때 호출됩니다.
+        """
+        def select_format(ctx):
+            selection = self.select([MediaFormat.from_ytdlp(f) for f in ctx.get('formats') or []])
+            if selection is None:
+                # 정책에 맞는 후보가 없으면 -f 규칙으로 근사해서 고릅니다.
+                yield from ydl.build_format_selector(self.format_spec())(ctx)
+                return
+            if on_selected:
+                on_selected(selection)
+            yield from ydl.build_format_selector(selection.key)(ctx)
+        return select_format
+
+    def format_spec(self):
+        # yt-dlp -f 문법으로 옮긴 정책 (해상도와 코덱 선호는 sort_spec이 담당)
+        if self.audio_only:
+            choices = ['ba', 'b']
+        elif self.adaptive:
+            choices = ['bv*+ba', 'b']
+        else:
+            choices = ['b']
+        if self.max_size:
+            # 크기 조건에 맞는 것을 먼저 찾고, 없으면 조건 없이 고릅니다.
+            size_filter = f"[filesize_approx<=?{self.max_size}]"
+            choices = [c.replace('+', size_filter + '+') if '+' in c else c + size_filter
+                       for c in choices] + choices
+        return '/'.join(choices)
+
+    def sort_spec(self):
+        # yt-dlp -S 문법으로 옮긴 정책
+        sort = []
+        if self.max_height:
+            sort.append(f"res:{self.max_height}")
+        sort.append('vcodec:' + {'avc1': 'h264', 'vp9': 'vp9', 'av01': 'av01'}[self.codecs[0]])
+        if self.efficient:
+            sort.append('+size')
+        return ','.join(sort)
+
+    def ytdlp_arguments(self, info=None):
+        """
+        yt-dlp 명령행 인자로 정책을 표현합니다.
+        info(이미 추출한 영상 정보)가 있으면 이 정책으로 고른 포맷 ID를 그대로 지정하고,
+        없으면 -f/-S 규칙으로 최대한 비슷하게 고르게 합니다.
+        """
+        if info and info.get('formats'):
+            selection = self.select([MediaFormat.from_ytdlp(f) for f in info['formats']])
+            if selection:
+                return ['-f', selection.key]
+        return ['-f', self.format_spec(), '-S', self.sort_spec()]
@@ -1,36 +1,647 @@
-from pytube import YouTube
+from pytube import YouTube, Playlist, Channel
 import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import time
+import random
+import threading
+import http.client
+from urllib.parse import urlsplit, urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def download_video(url, path='.'):
+from video_cache import VideoCache, video_key, stream_url_expiry
+from download_archive import DownloadArchive
+from video_formats import FormatPolicy, MediaFormat
+from post_process import Pipeline, StreamingInput, DownloadAborted, POSTPROCESS_WORKERS, run_ffmpeg
+
+METADATA_WORKERS = 8 # 영상 정보를 동시에 가져오는 최대 스레드 수
+DOWNLOAD_WORKERS = 3 # 동시에 다운로드하는 최대 영상 수
+
+RANGE_CHUNK_SIZE = 4 * 1024 * 1024 # 한 번의 Range 요청으로 받는 크기
+RANGE_WORKERS = 4 # 영상 하나를 동시에 받는 연결 수
+RANGE_MAX_RETRIES = 5 # 조각마다 재시도 횟수
+RANGE_BACKOFF_S = 0.5 # 첫 재시도 대기 시간 (시도마다 두 배)
+READ_BLOCK_SIZE = 64 * 1024
+HTTP_TIMEOUT_S = 30
+MAX_REDIRECTS = 5
+
+DEFAULT_POLICY = FormatPolicy.parse('best') # 포맷 정책 (정책 이름이 보관 목록의 포맷으로 기록됨)
+
+PROGRESS_INTERVAL_S = 0.5 # --jobs 모드에서 영상별 progress 줄을 내보내는 최소 간격
+
+# 명령행 모드의 종료 코드
+EXIT_OK = 0 # 모두 성공 (이미 받은 영상 건너뜀 포함)
+EXIT_FAILED = 1 # 모두 실패
+EXIT_PARTIAL = 3 # 일부만 실패
+EXIT_INTERRUPTED = 130 # Ctrl+C로 중단
+
+def expand_source(source):
+    """
+    영상 URL, 재생목록/채널 URL 또는 URL 목록 파일(한 줄에 하나, #은 주석)을
+    개별 영상 URL 목록으로 펼치는 함수
+    """
+    if os.path.isfile(source):
+        urls = []
+        with open(source, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.extend(expand_source(line))
+        return urls
+    if 'list=' in source:
+        return list(Playlist(source).video_urls)
+    if any(part in source for part in ('/channel/', '/c/', '/user/', '/@')):
+        return list(Channel(source).video_urls)
+    return [source]
+
+def cache_source(policy):
+    # 정책마다(ffmpeg로 병합할 수 있는지 포함) 고르는 스트림이 다르므로 캐시도 따로 둡니다.
+    return f"pytube:{policy.name}" + (':merge' if policy.adaptive else '')
+
+def resolve_video(url, path='.', policy=DEFAULT_POLICY):
+    """
+    영상 정보를 가져와 (제목, 스트림 URL 목록, 저장될 파일 경로, 포맷 설명, 썸네일 URL)을 돌려주는 함수
+    스트림은 포맷 정책으로 고르며, 영상+음성 조합이면 URL이 두 개(영상, 음성)입니다.
+    캐시에 스트림 URL이 아직 유효한 정보가 있으면 유튜브에 접속하지 않습니다.
+    """
+    cache = VideoCache.shared()
+    key = video_key(url)
+    info = cache.get(key, cache_source(policy))
+    if info is None:
+        yt = YouTube(url)
+        selection = policy.select([MediaFormat.from_pytube(stream, yt.length) for stream in yt.streams])
+        if selection is None:
+            raise ValueError("포맷 정책에 맞는 스트림이 없습니다.")
+        streams = [f.source for f in selection.formats]
+        urls = [stream.url for stream in streams]
+        name, ext = os.path.splitext(streams[0].default_filename)
+        if selection.video is None and ext == '.mp4':
+            ext = '.m4a' # 음성만 받으면 영상 파일과 이름이 겹치지 않게 합니다.
+        # GUI의 OUTPUT_TEMPLATE처럼 '제목 [영상ID].확장자'로 저장해 --import-archive가 알아볼 수 있게 합니다.
+        filename = f"{name} [{yt.video_id}]{ext}"
+        info = {'title': yt.title, 'urls': urls, 'filename': filename,
+                'filesize': selection.size, 'itags': [stream.itag for stream in streams],
+                'format': selection.describe(), 'thumbnail': yt.thumbnail_url}
+        expiries = [expiry for expiry in map(stream_url_expiry, urls) if expiry]
+        cache.put(key, cache_source(policy), yt.title, info, min(expiries) if expiries else None)
+    return (info['title'], info['urls'], os.path.join(path, info['filename']), info['format'],
+            info.get('thumbnail'))
+
+def forget_video(url, policy=DEFAULT_POLICY):
+    # 다운로드에 실패하면 (스트림 URL 만료 등) 다음 재시도에서 정보를 새로 가져오도록 캐시에서 지웁니다.
+    VideoCache.shared().invalidate(video_key(url), cache_source(policy))
+
+def new_connection(parts):
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.netloc, timeout=HTTP_TIMEOUT_S)
+
+def request_target(parts):
+    return (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+def probe_download(url):
+    """
+    1바이트 Range 요청으로 (리디렉션 후 최종 URL, 전체 크기, Range 지원 여부)를 알아내는 함수
+    """
+    for _ in range(MAX_REDIRECTS):
+        parts = urlsplit(url)
+        connection = new_connection(parts)
+        try:
+            connection.request('GET', request_target(parts), headers={'Range': 'bytes=0-0'})
+            response = connection.getresponse()
+            if response.status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            if response.status == 206:
+                response.read()
+                return url, int(response.getheader('Content-Range').rsplit('/', 1)[1]), True
+            if response.status == 200: # Range를 지원하지 않는 서버 (본문은 읽지 않고 닫음)
+                length = response.getheader('Content-Length')
+                return url, int(length) if length else None, False
+            raise OSError(f"HTTP {response.status} {response.reason}")
+        finally:
+            connection.close()
+    raise OSError("리디렉션이 너무 많습니다.")
+
+def ranged_download(url, file_path, workers=RANGE_WORKERS, chunk_size=RANGE_CHUNK_SIZE, on_progress=None,
+                    stop_event=None, on_ready=None):
+    """
+    URL을 RANGE_CHUNK_SIZE 크기의 조각으로 나눠 여러 연결로 동시에 받는 함수
+    조각은 미리 크기를 잡아 둔 '<파일>.part'의 제자리에 쓰고, 끝난 조각 번호를
+    '<파일>.part.json'에 기록해 두므로 중단된 다운로드는 남은 조각부터 이어받습니다.
+    on_progress(받은 바이트, 전체 바이트)는 작업 스레드에서 호출됩니다.
+    stop_event가 설정되면 InterruptedError로 중단합니다. (받은 조각은 남아 이어받을 수 있음)
+    on_ready(바이트 수)는 '.part'의 앞에서부터 끊김 없이 디스크에 기록된 길이가 늘어날 때 호출됩니다.
+    (받는 중인 파일을 후처리로 흘려보내는 데 사용)
+    """
+    stop = stop_event or threading.Event()
+    url, total, supports_range = probe_download(url)
+    part_path = file_path + '.part'
+    manifest_path = part_path + '.json'
+    if not supports_range or not total:
+        # Range를 지원하지 않으면 한 번에 순차적으로 받습니다. (이어받기 불가)
+        parts = urlsplit(url)
+        connection = new_connection(parts)
+        try:
+            connection.request('GET', request_target(parts))
+            response = connection.getresponse()
+            if response.status != 200:
+                raise OSError(f"HTTP {response.status} {response.reason}")
+            received = 0
+            with open(part_path, 'wb') as f:
+                while True:
+                    if stop.is_set():
+                        raise InterruptedError()
+                    block = response.read(READ_BLOCK_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    received += len(block)
+                    if on_progress:
+                        on_progress(received, total)
+                    if on_ready:
+                        f.flush()
+                        on_ready(received)
+        finally:
+            connection.close()
+        os.replace(part_path, file_path)
+        return file_path
+
+    chunk_count = (total + chunk_size - 1) // chunk_size
+    done = set()
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('size') == total and manifest.get('chunk_size') == chunk_size and os.path.exists(part_path):
+            done = set(manifest.get('done', []))
+    except (OSError, ValueError):
+        pass
+
+    fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+    lock = threading.Lock()
+    local = threading.local()
+    connections = []
+    received = [sum(min(chunk_size, total - index * chunk_size) for index in done)]
+
+    try:
+        # 파일 크기를 미리 잡아 두어 각 조각을 제자리에 쓸 수 있게 합니다.
+        if os.fstat(fd).st_size != total:
+            if hasattr(os, 'posix_fallocate') and not done:
+                os.posix_fallocate(fd, 0, total)
+            os.ftruncate(fd, total)
+
+        if hasattr(os, 'pwrite'):
+            def write_at(data, offset):
+                view = memoryview(data)
+                while view:
+                    written = os.pwrite(fd, view, offset)
+                    view, offset = view[written:], offset + written
+        else: # pwrite가 없는 플랫폼(Windows)은 파일 위치 이동과 쓰기를 잠금으로 묶습니다.
+            def write_at(data, offset):
+                with lock:
+                    os.lseek(fd, offset, os.SEEK_SET)
+                    view = memoryview(data)
+                    while view:
+                        view = view[os.write(fd, view):]
+
+        parts = urlsplit(url)
+        target = request_target(parts)
+
+        def connection():
+            # 작업 스레드마다 연결 하나를 만들어 여러 조각에 걸쳐 재사용합니다. (keep-alive)
+            if getattr(local, 'connection', None) is None:
+                local.connection = new_connection(parts)
+                with lock:
+                    connections.append(local.connection)
+            return local.connection
+
+        def fetch(index):
+            position = index * chunk_size
+            end = min(position + chunk_size, total) - 1
+            for attempt in range(RANGE_MAX_RETRIES + 1):
+                try:
+                    conn = connection()
+                    conn.request('GET', target, headers={'Range': f'bytes={position}-{end}'})
+                    response = conn.getresponse()
+                    if response.status != 206:
+                        raise OSError(f"HTTP {response.status} {response.reason}")
+                    while position <= end:
+                        if stop.is_set():
+                            raise InterruptedError()
+                        block = response.read(min(READ_BLOCK_SIZE, end - position + 1))
+                        if not block:
+                            raise OSError("연결이 중간에 끊겼습니다.")
+                        write_at(block, position)
+                        position += len(block)
+                        with lock:
+                            received[0] += len(block)
+                            if on_progress:
+                                on_progress(received[0], total)
+                    return index
+                except InterruptedError:
+                    raise
+                except (OSError, http.client.HTTPException):
+                    # 연결을 버리고, 이미 받은 위치부터 지수적으로 늘어나는 대기 후 다시 요청합니다.
+                    local.connection.close()
+                    local.connection = None
+                    if attempt == RANGE_MAX_RETRIES or stop.is_set():
+                        raise
+                    time.sleep(RANGE_BACKOFF_S * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        def save_manifest():
+            temp_path = manifest_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'size': total, 'chunk_size': chunk_size, 'done': sorted(done)}, f)
+            os.replace(temp_path, manifest_path)
+
+        contiguous = [0] # 앞에서부터 이어서 완료된 조각 수
+        def advance_ready():
+            while contiguous[0] in done:
+                contiguous[0] += 1
+            if on_ready:
+                on_ready(min(contiguous[0] * chunk_size, total))
+
+        save_manifest()
+        advance_ready()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fetch, index) for index in range(chunk_count) if index not in done]
+            try:
+                for future in as_completed(futures):
+                    index = future.result()
+                    # 조각 데이터가 디스크에 기록된 뒤에만 완료로 표시합니다.
+                    os.fsync(fd)
+                    done.add(index)
+                    save_manifest()
+                    advance_ready()
+            except BaseException:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+        for conn in connections:
+            conn.close()
+
+    os.replace(part_path, file_path)
+    os.remove(manifest_path)
+    return file_path
+
+def merge_streams(video_path, audio_path, file_path):
+    """
+    따로 받은 영상/음성 파일을 ffmpeg로 다시 인코딩하지 않고(-c copy) 하나로 합치는 함수
+    """
+    root, ext = os.path.splitext(file_path)
+    temp_path = f"{root}.merge{ext}"
+    run_ffmpeg(['-i', video_path, '-i', audio_path, '-map', '0:v:0', '-map', '1:a:0', '-c', 'copy', temp_path])
+    os.replace(temp_path, file_path)
+    os.remove(video_path)
+    os.remove(audio_path)
+
+def fetch_streams(stream_urls, file_path, on_progress=None, stop_event=None, stream=None):
+    """
+    resolve_video가 고른 스트림을 받아 file_path에 저장하는 함수
+    영상+음성 조합이면 두 스트림을 동시에 받은 뒤 ffmpeg로 합칩니다.
+    on_progress(받은 바이트, 전체 바이트)에는 두 스트림을 합친 값이 전달됩니다.
+    stream(StreamingInput)이 주어지면 받는 동안 후처리로 흘려보냅니다.
+    (영상+음성 조합은 합친 뒤에야 파일이 생기므로 다 받은 다음 한 번에 넘어감)
+    """
+    try:
+        if len(stream_urls) == 1:
+            ranged_download(stream_urls[0], file_path, on_progress=on_progress, stop_event=stop_event,
+                            on_ready=stream.advance if stream else None)
+        else:
+            download_pair(stream_urls, file_path, on_progress, stop_event)
+    except BaseException:
+        if stream:
+            stream.abort()
+        raise
+    if stream:
+        stream.finish(file_path)
+    return file_path
+
+def download_pair(stream_urls, file_path, on_progress=None, stop_event=None):
+    part_paths = [f"{file_path}.f{index}" for index in range(len(stream_urls))]
+    lock = threading.Lock()
+    progress = {}
+
+    def fetch(index):
+        def report(received, total):
+            with lock:
+                progress[index] = (received, total or 0)
+                if on_progress:
+                    on_progress(sum(p[0] for p in progress.values()), sum(p[1] for p in progress.values()))
+        # 이전 시도에서 다 받은 스트림은 다시 받지 않습니다.
+        if not os.path.exists(part_paths[index]):
+            ranged_download(stream_urls[index], part_paths[index], on_progress=report, stop_event=stop_event)
+
+    with ThreadPoolExecutor(max_workers=len(stream_urls)) as pool:
+        for future in [pool.submit(fetch, index) for index in range(len(stream_urls))]:
+            future.result()
+    merge_streams(*part_paths, file_path)
+
+def post_process(pipeline, url, policy, file_path, thumbnail_url=None, stream=None):
+    """
+    받은 파일을 후처리하고 PostJob을 돌려주는 함수 (후처리 작업자 스레드에서 실행)
+    remux 등으로 본 파일이 바뀌면 보관 목록의 경로도 새 파일로 고칩니다.
+    """
+    job = pipeline.run(file_path, thumbnail_url, stream)
+    if job.file_path != file_path:
+        DownloadArchive.shared().add(video_key(url), policy.name, job.file_path)
+    return job
+
+def format_timings(job):
+    return ', '.join(f"{name} {seconds:.1f}초" for name, seconds in job.timings)
+
+def download_video(url, path='.', policy=DEFAULT_POLICY, pipeline=None):
     """
     유튜브 URL을 받아 영상을 지정된 경로에 다운로드하는 함수
+    pipeline(post_process.Pipeline)이 주어지면 받은 뒤 후처리합니다.
     """
+    archive = DownloadArchive.shared()
+    if archive.contains(video_key(url), policy.name):
+        print("이미 받은 영상입니다. (다운로드 보관 목록) 건너뜁니다.")
+        return
+
     try:
-        # YouTube 객체 생성
-        yt = YouTube(url)
+        # 영상 정보 가져오기 (캐시 우선)
+        title, stream_urls, file_path, description, thumbnail_url = resolve_video(url, path, policy)
 
-        print(f"'{yt.title}' 다운로드를 시작합니다...")
+        print(f"'{title}' 다운로드를 시작합니다... ({description})")
 
-        # 가장 높은 해상도의 스트림 선택
-        stream = yt.streams.get_highest_resolution()
+        def show_progress(received, total):
+            if total:
+                print(f"\r{received * 100 / total:5.1f}% ({received // 1024 // 1024}/{total // 1024 // 1024} MB)", end='', flush=True)
+            else:
+                print(f"\r{received // 1024 // 1024} MB", end='', flush=True)
 
-        # 동영상 다운로드
-        stream.download(output_path=path)
+        # 동영상 다운로드 (여러 연결로 나눠 받고, 중단되면 이어받음)
+        os.makedirs(path, exist_ok=True)
+        fetch_streams(stream_urls, file_path, on_progress=show_progress)
+        archive.add(video_key(url), policy.name, file_path)
 
-        print(f"다운로드 완료! 저장 경로: {os.path.abspath(path)}")
+        print(f"\n다운로드 완료! 저장 경로: {os.path.abspath(path)}")
+        if pipeline:
+            job = post_process(pipeline, url, policy, file_path, thumbnail_url)
+            print(f"후처리 완료 ({format_timings(job)})")
 
     except Exception as e:
+        forget_video(url, policy)
         print(f"오류가 발생했습니다: {e}")
 
-if __name__ == "__main__":
+def download_batch(sources, path='.', policy=DEFAULT_POLICY, pipeline=None):
+    """
+    여러 영상을 한 번에 다운로드하는 함수
+    영상 정보는 METADATA_WORKERS개의 스레드로 동시에 가져오고, 이미 받은 파일은 건너뛴 뒤
+    나머지를 DOWNLOAD_WORKERS개씩 동시에 다운로드합니다.
+    후처리는 POSTPROCESS_WORKERS개의 별도 스레드에서 하므로 다음 영상의 다운로드와 겹쳐서 진행됩니다.
+    """
+    urls = []
+    for source in sources:
+        try:
+            urls.extend(expand_source(source))
+        except Exception as e:
+            print(f"'{source}' 목록을 가져오지 못했습니다: {e}")
+    urls = list(dict.fromkeys(urls)) # 중복 URL 제거 (순서 유지)
+    # 보관 목록에 있는 영상은 정보를 가져오기 전에 걸러냅니다.
+    archive = DownloadArchive.shared()
+    archived = [url for url in urls if archive.contains(video_key(url), policy.name)]
+    if archived:
+        print(f"이미 받은 영상 {len(archived)}개를 건너뜁니다. (다운로드 보관 목록)")
+        urls = [url for url in urls if url not in archived]
+    print(f"영상 {len(urls)}개의 정보를 가져오는 중...")
+    os.makedirs(path, exist_ok=True)
+
+    pending = []
+    with ThreadPoolExecutor(max_workers=METADATA_WORKERS) as pool:
+        futures = {pool.submit(resolve_video, url, path, policy): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                title, stream_urls, file_path, description, thumbnail_url = future.result()
+            except Exception as e:
+                print(f"'{url}' 정보를 가져오지 못했습니다: {e}")
+                continue
+            if os.path.exists(file_path):
+                print(f"이미 있음, 건너뜀: {title}")
+                continue
+            print(f"{title}: {description}")
+            pending.append((url, title, stream_urls, file_path, thumbnail_url))
+
+    def download(url, title, stream_urls, file_path, thumbnail_url):
+        fetch_streams(stream_urls, file_path)
+        archive.add(video_key(url), policy.name, file_path)
+        return title
+
+    failed = 0
+    post_futures = {}
+    with ThreadPoolExecutor(max_workers=POSTPROCESS_WORKERS) as post_pool:
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+            futures = {pool.submit(download, *job): job for job in pending}
+            for future in as_completed(futures):
+                url, title, _, file_path, thumbnail_url = futures[future]
+                try:
+                    print(f"다운로드 완료: {future.result()}")
+                except Exception as e:
+                    failed += 1
+                    forget_video(url, policy)
+                    print(f"'{url}' 다운로드 실패: {e}")
+                    continue
+                if pipeline:
+                    post_futures[post_pool.submit(post_process, pipeline, url, policy, file_path,
+                                                  thumbnail_url)] = title
+        for future in as_completed(post_futures):
+            try:
+                print(f"후처리 완료: {post_futures[future]} ({format_timings(future.result())})")
+            except Exception as e:
+                failed += 1
+                print(f"'{post_futures[future]}' 후처리 실패: {e}")
+
+    print(f"총 {len(pending)}개 중 {len(pending) - failed}개 다운로드 완료! 저장 경로: {os.path.abspath(path)}")
+
+# --- 명령행 (비대화형) 모드 ---
+def emit(record):
+    # 배치 작업에서 읽기 쉽도록 한 줄에 JSON 객체 하나씩 출력합니다.
+    print(json.dumps(record, ensure_ascii=False), flush=True)
+
+async def download_job(url, path, semaphore, stop_event, policy=DEFAULT_POLICY, pipeline=None, post_pool=None):
+    """
+    영상 하나를 받는 코루틴. 결과로 'done', 'skipped', 'failed', 'cancelled' 중 하나를 돌려줍니다.
+    pytube와 다운로드는 블로킹 호출이므로 스레드에서 실행합니다.
+    후처리는 post_pool에서 실행하고, 다운로드 자리(semaphore)는 후처리를 기다리지 않고 바로 비웁니다.
+    첫 후처리 단계가 파이프 입력을 받을 수 있으면 다운로드가 끝나기 전부터 흘려보냅니다.
+    """
+    post_future = None
+    outcome = None # 다운로드가 실패하거나 취소되면 'failed' / 'cancelled'
+    async with semaphore:
+        if stop_event.is_set():
+            return 'cancelled'
+        loop = asyncio.get_running_loop()
+        archive = DownloadArchive.shared()
+        if archive.contains(video_key(url), policy.name):
+            emit({'event': 'skipped', 'url': url, 'reason': 'archive'})
+            return 'skipped'
+        emit({'event': 'start', 'url': url})
+        try:
+            title, stream_urls, file_path, description, thumbnail_url = await asyncio.to_thread(
+                resolve_video, url, path, policy)
+            if os.path.exists(file_path):
+                emit({'event': 'skipped', 'url': url, 'reason': 'exists', 'title': title, 'path': file_path})
+                return 'skipped'
+            emit({'event': 'format', 'url': url, 'title': title, 'format': description})
+
+            last_emit = [0.0]
+            def report(received, total):
+                now = time.monotonic()
+                if now - last_emit[0] >= PROGRESS_INTERVAL_S or received == total:
+                    last_emit[0] = now
+                    loop.call_soon_threadsafe(emit, {'event': 'progress', 'url': url,
+                                                     'received': received, 'total': total})
+
+            stream = None
+            if pipeline and pipeline.streamable and len(stream_urls) == 1:
+                # ranged_download가 쓰는 '.part'를 받는 동안 후처리로 흘려보냅니다.
+                stream = StreamingInput(file_path + '.part')
+                post_future = post_pool.submit(post_process, pipeline, url, policy, file_path, thumbnail_url,
+                                               stream)
+            await asyncio.to_thread(fetch_streams, stream_urls, file_path,
+                                    on_progress=report, stop_event=stop_event, stream=stream)
+            await asyncio.to_thread(archive.add, video_key(url), policy.name, file_path)
+            if pipeline and post_future is None:
+                post_future = post_pool.submit(post_process, pipeline, url, policy, file_path, thumbnail_url)
+        except InterruptedError:
+            emit({'event': 'cancelled', 'url': url})
+            outcome = 'cancelled'
+        except Exception as e:
+            forget_video(url, policy)
+            emit({'event': 'error', 'url': url, 'error': str(e)})
+            outcome = 'failed'
+    if outcome:
+        # 스트리밍 후처리는 다운로드 자리를 비운 뒤 정리가 끝날 때까지 기다립니다.
+        await discard_post_process(url, post_future)
+        return outcome
+    emit({'event': 'done', 'url': url, 'title': title, 'path': file_path})
+    if post_future is None:
+        return 'done'
+    try:
+        job = await asyncio.wrap_future(post_future)
+    except Exception as e:
+        emit({'event': 'error', 'url': url, 'stage': 'postprocess', 'error': str(e)})
+        return 'failed'
+    emit({'event': 'postprocessed', 'url': url, 'path': job.file_path, 'outputs': job.outputs,
+          'timings': {name: round(seconds, 3) for name, seconds in job.timings}})
+    return 'done'
+
+async def discard_post_process(url, post_future):
+    # 다운로드가 실패하면 스트리밍 후처리는 DownloadAborted로 끝납니다.
+    # 아직 시작하지 않았으면 취소하고, 실행 중이면 임시 파일을 지울 때까지 기다립니다.
+    if post_future is None or post_future.cancel():
+        return
+    try:
+        await asyncio.wrap_future(post_future)
+    except DownloadAborted:
+        pass
+    except Exception as e:
+        emit({'event': 'error', 'url': url, 'stage': 'postprocess', 'error': str(e)})
+
+async def run_jobs(sources, path, jobs, policy=DEFAULT_POLICY, pipeline=None):
+    """
+    여러 영상을 최대 jobs개까지 동시에 받고 종료 코드를 돌려주는 함수
+    Ctrl+C를 누르면 새 작업을 시작하지 않고, 진행 중인 다운로드는 이어받을 수 있는 상태로 멈춥니다.
+    """
+    stop_event = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop_event.set)
+    except (NotImplementedError, RuntimeError): # Windows 등 시그널 처리기를 지원하지 않는 환경
+        signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    urls = []
+    results = []
+    for source in sources:
+        try:
+            urls.extend(await asyncio.to_thread(expand_source, source))
+        except Exception as e:
+            emit({'event': 'error', 'url': source, 'error': str(e)})
+            results.append('failed')
+    os.makedirs(path, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(jobs)
+    with ThreadPoolExecutor(max_workers=POSTPROCESS_WORKERS) as post_pool:
+        results += await asyncio.gather(
+            *(download_job(url, path, semaphore, stop_event, policy, pipeline, post_pool)
+              for url in dict.fromkeys(urls)))
+
+    counts = {status: results.count(status) for status in ('done', 'skipped', 'failed', 'cancelled')}
+    emit({'event': 'summary', **counts})
+    if stop_event.is_set():
+        return EXIT_INTERRUPTED
+    if counts['failed'] == 0:
+        return EXIT_OK
+    return EXIT_FAILED if counts['failed'] == len(results) else EXIT_PARTIAL
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="유튜브 영상을 여러 개 동시에 다운로드하고 진행 상황을 JSON 줄로 출력합니다.")
+    parser.add_argument('urls', nargs='*',
+                        help="영상/재생목록/채널 URL 또는 URL 목록 파일 ('-' 또는 생략 시 표준 입력에서 한 줄에 하나씩)")
+    parser.add_argument('-o', '--output', default='downloads', help="저장 폴더 (기본값: downloads)")
+    parser.add_argument('-j', '--jobs', type=int, default=DOWNLOAD_WORKERS,
+                        help=f"동시에 받을 영상 수 (기본값: {DOWNLOAD_WORKERS})")
+    parser.add_argument('-f', '--format', default='best', metavar='POLICY',
+                        help="포맷 정책 (예: 720p / audio / vp9,max=300M / efficient, 기본값: best)")
+    parser.add_argument('--post', default='', metavar='STEPS',
+                        help="받은 뒤 실행할 후처리 단계 (예: remux:mkv,audio:mp3,thumbnail)")
+    parser.add_argument('--import-archive', metavar='DIR',
+                        help="폴더에서 '제목 [영상ID].확장자' 형식의 파일을 찾아 다운로드 보관 목록에 추가")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs는 1 이상이어야 합니다.")
+    try:
+        policy = FormatPolicy.parse(args.format)
+        pipeline = Pipeline.parse(args.post)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.import_archive:
+        added = DownloadArchive.shared().import_directory(args.import_archive)
+        emit({'event': 'archive_import', 'path': args.import_archive, 'added': added})
+        if not args.urls:
+            return EXIT_OK
+
+    sources = [url for url in args.urls if url != '-']
+    if not args.urls or '-' in args.urls:
+        # 터미널에서 표준 입력을 기다리면 멈춘 것처럼 보이므로, 파이프나 파일로 들어올 때만 읽습니다.
+        if sys.stdin.isatty():
+            parser.error("다운로드할 URL을 인자로 주거나 표준 입력으로 넘겨 주세요.")
+        sources += [line.strip() for line in sys.stdin if line.strip() and not line.startswith('#')]
+    if not sources:
+        parser.error("다운로드할 URL이 없습니다.")
+    return asyncio.run(run_jobs(sources, args.output, args.jobs, policy, pipeline))
+
+def interactive():
     # 사용자로부터 유튜브 링크 입력받기
-    video_url = input("다운로드할 유튜브 영상 URL을 입력하세요: ")
+    # 재생목록/채널 URL이나 URL 목록 파일 경로를 입력하면 일괄 다운로드합니다.
+    video_url = input("다운로드할 유튜브 영상 URL (또는 재생목록/채널 URL, URL 목록 파일)을 입력하세요: ").strip()
 
     # 다운로드 받을 폴더 지정 (예: 'downloads' 폴더)
     # 이 폴더가 없으면 자동으로 생성됩니다.
     download_path = 'downloads'
 
-    if video_url:
-        download_video(video_url, download_path)
-    else:
+    if not video_url:
         print("URL이 입력되지 않았습니다.")
+    else:
+        video_urls = expand_source(video_url)
+        if video_urls == [video_url]:
+            download_video(video_url, download_path)
+        else:
+            download_batch(video_urls, download_path)
+
+if __name__ == "__main__":
+    # 인자나 파이프 입력이 있으면 명령행 모드, 없으면 기존처럼 대화형으로 실행합니다.
+    if len(sys.argv) > 1 or not sys.stdin.isatty():
+        sys.exit(main())
+    interactive()
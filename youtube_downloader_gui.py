@@ -1,72 +1,451 @@
 import sys
 import os
 import subprocess
-import re # yt-dlp 출력 파싱을 위해 추가
+import json
+import math
+import queue
+import threading
+import time
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QLineEdit,
-                             QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QProgressBar)
-from PyQt5.QtCore import QThread, pyqtSignal
+                             QPushButton, QVBoxLayout, QHBoxLayout, QFileDialog, QProgressBar, QMessageBox,
+                             QSpinBox, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+
+from video_cache import VideoCache, video_key, stream_url_expiry
+from download_archive import DownloadArchive
+from video_formats import FormatPolicy, MediaFormat, Selection
+from post_process import Pipeline, POSTPROCESS_WORKERS
+
+try:
+    import yt_dlp # 내장 엔진용 (없으면 외부 yt-dlp 프로세스만 사용)
+except ImportError:
+    yt_dlp = None
+
+# 파일 이름에 영상 ID를 넣어 두면 폴더를 훑어 다운로드 보관 목록을 다시 만들 수 있습니다.
+OUTPUT_TEMPLATE = "%(title)s [%(id)s].%(ext)s"
+# 포맷 정책 입력칸의 미리 정해 둔 항목 (직접 입력도 가능, 정책 이름이 보관 목록의 포맷으로 기록됨)
+FORMAT_PRESETS = ['best', '1080p', '720p', '480p', 'efficient', '1080p,max=500M', 'audio']
+
+# 외부 프로세스 모드에서 yt-dlp가 진행 상황을 공백으로 구분된 숫자로 출력하게 합니다. 모르는 값은 NA
+PROGRESS_TEMPLATE = ("download:PROGRESS %(progress.downloaded_bytes)s %(progress.total_bytes)s "
+                     "%(progress.total_bytes_estimate)s %(progress.speed)s %(progress.eta)s "
+                     "%(progress.fragment_index)s %(progress.fragment_count)s")
+
+PROGRESS_FPS = 10 # 대기열 표의 진행 상황을 다시 그리는 초당 횟수
+BATCH_METADATA_WORKERS = 8 # 일괄 추가 시 영상 정보를 동시에 가져오는 최대 스레드 수
+SPEED_SMOOTHING_S = 2.0 # 속도 이동평균의 시간 상수 (초), 클수록 부드럽고 느리게 반응
+RATE_LIMIT_APPLY_DELAY_MS = 500 # 속도 제한/동시 다운로드 수를 바꾼 뒤 실행 중인 다운로드에 적용하기까지 기다리는 시간
+RATE_LIMIT_RESTART_CHANGE = 0.1 # 외부 yt-dlp는 한도가 이 비율 이상 바뀔 때만 다시 실행
+
+# 대기열 항목 상태와 화면 표시 문자열
+QUEUED, RUNNING, PAUSED, POSTPROCESSING, DONE, FAILED, CANCELLED = (
+    'queued', 'running', 'paused', 'postprocessing', 'done', 'failed', 'cancelled')
+STATUS_TEXT = {
+    QUEUED: '대기 중',
+    RUNNING: '다운로드 중',
+    PAUSED: '일시정지',
+    POSTPROCESSING: '후처리 중',
+    DONE: '완료',
+    FAILED: '실패',
+    CANCELLED: '취소됨',
+}
+
+# --- 영상 정보 캐시 (yt-dlp info JSON) ---
+def cached_video_info(url):
+    return VideoCache.shared().get(video_key(url), 'yt-dlp')
+
+def store_video_info(url, info):
+    # 포맷별 스트림 URL 중 가장 먼저 만료되는 시각까지만 유효합니다.
+    expiries = [stream_url_expiry(f['url']) for f in info.get('formats') or [] if f.get('url')]
+    expiries = [expiry for expiry in expiries if expiry]
+    VideoCache.shared().put(video_key(url), 'yt-dlp', info.get('title'), info,
+                            min(expiries) if expiries else None)
+
+def forget_video_info(url):
+    VideoCache.shared().invalidate(video_key(url), 'yt-dlp')
+
+def select_format(info, policy):
+    # 캐시된 정보의 포맷 목록에서 정책으로 고른 Selection (후보가 없으면 None)
+    return policy.select([MediaFormat.from_ytdlp(f) for f in info.get('formats') or []])
+
+def policy_file_path(file_path, selection):
+    # 캐시된 정보의 파일 이름은 yt-dlp 기본 선택 기준이므로 고른 포맷의 확장자로 바꿉니다.
+    # (영상+음성 조합은 영상과 같은 컨테이너로 합쳐짐)
+    if selection is None or not file_path:
+        return file_path
+    return f"{os.path.splitext(file_path)[0]}.{selection.formats[0].ext}"
+
+def format_bytes(size):
+    if size is None:
+        return '?'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_eta(seconds):
+    if seconds is None:
+        return ''
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressEvent:
+    """
+    다운로드 진행 상황 한 건.
+    바이트/초 단위의 숫자 값을 담고, 알 수 없는 값은 None입니다.
+    """
+    __slots__ = ('downloaded_bytes', 'total_bytes', 'speed', 'eta', 'fragment_index', 'fragment_count')
+
+    def __init__(self, downloaded_bytes=0, total_bytes=None, speed=None, eta=None,
+                 fragment_index=None, fragment_count=None):
+        self.downloaded_bytes = downloaded_bytes or 0
+        self.total_bytes = total_bytes
+        self.speed = speed
+        self.eta = eta
+        self.fragment_index = fragment_index
+        self.fragment_count = fragment_count
+
+    @classmethod
+    def from_hook(cls, status):
+        # yt_dlp progress_hooks에 전달되는 딕셔너리에서 생성
+        return cls(status.get('downloaded_bytes'),
+                   status.get('total_bytes') or status.get('total_bytes_estimate'),
+                   status.get('speed'), status.get('eta'),
+                   status.get('fragment_index'), status.get('fragment_count'))
+
+    @classmethod
+    def from_template_line(cls, line):
+        # PROGRESS_TEMPLATE 형식의 출력 한 줄을 해석합니다. 해당 줄이 아니면 None
+        fields = line.split()
+        if len(fields) != 8 or fields[0] != 'PROGRESS':
+            return None
+        values = []
+        for field in fields[1:]:
+            try:
+                values.append(float(field))
+            except ValueError: # NA
+                values.append(None)
+        downloaded, total, estimate, speed, eta, fragment_index, fragment_count = values
+        return cls(downloaded, total or estimate, speed, eta,
+                   fragment_index and int(fragment_index), fragment_count and int(fragment_count))
+
+    @property
+    def percent(self):
+        if self.total_bytes:
+            return min(100.0, self.downloaded_bytes * 100 / self.total_bytes)
+        if self.fragment_index and self.fragment_count:
+            return self.fragment_index * 100 / self.fragment_count
+        return None
+
+
+class ProgressBoard:
+    """
+    작업자 스레드가 최신 진행 상황을 써 두는 공유 게시판.
+    GUI 타이머가 일정한 주기로 한꺼번에 읽어 가므로, 그 사이에 들어온 중간 값은 버려집니다.
+    속도는 지수이동평균으로 평활하고, 남은 시간은 평활된 속도로 다시 계산합니다.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {} # key -> 아직 그리지 않은 최신 ProgressEvent
+        self.smoothing = {} # key -> (평활 속도, 마지막 바이트 수, 마지막 시각)
+
+    def post(self, key, event):
+        now = time.monotonic()
+        with self.lock:
+            previous = self.smoothing.get(key)
+            sample = event.speed
+            if previous:
+                speed, last_bytes, last_time = previous
+                elapsed = now - last_time
+                if sample is None and elapsed > 0 and event.downloaded_bytes >= last_bytes:
+                    sample = (event.downloaded_bytes - last_bytes) / elapsed
+                if sample is not None and speed is not None:
+                    # 갱신 간격에 따라 가중치를 조절해 이벤트 빈도와 무관하게 같은 시간 상수를 유지합니다.
+                    weight = 1 - math.exp(-elapsed / SPEED_SMOOTHING_S)
+                    sample = speed + weight * (sample - speed)
+                elif sample is None:
+                    sample = speed
+            self.smoothing[key] = (sample, event.downloaded_bytes, now)
+
+            event.speed = sample
+            if sample and event.total_bytes:
+                event.eta = max(0, event.total_bytes - event.downloaded_bytes) / sample
+            self.latest[key] = event
+
+    def take(self):
+        with self.lock:
+            latest, self.latest = self.latest, {}
+        return latest
+
+    def forget(self, key):
+        with self.lock:
+            self.latest.pop(key, None)
+            self.smoothing.pop(key, None)
+
+
+class DownloadStopped(Exception):
+    """일시정지/취소 요청으로 내장 엔진의 다운로드를 중단할 때 progress hook에서 발생시킵니다."""
+
+
+class YtDlpEngine:
+    """
+    yt_dlp.YoutubeDL 인스턴스 풀.
+    한 인스턴스는 한 번에 한 작업자만 사용하고, 다운로드가 끝나면 반납되어
+    추출기와 HTTP 세션을 다음 다운로드에서 그대로 재사용합니다.
+    """
+    _shared = None
+    _shared_lock = threading.Lock() # 여러 작업자 스레드가 처음 부를 때 하나만 만들도록
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def __init__(self):
+        self.idle = queue.LifoQueue() # 최근에 쓴 인스턴스부터 재사용
+        self.hooks = {} # id(YoutubeDL) -> 현재 작업의 진행 콜백
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            ydl = yt_dlp.YoutubeDL({
+                'quiet': True,
+                'noprogress': True,
+                'no_warnings': True,
+                'restrictfilenames': True,
+                'noplaylist': True,
+            })
+            key = id(ydl)
+            ydl.add_progress_hook(lambda status: self.hooks[key](status))
+            return ydl
+
+    def release(self, ydl):
+        with self.lock:
+            self.hooks.pop(id(ydl), None)
+        ydl.format_selector = None # 다음 작업이 자기 정책을 넣기 전까지는 yt-dlp 기본 선택
+        self.idle.put(ydl)
+
+    def list_entries(self, source):
+        # 재생목록/채널을 영상 정보 없이 목록만 빠르게 펼칩니다. (채널의 탭은 재귀적으로 펼침)
+        ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'})
+        return self._flatten(ydl, ydl.extract_info(source, download=False))
+
+    def _flatten(self, ydl, info):
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            return [info.get('webpage_url') or info.get('url')]
+        urls = []
+        for entry in info.get('entries') or []:
+            if not entry:
+                continue
+            if entry.get('_type') == 'playlist':
+                urls.extend(self._flatten(ydl, entry))
+            elif entry.get('ie_key') == 'YoutubeTab': # 채널의 동영상/Shorts 탭 등
+                urls.extend(self._flatten(ydl, ydl.extract_info(entry['url'], download=False)))
+            else:
+                urls.append(entry.get('webpage_url') or entry.get('url'))
+        return urls
+
+    def resolve(self, url, save_path, policy):
+        # 영상 정보를 가져와 (제목, 저장될 파일 경로, 포맷 설명)을 돌려줍니다. 캐시에 있으면 추출을 건너뜁니다.
+        ydl = self.acquire()
+        try:
+            ydl.params['outtmpl'] = {'default': os.path.join(save_path, OUTPUT_TEMPLATE)}
+            info = cached_video_info(url)
+            if info is None:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=False), remove_private_keys=True)
+                store_video_info(url, info)
+            selection = select_format(info, policy)
+            return (info.get('title') or url, policy_file_path(ydl.prepare_filename(info), selection),
+                    selection.describe() if selection else '')
+        finally:
+            self.release(ydl)
+
+    def download(self, url, save_path, on_progress, policy, on_selected=None):
+        # 받은 파일의 경로를 돌려줍니다. on_selected(Selection)는 포맷이 정해지면 호출됩니다.
+        # 속도 제한은 on_progress 쪽에서 맞춥니다. (다운로드 중에 한도가 바뀔 수 있음)
+        ydl = self.acquire()
+        try:
+            # 다운로드마다 달라지는 옵션만 바꿔 끼웁니다.
+            # (format 옵션은 생성할 때만 해석되므로 선택기를 직접 교체)
+            ydl.params['outtmpl'] = {'default': os.path.join(save_path, OUTPUT_TEMPLATE)}
+            ydl.format_selector = policy.ytdlp_format_selector(ydl, on_selected)
+            with self.lock:
+                self.hooks[id(ydl)] = on_progress
+            info = cached_video_info(url)
+            if info is not None:
+                # 캐시된 정보로 추출 없이 바로 받습니다. (--load-info-json과 같은 방식)
+                try:
+                    info = ydl.process_ie_result(ydl.sanitize_info(info, remove_private_keys=True), download=True)
+                    return self.downloaded_path(info)
+                except yt_dlp.utils.DownloadError:
+                    forget_video_info(url) # 스트림 URL 만료 등: 정보를 새로 가져와 다시 시도
+            info = ydl.extract_info(url, download=True)
+            store_video_info(url, ydl.sanitize_info(info, remove_private_keys=True))
+            return self.downloaded_path(info)
+        finally:
+            self.release(ydl)
+
+
+    @staticmethod
+    def downloaded_path(info):
+        downloads = info.get('requested_downloads') or [{}]
+        return downloads[-1].get('filepath') or info.get('filepath')
+
 
 class DownloaderThread(QThread):
     """
     다운로드를 처리하기 위한 별도의 스레드
     GUI가 멈추는 것을 방지합니다.
+    yt-dlp를 외부 프로세스로 실행합니다. (내장 엔진을 쓸 수 없을 때의 대체 경로)
+    board가 주어지면 진행 상황을 신호 대신 ProgressBoard에 기록합니다.
     """
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(str)
+    progress = pyqtSignal(object) # ProgressEvent
+    selected = pyqtSignal(str) # 고른 포맷과 예상 크기 설명
+    completed = pyqtSignal(str, str) # 메시지, 받은 파일 경로 (모르면 빈 문자열)
     error = pyqtSignal(str)
 
-    def __init__(self, url, save_path):
+    def __init__(self, url, save_path, rate_limit=0, board=None, board_key=None, policy=None):
         super().__init__()
         self.url = url
         self.save_path = save_path
+        self.rate_limit = rate_limit # 초당 바이트, 0이면 제한 없음
+        self.policy = policy or FormatPolicy.parse('best')
+        self.board = board
+        self.board_key = board_key if board_key is not None else self
+        self.process = None
+        self.stopped = False
+        self.restart = False # 속도 제한이 바뀌어 yt-dlp를 새 한도로 다시 실행해야 하는지
+
+    def set_rate_limit(self, rate_limit):
+        # 실행 중인 yt-dlp의 한도는 바꿀 수 없으므로 새 한도로 다시 실행합니다. (.part 파일에서 이어받음)
+        # 다시 실행하는 비용이 있으므로 한도가 조금 바뀐 정도로는 그대로 둡니다.
+        if rate_limit == self.rate_limit:
+            return
+        change = abs(rate_limit - self.rate_limit)
+        if rate_limit and self.rate_limit and change < self.rate_limit * RATE_LIMIT_RESTART_CHANGE:
+            return
+        self.rate_limit = rate_limit
+        self.restart = True
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+    def report(self, event):
+        if self.stopped:
+            return
+        if self.board:
+            self.board.post(self.board_key, event)
+        else:
+            self.progress.emit(event)
+
+    def record_download(self, file_path):
+        # 다운로드 보관 목록에 기록합니다. (파일 해시 계산 포함, 작업 스레드에서 실행)
+        if file_path:
+            DownloadArchive.shared().add(video_key(self.url), self.policy.name, file_path)
+
+    def stop(self):
+        # 일시정지/취소 시 yt-dlp 프로세스를 종료합니다. 재개하면 .part 파일에서 이어받습니다.
+        self.stopped = True
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
 
     def run(self):
         try:
             # yt-dlp 명령어 구성
             # -o: 출력 파일 경로 및 이름 형식 지정
-            # --progress: 진행 상황을 stderr로 출력
+            # --progress: 진행 상황 출력
+            # --newline, --progress-template: 진행 상황을 숫자만 담은 한 줄씩 출력 (파싱용)
             # --no-warnings: 경고 메시지 출력 안 함
             # --restrict-filenames: 파일 이름 제한 (안전한 파일 이름)
             # --no-playlist: 플레이리스트 다운로드 방지 (단일 영상만)
             command = [
                 "yt-dlp",
                 "--progress",
+                "--newline",
+                "--progress-template", PROGRESS_TEMPLATE,
                 "--no-warnings",
                 "--restrict-filenames",
                 "--no-playlist",
-                "-o", os.path.join(self.save_path, "%(title)s.%(ext)s"),
-                self.url
+                "--print", "after_move:FILEPATH %(filepath)s", # 보관 목록에 기록할 최종 파일 경로
+                "-o", os.path.join(self.save_path, OUTPUT_TEMPLATE),
             ]
+            info = cached_video_info(self.url)
+            # 캐시된 정보가 있으면 정책으로 고른 포맷 ID를, 없으면 -f/-S 근사 규칙을 넘깁니다.
+            command += self.policy.ytdlp_arguments(info)
+            selection = select_format(info, self.policy) if info is not None else None
+            if selection:
+                self.selected.emit(selection.describe())
+            if info is not None:
+                # 캐시된 정보로 추출을 건너뜁니다. 실패하면 yt-dlp가 webpage_url로 다시 추출합니다.
+                with tempfile.NamedTemporaryFile('w', suffix='.info.json', encoding='utf-8', delete=False) as f:
+                    json.dump(info, f)
+                info_path = f.name
+                command += ["--load-info-json", info_path]
+            else:
+                # 받는 동안 info JSON을 한 줄로 출력하게 해서 캐시에 저장합니다.
+                info_path = None
+                command += ["--dump-json", "--no-simulate", self.url]
+
+            tail = deque(maxlen=20)
+            file_path = None
+            try:
+                while True:
+                    # subprocess를 사용하여 yt-dlp 실행
+                    # stderr를 stdout에 합쳐 한 번에 읽고, 실패 시 보여줄 마지막 줄들을 보관합니다.
+                    self.restart = False
+                    limit = ["--limit-rate", str(self.rate_limit)] if self.rate_limit else []
+                    self.process = subprocess.Popen(
+                        command[:1] + limit + command[1:],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        text=True, # 텍스트 모드로 설정
+                        bufsize=1, # 라인 버퍼링
+                        universal_newlines=True # 유니코드 처리
+                    )
+                    if self.stopped or self.restart: # 시작하는 사이에 중지나 한도 변경 요청이 들어온 경우
+                        self.process.terminate()
 
-            self.finished.emit(f"다운로드를 시작합니다: {self.url}")
-
-            # subprocess를 사용하여 yt-dlp 실행
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True, # 텍스트 모드로 설정
-                bufsize=1, # 라인 버퍼링
-                universal_newlines=True # 유니코드 처리
-            )
-
-            # stderr에서 진행 상황 읽기
-            for line in iter(process.stderr.readline, ''):
-                if "%" in line:
-                    match = re.search(r"(\d+\.\d+)%", line)
-                    if match:
-                        percentage = float(match.group(1))
-                        self.progress.emit(int(percentage))
-                # print(f"yt-dlp output: {line.strip()}") # 디버깅용
-
-            process.wait() # 프로세스 종료 대기
-
-            if process.returncode == 0:
-                self.finished.emit(f"다운로드 완료! 저장 경로: {os.path.abspath(self.save_path)}")
+                    for line in iter(self.process.stdout.readline, ''):
+                        event = ProgressEvent.from_template_line(line)
+                        if event:
+                            self.report(event)
+                        elif line.startswith('FILEPATH '):
+                            file_path = line[len('FILEPATH '):].rstrip('\n')
+                        elif line.startswith('{'):
+                            try:
+                                info = json.loads(line)
+                            except ValueError:
+                                continue
+                            store_video_info(self.url, info)
+                            if not selection:
+                                self.selected.emit(Selection.from_ytdlp_info(info).describe())
+                        else:
+                            tail.append(line.rstrip())
+
+                    self.process.wait() # 프로세스 종료 대기
+                    if self.stopped or not self.restart or self.process.returncode == 0:
+                        break
+            finally:
+                if info_path:
+                    os.remove(info_path)
+
+            if self.stopped:
+                return
+            if self.process.returncode == 0:
+                self.record_download(file_path)
+                self.completed.emit(f"다운로드 완료! 저장 경로: {os.path.abspath(self.save_path)}", file_path or '')
             else:
-                error_output = process.stderr.read()
-                self.error.emit(f"다운로드 실패: {error_output}")
+                self.error.emit(f"다운로드 실패: {' / '.join(line for line in tail if line)}")
 
         except FileNotFoundError:
             self.error.emit("오류: 'yt-dlp'를 찾을 수 없습니다. yt-dlp가 시스템 PATH에 추가되었는지 확인하세요.")
@@ -74,14 +453,188 @@ class DownloaderThread(QThread):
             self.error.emit(f"오류 발생: {e}")
 
 
+class EngineDownloaderThread(DownloaderThread):
+    """yt-dlp를 라이브러리로 불러 같은 프로세스 안에서 다운로드하는 스레드"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.throttle_window = None # (시작 시각, 그때까지 받은 바이트, 한도): 한도가 바뀌면 새로 셉니다.
+
+    def set_rate_limit(self, rate_limit):
+        # 속도는 progress hook에서 직접 맞추므로 다음 호출부터 새 한도가 적용됩니다. (조각 다운로드 포함)
+        self.rate_limit = rate_limit
+
+    def stop(self):
+        # 다음 progress hook 호출에서 DownloadStopped가 발생하며 다운로드가 중단됩니다.
+        self.stopped = True
+
+    def on_progress(self, status):
+        if self.stopped:
+            raise DownloadStopped()
+        if status.get('status') == 'downloading':
+            self.throttle(status.get('downloaded_bytes') or 0)
+            self.report(ProgressEvent.from_hook(status))
+
+    def throttle(self, downloaded):
+        # 현재 한도로 받기 시작한 뒤 받은 양이 한도를 앞서면 그만큼 쉬어 다운로드 스레드를 늦춥니다.
+        limit = self.rate_limit
+        now = time.monotonic()
+        window = self.throttle_window
+        if not limit or window is None or window[2] != limit or downloaded < window[1]:
+            self.throttle_window = (now, downloaded, limit)
+            return
+        end = now + (downloaded - window[1]) / limit - (now - window[0])
+        while not self.stopped and time.monotonic() < end:
+            time.sleep(min(0.1, end - time.monotonic())) # 중지 요청에 바로 반응하도록 잘게 쉽니다.
+
+    def run(self):
+        if self.stopped:
+            return
+        try:
+            file_path = YtDlpEngine.shared().download(
+                self.url, self.save_path, self.on_progress, self.policy,
+                lambda selection: self.selected.emit(selection.describe()))
+            self.record_download(file_path)
+            self.completed.emit(f"다운로드 완료! 저장 경로: {os.path.abspath(self.save_path)}", file_path or '')
+        except DownloadStopped:
+            pass
+        except yt_dlp.utils.DownloadError as e:
+            if not self.stopped:
+                self.error.emit(f"다운로드 실패: {e}")
+        except Exception as e:
+            self.error.emit(f"오류 발생: {e}")
+
+
+class BatchResolverThread(QThread):
+    """
+    재생목록/채널 URL이나 URL 목록을 개별 영상으로 펼친 뒤,
+    영상 정보를 BATCH_METADATA_WORKERS개의 스레드로 동시에 가져옵니다.
+    다운로드 보관 목록이나 저장 폴더에 이미 있는 영상과 대기열에 있는 URL은 건너뜁니다.
+    """
+    resolved = pyqtSignal(str, str, str) # 영상 URL, 제목, 포맷 설명
+    skipped = pyqtSignal(str) # 제목 (보관 목록으로 건너뛴 경우 URL)
+    progress = pyqtSignal(int, int) # 처리한 수, 전체 수
+    error = pyqtSignal(str)
+
+    def __init__(self, sources, save_path, known_urls, use_library=True, policy=None):
+        super().__init__()
+        self.sources = sources
+        self.save_path = save_path
+        self.policy = policy or FormatPolicy.parse('best')
+        self.known_urls = set(known_urls)
+        self.use_library = use_library and yt_dlp is not None
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def list_entries(self, source):
+        if self.use_library:
+            return YtDlpEngine.shared().list_entries(source)
+        output = subprocess.run(
+            ["yt-dlp", "--flat-playlist", "--no-warnings", "--print", "%(webpage_url,url)s", source],
+            capture_output=True, text=True, check=True).stdout
+        return output.split()
+
+    def resolve(self, url):
+        if self.use_library:
+            return YtDlpEngine.shared().resolve(url, self.save_path, self.policy)
+        info = cached_video_info(url)
+        if info is None or not (info.get('filename') or info.get('_filename')):
+            output = subprocess.run(
+                ["yt-dlp", "--no-warnings", "--restrict-filenames", "--no-playlist", "--dump-json",
+                 "-o", os.path.join(self.save_path, OUTPUT_TEMPLATE), url],
+                capture_output=True, text=True, check=True).stdout
+            info = json.loads(output)
+            store_video_info(url, info)
+        # 캐시된 정보는 저장 폴더가 달랐을 수 있으므로 파일 이름만 가져와 현재 폴더에 붙입니다.
+        file_name = os.path.basename(info.get('filename') or info.get('_filename') or '')
+        selection = select_format(info, self.policy)
+        return (info.get('title') or url, policy_file_path(os.path.join(self.save_path, file_name), selection),
+                selection.describe() if selection else '')
+
+    def run(self):
+        urls = []
+        for source in self.sources:
+            if self.stopped:
+                return
+            try:
+                urls.extend(self.list_entries(source))
+            except Exception as e:
+                self.error.emit(f"'{source}' 목록을 가져오지 못했습니다: {e}")
+        # 중복과 이미 대기열에 있는 URL 제거 (순서 유지)
+        urls = [url for url in dict.fromkeys(urls) if url and url not in self.known_urls]
+        # 보관 목록에 있는 영상은 정보를 가져오기 전에 걸러냅니다.
+        archive = DownloadArchive.shared()
+        archived = [url for url in urls if archive.contains(video_key(url), self.policy.name)]
+        for url in archived:
+            self.skipped.emit(url)
+        if archived:
+            urls = [url for url in urls if url not in set(archived)]
+
+        with ThreadPoolExecutor(max_workers=BATCH_METADATA_WORKERS) as pool:
+            futures = {pool.submit(self.resolve, url): url for url in urls}
+            for done, future in enumerate(as_completed(futures), 1):
+                if self.stopped:
+                    for pending in futures:
+                        pending.cancel()
+                    return
+                url = futures[future]
+                try:
+                    title, file_path, description = future.result()
+                except Exception as e:
+                    self.error.emit(f"'{url}' 정보를 가져오지 못했습니다: {e}")
+                else:
+                    if os.path.exists(file_path):
+                        self.skipped.emit(title)
+                    else:
+                        self.resolved.emit(url, title, description)
+                self.progress.emit(done, len(urls))
+
+
+class DownloadItem:
+    """대기열의 다운로드 한 건"""
+    def __init__(self, url, save_path, row, policy, pipeline):
+        self.url = url
+        self.save_path = save_path
+        self.row = row
+        self.policy = policy
+        self.pipeline = pipeline
+        self.status = QUEUED
+        self.thread = None
+
+
 class YoutubeDownloader(QWidget):
+    postprocessed = pyqtSignal(object, object) # DownloadItem, 끝난 후처리 Future (후처리 스레드에서 발생)
+
+    # 대기열 표의 열 순서
+    COLUMNS = ['URL', '포맷', '상태', '진행률', '속도', '남은 시간', '']
+    URL_COLUMN, FORMAT_COLUMN, STATUS_COLUMN, PROGRESS_COLUMN, SPEED_COLUMN, ETA_COLUMN, ACTION_COLUMN = range(7)
+
     def __init__(self):
         super().__init__()
+        self.items = []
+        self.board = ProgressBoard()
+        self.batch_thread = None
+        self.batch_skipped = 0
+        # 후처리는 다운로드 작업자와 별도의 풀에서 실행해 다음 다운로드와 겹치게 합니다.
+        self.post_pool = ThreadPoolExecutor(max_workers=POSTPROCESS_WORKERS)
+        self.postprocessed.connect(self.postprocess_finished)
+        # 값을 입력하는 도중의 변화마다 외부 yt-dlp를 다시 실행하지 않도록 마지막 변경 뒤에 한 번만 적용합니다.
+        self.rate_limit_timer = QTimer(self)
+        self.rate_limit_timer.setSingleShot(True)
+        self.rate_limit_timer.setInterval(RATE_LIMIT_APPLY_DELAY_MS)
+        self.rate_limit_timer.timeout.connect(self.apply_rate_limit)
         self.initUI()
 
+        # 진행 상황은 작업자 수와 관계없이 이 타이머 하나가 일정한 주기로 그립니다.
+        self.repaint_timer = QTimer(self)
+        self.repaint_timer.setInterval(1000 // PROGRESS_FPS)
+        self.repaint_timer.timeout.connect(self.repaint_progress)
+
     def initUI(self):
         self.setWindowTitle('YouTube Downloader (yt-dlp)') # 제목 변경
-        self.setGeometry(300, 300, 500, 200) # 창 크기 조정
+        self.setGeometry(300, 300, 800, 450) # 창 크기 조정
 
         # 레이아웃 설정
         vbox = QVBoxLayout()
@@ -91,6 +644,7 @@ class YoutubeDownloader(QWidget):
         self.url_label = QLabel('영상 URL:')
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText('다운로드할 유튜브 영상의 전체 URL을 입력하세요')
+        self.url_input.returnPressed.connect(self.start_download)
         url_hbox.addWidget(self.url_label)
         url_hbox.addWidget(self.url_input)
         vbox.addLayout(url_hbox)
@@ -106,15 +660,71 @@ class YoutubeDownloader(QWidget):
         path_hbox.addWidget(self.path_button)
         vbox.addLayout(path_hbox)
 
-        # 다운로드 버튼
+        # 동시 다운로드 수와 전체 속도 제한
+        options_hbox = QHBoxLayout()
+        options_hbox.addWidget(QLabel('동시 다운로드:'))
+        self.concurrency_input = QSpinBox()
+        self.concurrency_input.setRange(1, 16)
+        self.concurrency_input.setValue(3)
+        self.concurrency_input.valueChanged.connect(self.schedule)
+        self.concurrency_input.valueChanged.connect(lambda: self.rate_limit_timer.start())
+        options_hbox.addWidget(self.concurrency_input)
+        options_hbox.addWidget(QLabel('전체 속도 제한 (KB/s, 0 = 무제한):'))
+        self.rate_limit_input = QSpinBox()
+        self.rate_limit_input.setRange(0, 1000000)
+        self.rate_limit_input.setSingleStep(100)
+        self.rate_limit_input.valueChanged.connect(lambda: self.rate_limit_timer.start())
+        options_hbox.addWidget(self.rate_limit_input)
+        options_hbox.addWidget(QLabel('엔진:'))
+        self.engine_input = QComboBox()
+        self.engine_input.addItem('내장 (yt_dlp 라이브러리)', EngineDownloaderThread)
+        self.engine_input.addItem('외부 yt-dlp 프로세스', DownloaderThread)
+        if yt_dlp is None: # 라이브러리가 없으면 외부 프로세스만 사용
+            self.engine_input.setCurrentIndex(1)
+            self.engine_input.model().item(0).setEnabled(False)
+        options_hbox.addWidget(self.engine_input)
+        # 포맷 정책: 해상도 상한(720p), 오디오만(audio), 코덱 선호(vp9), 크기 상한(max=300M), 용량 우선(efficient)
+        options_hbox.addWidget(QLabel('포맷:'))
+        self.format_input = QComboBox()
+        self.format_input.setEditable(True)
+        self.format_input.addItems(FORMAT_PRESETS)
+        self.format_input.setToolTip('쉼표로 조합: 720p, audio, avc1/vp9/av01, max=300M, efficient, progressive')
+        options_hbox.addWidget(self.format_input)
+        options_hbox.addStretch()
+        vbox.addLayout(options_hbox)
+
+        # 후처리 단계 (비우면 후처리 없음)
+        post_hbox = QHBoxLayout()
+        post_hbox.addWidget(QLabel('후처리:'))
+        self.post_input = QLineEdit()
+        self.post_input.setPlaceholderText('예: remux:mkv,audio:mp3,thumbnail (ffmpeg 필요)')
+        post_hbox.addWidget(self.post_input)
+        vbox.addLayout(post_hbox)
+
+        # 다운로드 버튼 (대기열에 추가)
+        # 재생목록/채널 URL이나 URL 목록 파일은 일괄 추가로 영상별 항목으로 펼칩니다.
+        buttons_hbox = QHBoxLayout()
         self.download_button = QPushButton('다운로드')
         self.download_button.clicked.connect(self.start_download)
-        vbox.addWidget(self.download_button)
+        self.batch_button = QPushButton('재생목록/채널 추가')
+        self.batch_button.clicked.connect(self.start_batch)
+        self.batch_file_button = QPushButton('URL 목록 파일...')
+        self.batch_file_button.clicked.connect(self.start_batch_from_file)
+        buttons_hbox.addWidget(self.download_button, 1)
+        buttons_hbox.addWidget(self.batch_button)
+        buttons_hbox.addWidget(self.batch_file_button)
+        self.archive_button = QPushButton('보관 목록 가져오기...')
+        self.archive_button.clicked.connect(self.import_archive)
+        buttons_hbox.addWidget(self.archive_button)
+        vbox.addLayout(buttons_hbox)
 
-        # 진행률 표시 바
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setValue(0)
-        vbox.addWidget(self.progress_bar)
+        # 대기열 표
+        self.queue_table = QTableWidget(0, len(self.COLUMNS))
+        self.queue_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.queue_table.horizontalHeader().setSectionResizeMode(self.URL_COLUMN, QHeaderView.Stretch)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.verticalHeader().setVisible(False)
+        vbox.addWidget(self.queue_table)
 
         # 상태 메시지 라벨
         self.status_label = QLabel('준비')
@@ -128,47 +738,352 @@ class YoutubeDownloader(QWidget):
         if path:
             self.path_input.setText(path)
 
-    def start_download(self):
-        url = self.url_input.text()
+    def prepare_save_path(self):
         save_path = self.path_input.text()
-
-        if not url:
-            self.status_label.setText('URL을 입력해주세요.')
-            return
-        
         if not os.path.exists(save_path):
             try:
                 os.makedirs(save_path)
             except OSError:
                 self.status_label.setText('유효하지 않은 저장 경로입니다.')
+                return None
+        return save_path
+
+    def current_policy(self):
+        try:
+            return FormatPolicy.parse(self.format_input.currentText())
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return None
+
+    def current_pipeline(self):
+        # 단계가 없으면 빈 Pipeline, 입력이 잘못되었으면 None
+        try:
+            return Pipeline.parse(self.post_input.text())
+        except ValueError as e:
+            self.status_label.setText(str(e))
+            return None
+
+    def start_download(self):
+        url = self.url_input.text()
+
+        if not url:
+            self.status_label.setText('URL을 입력해주세요.')
+            return
+
+        save_path = self.prepare_save_path()
+        policy = self.current_policy()
+        pipeline = self.current_pipeline()
+        if not save_path or not policy or pipeline is None:
+            return
+
+        if DownloadArchive.shared().contains(video_key(url), policy.name):
+            answer = QMessageBox.question(self, '이미 받은 영상',
+                                          '다운로드 보관 목록에 있는 영상입니다. 다시 받을까요?',
+                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                self.status_label.setText('이미 받은 영상이라 건너뛰었습니다.')
                 return
 
-        self.download_button.setEnabled(False)
-        self.status_label.setText('다운로드 준비 중...')
-        self.progress_bar.setValue(0)
+        self.add_to_queue(url, save_path, policy, pipeline)
+        self.url_input.clear()
+        self.schedule()
+
+    def import_archive(self):
+        # 기존 다운로드 폴더의 '제목 [영상ID].확장자' 파일을 보관 목록에 추가합니다.
+        directory = QFileDialog.getExistingDirectory(self, '보관 목록에 추가할 폴더를 선택하세요', self.path_input.text())
+        if not directory:
+            return
+        try:
+            added = DownloadArchive.shared().import_directory(directory)
+        except OSError as e:
+            QMessageBox.critical(self, '오류', f'보관 목록을 가져올 수 없습니다: {e}')
+            return
+        self.status_label.setText(f"보관 목록에 영상 {added}개를 추가했습니다. (전체 {len(DownloadArchive.shared())}개)")
+
+    # --- 일괄 추가 ---
+    def start_batch(self):
+        url = self.url_input.text().strip()
+        if not url:
+            self.status_label.setText('재생목록 또는 채널 URL을 입력해주세요.')
+            return
+        if self.run_batch([url]):
+            self.url_input.clear()
+
+    def start_batch_from_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, 'URL 목록 파일 열기', '',
+                                                   '텍스트 파일 (*.txt);;모든 파일 (*)')
+        if not file_path:
+            return
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                sources = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, '오류', f'파일을 읽을 수 없습니다: {e}')
+            return
+        self.run_batch(sources)
+
+    def run_batch(self, sources):
+        save_path = self.prepare_save_path()
+        policy = self.current_policy()
+        pipeline = self.current_pipeline()
+        if not save_path or not policy or pipeline is None:
+            return False
+        self.batch_skipped = 0
+        use_library = self.engine_input.currentData() is EngineDownloaderThread
+        self.batch_thread = BatchResolverThread(sources, save_path, [item.url for item in self.items], use_library,
+                                                policy)
+        self.batch_thread.resolved.connect(
+            lambda url, title, description: self.add_batch_item(url, title, description, save_path, policy,
+                                                                pipeline))
+        self.batch_thread.skipped.connect(self.batch_item_skipped)
+        self.batch_thread.progress.connect(self.update_batch_progress)
+        self.batch_thread.error.connect(self.status_label.setText)
+        self.batch_thread.finished.connect(self.batch_finished)
+        self.batch_button.setEnabled(False)
+        self.batch_file_button.setEnabled(False)
+        self.status_label.setText('영상 목록을 가져오는 중...')
+        self.batch_thread.start()
+        return True
+
+    def add_batch_item(self, url, title, description, save_path, policy, pipeline):
+        item = self.add_to_queue(url, save_path, policy, pipeline, title)
+        self.set_format(item, description)
+        self.schedule()
+
+    def batch_item_skipped(self, title):
+        self.batch_skipped += 1
+
+    def update_batch_progress(self, done, total):
+        self.status_label.setText(f"영상 정보 가져오는 중 {done}/{total} (이미 받은 영상 {self.batch_skipped}개 건너뜀)")
+
+    def batch_finished(self):
+        self.batch_thread.deleteLater()
+        self.batch_thread = None
+        self.batch_button.setEnabled(True)
+        self.batch_file_button.setEnabled(True)
+        self.update_summary()
+        if self.batch_skipped:
+            self.status_label.setText(self.status_label.text() + f" · 이미 받은 영상 {self.batch_skipped}개 건너뜀")
+
+    # --- 대기열 관리 ---
+    def add_to_queue(self, url, save_path, policy, pipeline, title=None):
+        row = self.queue_table.rowCount()
+        self.queue_table.insertRow(row)
+        item = DownloadItem(url, save_path, row, policy, pipeline)
+        self.items.append(item)
+
+        url_cell = QTableWidgetItem(title or url)
+        url_cell.setToolTip(url)
+        self.queue_table.setItem(row, self.URL_COLUMN, url_cell)
+        for column in (self.STATUS_COLUMN, self.SPEED_COLUMN, self.ETA_COLUMN):
+            self.queue_table.setItem(row, column, QTableWidgetItem(''))
+        self.queue_table.setItem(row, self.FORMAT_COLUMN, QTableWidgetItem(policy.name))
+        progress_bar = QProgressBar()
+        progress_bar.setValue(0)
+        self.queue_table.setCellWidget(row, self.PROGRESS_COLUMN, progress_bar)
+
+        # 항목별 일시정지/재개, 취소, 재시도 버튼
+        actions = QWidget()
+        actions_hbox = QHBoxLayout()
+        actions_hbox.setContentsMargins(0, 0, 0, 0)
+        item.pause_button = QPushButton('일시정지')
+        item.pause_button.clicked.connect(lambda: self.toggle_pause(item))
+        item.cancel_button = QPushButton('취소')
+        item.cancel_button.clicked.connect(lambda: self.cancel_item(item))
+        item.retry_button = QPushButton('재시도')
+        item.retry_button.clicked.connect(lambda: self.retry_item(item))
+        for button in (item.pause_button, item.cancel_button, item.retry_button):
+            actions_hbox.addWidget(button)
+        actions.setLayout(actions_hbox)
+        self.queue_table.setCellWidget(row, self.ACTION_COLUMN, actions)
+        self.queue_table.resizeColumnToContents(self.ACTION_COLUMN)
+
+        self.set_status(item, QUEUED)
+        return item
 
-        # 다운로드 스레드 시작
-        self.downloader = DownloaderThread(url, save_path)
-        self.downloader.progress.connect(self.update_progress)
-        self.downloader.finished.connect(self.download_finished)
-        self.downloader.error.connect(self.download_error)
-        self.downloader.start()
+    def running_items(self):
+        # 일시정지나 취소를 해도 스레드가 실제로 끝날 때(thread_finished)까지는 자리를 차지합니다.
+        # (.part 파일에 아직 쓰고 있는 스레드 옆에서 새 다운로드가 시작되지 않도록)
+        return [item for item in self.items if item.thread]
 
-    def update_progress(self, percentage):
-        self.progress_bar.setValue(percentage)
-        self.status_label.setText(f"다운로드 중... {percentage}%")
+    def per_download_rate_limit(self):
+        # yt-dlp는 다운로드마다 속도를 제한하므로, 전체 한도를 최대 동시 다운로드 수로 나눠
+        # 모든 작업이 동시에 돌아도 합계가 한도를 넘지 않게 합니다.
+        # 동시 다운로드 수를 줄인 직후에는 아직 도는 스레드가 더 많을 수 있으므로 그 수로 나눕니다.
+        total = self.rate_limit_input.value() * 1024
+        return total // max(self.concurrency_input.value(), len(self.running_items())) if total else 0
 
-    def download_finished(self, message):
-        self.status_label.setText(message)
-        self.download_button.setEnabled(True)
-        self.progress_bar.setValue(100) # 완료 시 100%로 설정
+    def apply_rate_limit(self):
+        # 한도 몫이 바뀌면 실행 중인 다운로드에도 바로 나눠 줍니다.
+        rate_limit = self.per_download_rate_limit()
+        for item in self.items:
+            if item.thread:
+                item.thread.set_rate_limit(rate_limit)
 
-    def download_error(self, error_message):
+    def schedule(self):
+        # 빈 자리만큼 대기 중인 항목을 시작합니다.
+        free_slots = self.concurrency_input.value() - len(self.running_items())
+        for item in self.items:
+            if free_slots <= 0:
+                break
+            if item.status == QUEUED:
+                self.start_item(item)
+                free_slots -= 1
+        if self.running_items():
+            self.repaint_timer.start()
+        else:
+            self.repaint_timer.stop()
+            self.repaint_progress()
+        self.update_summary()
+
+    def start_item(self, item):
+        thread_class = self.engine_input.currentData()
+        thread = thread_class(item.url, item.save_path, self.per_download_rate_limit(), self.board, item,
+                              item.policy)
+        self.board.forget(item) # 재시도/재개 시 이전 속도 평균을 버립니다.
+        thread.selected.connect(lambda description: self.set_format(item, description))
+        thread.completed.connect(lambda message, file_path: self.download_finished(item, message, file_path))
+        thread.error.connect(lambda message: self.download_error(item, message))
+        thread.finished.connect(lambda: self.thread_finished(item, thread))
+        item.thread = thread
+        self.set_status(item, RUNNING)
+        thread.start()
+
+    def thread_finished(self, item, thread):
+        if item.thread is thread:
+            item.thread = None
+            self.set_status(item, item.status) # 스레드가 끝났으니 재개/재시도 버튼을 다시 켭니다.
+        thread.deleteLater()
+        self.apply_rate_limit() # 넘쳐 있던 스레드가 끝나면 남은 다운로드의 몫이 늘어납니다.
+        self.schedule()
+
+    def stop_item(self, item, status):
+        self.set_status(item, status)
+        if item.thread:
+            item.thread.stop()
+
+    def toggle_pause(self, item):
+        if item.status in (RUNNING, QUEUED):
+            self.stop_item(item, PAUSED)
+        elif item.status == PAUSED and not item.thread: # 이전 스레드가 끝나야 재개할 수 있습니다.
+            self.set_status(item, QUEUED)
+        self.schedule()
+
+    def cancel_item(self, item):
+        if item.status in (RUNNING, QUEUED, PAUSED):
+            self.stop_item(item, CANCELLED)
+        self.schedule()
+
+    def retry_item(self, item):
+        if item.status in (FAILED, CANCELLED) and not item.thread:
+            progress_bar = self.queue_table.cellWidget(item.row, self.PROGRESS_COLUMN)
+            progress_bar.setValue(0)
+            progress_bar.resetFormat()
+            self.set_status(item, QUEUED)
+        self.schedule()
+
+    def set_status(self, item, status):
+        item.status = status
+        self.queue_table.item(item.row, self.STATUS_COLUMN).setText(STATUS_TEXT[status])
+        if status != RUNNING:
+            self.queue_table.item(item.row, self.SPEED_COLUMN).setText('')
+            self.queue_table.item(item.row, self.ETA_COLUMN).setText('')
+        item.pause_button.setText('재개' if status == PAUSED else '일시정지')
+        # 멈춘 스레드가 아직 끝나지 않았으면 재개/재시도는 thread_finished까지 막아 둡니다.
+        item.pause_button.setEnabled(status in (QUEUED, RUNNING) or (status == PAUSED and not item.thread))
+        item.cancel_button.setEnabled(status in (QUEUED, RUNNING, PAUSED))
+        item.retry_button.setEnabled(status in (FAILED, CANCELLED) and not item.thread)
+
+    def set_format(self, item, description):
+        # 포맷 열에는 정책 이름을 두고, 고른 포맷과 예상 크기가 정해지면 그것으로 바꿉니다.
+        if description:
+            cell = self.queue_table.item(item.row, self.FORMAT_COLUMN)
+            cell.setText(description)
+            cell.setToolTip(f"정책: {item.policy.name}")
+
+    def update_summary(self):
+        counts = {status: 0 for status in STATUS_TEXT}
+        for item in self.items:
+            counts[item.status] += 1
+        text = f"다운로드 중 {counts[RUNNING]} · 대기 {counts[QUEUED]} · 완료 {counts[DONE]} · 실패 {counts[FAILED]}"
+        if counts[POSTPROCESSING]:
+            text += f" · 후처리 중 {counts[POSTPROCESSING]}"
+        self.status_label.setText(text)
+
+    def repaint_progress(self):
+        for item, event in self.board.take().items():
+            self.update_progress(item, event)
+
+    def update_progress(self, item, event):
+        if item.status != RUNNING:
+            return
+        progress_bar = self.queue_table.cellWidget(item.row, self.PROGRESS_COLUMN)
+        if event.percent is not None:
+            progress_bar.setValue(int(event.percent))
+        text = f"%p% · {format_bytes(event.downloaded_bytes)} / {format_bytes(event.total_bytes)}"
+        if event.fragment_count:
+            text += f" (조각 {event.fragment_index}/{event.fragment_count})"
+        progress_bar.setFormat(text)
+        self.queue_table.item(item.row, self.SPEED_COLUMN).setText(
+            f"{format_bytes(event.speed)}/s" if event.speed else '')
+        self.queue_table.item(item.row, self.ETA_COLUMN).setText(format_eta(event.eta))
+
+    def download_finished(self, item, message, file_path):
+        progress_bar = self.queue_table.cellWidget(item.row, self.PROGRESS_COLUMN)
+        progress_bar.setValue(100) # 완료 시 100%로 설정
+        progress_bar.resetFormat()
+        self.queue_table.item(item.row, self.STATUS_COLUMN).setToolTip(message)
+        if item.pipeline and file_path:
+            # 다운로드 자리는 스레드가 끝나면 바로 비고 (running_items에서 빠짐) 후처리는 별도 풀에서 진행합니다.
+            self.set_status(item, POSTPROCESSING)
+            future = self.post_pool.submit(self.post_process, item, file_path)
+            future.add_done_callback(lambda future: self.postprocessed.emit(item, future))
+        else:
+            self.set_status(item, DONE)
+
+    @staticmethod
+    def post_process(item, file_path):
+        # 후처리 스레드에서 실행: 썸네일 주소는 캐시된 영상 정보에서 가져옵니다.
+        info = cached_video_info(item.url) or {}
+        job = item.pipeline.run(file_path, info.get('thumbnail'))
+        if job.file_path != file_path: # remux 등으로 본 파일이 바뀌면 보관 목록의 경로도 고칩니다.
+            DownloadArchive.shared().add(video_key(item.url), item.policy.name, job.file_path)
+        return job
+
+    def postprocess_finished(self, item, future):
+        status_cell = self.queue_table.item(item.row, self.STATUS_COLUMN)
+        try:
+            job = future.result()
+        except Exception as e:
+            self.set_status(item, FAILED)
+            status_cell.setToolTip(f"후처리 실패: {e}")
+            self.status_label.setText(f"후처리 실패: {e}")
+            return
+        self.set_status(item, DONE)
+        timings = ', '.join(f"{name} {seconds:.1f}초" for name, seconds in job.timings)
+        status_cell.setToolTip(f"{job.file_path}\n후처리: {timings}")
+        self.update_summary()
+
+    def download_error(self, item, error_message):
+        self.set_status(item, FAILED)
+        self.queue_table.item(item.row, self.STATUS_COLUMN).setToolTip(error_message)
         self.status_label.setText(error_message)
-        self.download_button.setEnabled(True)
+
+    def closeEvent(self, event):
+        # 실행 중인 yt-dlp 프로세스를 정리하고 스레드가 끝날 때까지 기다립니다.
+        if self.batch_thread:
+            self.batch_thread.stop()
+            self.batch_thread.wait()
+        for item in self.items:
+            if item.thread:
+                item.thread.stop()
+                item.thread.wait()
+        # 시작하지 않은 후처리는 취소하고, 실행 중인 ffmpeg는 끝날 때까지 기다립니다.
+        self.post_pool.shutdown(wait=True, cancel_futures=True)
+        event.accept()
 
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     ex = YoutubeDownloader()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())